@@ -4,7 +4,7 @@ import copy
 import numpy as np
 from scipy.special import gammaln
 
-from .utils import infer_parameters_from_function
+from .utils import infer_parameters_from_function, logger
 
 
 class Likelihood(object):
@@ -48,6 +48,76 @@ class Likelihood(object):
         """
         return self.log_likelihood() - self.noise_log_likelihood()
 
+    def log_likelihood_batch(self, parameters):
+        """ The log likelihood evaluated at a batch of points
+
+        By default this evaluates `log_likelihood` at each point in turn,
+        subclasses can override this with a vectorised implementation.
+
+        Parameters
+        ----------
+        parameters: dict
+            Dictionary of arrays of parameter values with shape (n_points,),
+            any parameters not given are taken from `self.parameters`.
+
+        Returns
+        -------
+        array_like: The log likelihood at each point, shape (n_points,)
+        """
+        parameters, n_points = self._complete_batch_parameters(parameters)
+        log_l = np.zeros(n_points)
+        for ii in range(n_points):
+            self.parameters.update(
+                {key: parameters[key][ii] for key in parameters})
+            log_l[ii] = self.log_likelihood()
+        return log_l
+
+    def log_likelihood_ratio_batch(self, parameters):
+        """ The log likelihood ratio evaluated at a batch of points
+
+        Parameters
+        ----------
+        parameters: dict
+            Dictionary of arrays of parameter values with shape (n_points,),
+            any parameters not given are taken from `self.parameters`.
+
+        Returns
+        -------
+        array_like: The log likelihood ratio at each point, shape (n_points,)
+        """
+        return self.log_likelihood_batch(parameters) - self.noise_log_likelihood()
+
+    def _complete_batch_parameters(self, parameters):
+        """ Fill in the parameters missing from a batch using
+        `self.parameters` and broadcast all values to a common length
+
+        Parameters
+        ----------
+        parameters: dict
+            Dictionary of arrays of parameter values
+
+        Returns
+        -------
+        parameters: dict
+            Dictionary of arrays of parameter values with shape (n_points,)
+            for all of the keys in `self.parameters`
+        n_points: int
+            The number of points in the batch
+        """
+        parameters = {key: np.atleast_1d(value)
+                      for key, value in parameters.items()}
+        n_points = max([len(value) for value in parameters.values()] + [1])
+        for key in self.parameters:
+            if key not in parameters:
+                parameters[key] = np.atleast_1d(self.parameters[key])
+        for key in parameters:
+            if len(parameters[key]) not in [1, n_points]:
+                raise ValueError(
+                    'Batch parameter {} has length {}, expected {}'.format(
+                        key, len(parameters[key]), n_points))
+            parameters[key] = np.broadcast_to(parameters[key], n_points)
+        return parameters, n_points
+
     @property
     def meta_data(self):
         try:
@@ -86,6 +156,7 @@ class Analytical1DLikelihood(Likelihood):
         self.y = y
         self.__func = func
         self.__function_keys = list(self.parameters.keys())
+        self._func_is_vectorised = None
 
     def __repr__(self):
         return self.__class__.__name__ + '(x={}, y={}, func={})'.format(self.x, self.y, self.func.__name__)
@@ -137,6 +208,57 @@ class Analytical1DLikelihood(Likelihood):
         """ Residual of the function against the data. """
         return self.y - self.func(self.x, **self.model_parameters)
 
+    def model_batch(self, parameters):
+        """ Evaluate the function for a batch of points
+
+        The function is evaluated once, with the parameters broadcast against
+        `x`, if this gives the same answer as evaluating the first point on
+        its own. Otherwise, the function is evaluated at each point in turn.
+
+        Parameters
+        ----------
+        parameters: dict
+            Dictionary of arrays of parameter values with shape (n_points,),
+            this must contain all of the function keys.
+
+        Returns
+        -------
+        array_like: The function evaluated at each point, shape (n_points, n)
+        """
+        n_points = max([len(value) for value in parameters.values()] + [1])
+        if self._func_is_vectorised is not False:
+            model = self._vectorised_model_batch(parameters, n_points)
+            if model is not None:
+                return model
+        return np.array([
+            np.broadcast_to(self.func(self.x, **{
+                key: parameters[key][ii] for key in self.function_keys}), self.n)
+            for ii in range(n_points)])
+
+    def _vectorised_model_batch(self, parameters, n_points):
+        """ Evaluate the function for all points at once, checking the first
+        time this is called that the function broadcasts correctly. Returns
+        None if it does not. """
+        model_parameters = {
+            key: np.asarray(parameters[key])[:, np.newaxis]
+            for key in self.function_keys}
+        try:
+            model = np.broadcast_to(
+                self.func(np.asarray(self.x)[np.newaxis, :], **model_parameters),
+                (n_points, self.n))
+        except (TypeError, ValueError, IndexError):
+            model = None
+        if self._func_is_vectorised is None:
+            single = self.func(self.x, **{
+                key: parameters[key][0] for key in self.function_keys})
+            self._func_is_vectorised = (
+                model is not None and np.allclose(model[0], single, equal_nan=True))
+            if not self._func_is_vectorised:
+                logger.debug('{} cannot be evaluated for a batch of points '
+                             'at once'.format(self.func.__name__))
+                return None
+        return model
+
 
 class GaussianLikelihood(Analytical1DLikelihood):
     def __init__(self, x, y, func, sigma=None):
@@ -173,6 +295,16 @@ class GaussianLikelihood(Analytical1DLikelihood):
                        np.log(2 * np.pi * self.sigma**2) / 2)
         return log_l
 
+    def log_likelihood_batch(self, parameters):
+        parameters, _ = self._complete_batch_parameters(parameters)
+        if 'sigma' in parameters:
+            sigma = parameters['sigma'][:, np.newaxis]
+        else:
+            sigma = self._sigma
+        residual = self.y - self.model_batch(parameters)
+        return np.sum(- (residual / sigma)**2 / 2 -
+                      np.log(2 * np.pi * sigma**2) / 2, axis=-1)
+
     def __repr__(self):
         return self.__class__.__name__ + '(x={}, y={}, func={}, sigma={})' \
             .format(self.x, self.y, self.func.__name__, self.sigma)
@@ -238,6 +370,19 @@ class PoissonLikelihood(Analytical1DLikelihood):
         else:
             return np.sum(-rate + self.y * np.log(rate) - gammaln(self.y + 1))
 
+    def log_likelihood_batch(self, parameters):
+        parameters, _ = self._complete_batch_parameters(parameters)
+        rate = self.model_batch(parameters)
+        if np.any(rate < 0.):
+            raise ValueError(("Poisson rate function returns a negative",
+                              " value!"))
+        zero_rate = np.any(rate == 0., axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_l = np.sum(-rate + self.y * np.log(rate) - gammaln(self.y + 1),
+                           axis=-1)
+        log_l[zero_rate] = -np.inf
+        return log_l
+
     def __repr__(self):
         return Analytical1DLikelihood.__repr__(self)
 
@@ -281,6 +426,15 @@ class ExponentialLikelihood(Analytical1DLikelihood):
             return -np.inf
         return -np.sum(np.log(mu) + (self.y / mu))
 
+    def log_likelihood_batch(self, parameters):
+        parameters, _ = self._complete_batch_parameters(parameters)
+        mu = self.model_batch(parameters)
+        negative = np.any(mu < 0., axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_l = -np.sum(np.log(mu) + (self.y / mu), axis=-1)
+        log_l[negative] = -np.inf
+        return log_l
+
     def __repr__(self):
         return Analytical1DLikelihood.__repr__(self)
 
@@ -349,6 +503,23 @@ class StudentTLikelihood(Analytical1DLikelihood):
                    gammaln((nu + 1) / 2) - gammaln(nu / 2))
         return log_l
 
+    def log_likelihood_batch(self, parameters):
+        parameters, _ = self._complete_batch_parameters(parameters)
+        if 'nu' in parameters:
+            nu = parameters['nu'][:, np.newaxis]
+        else:
+            nu = np.atleast_1d(self._nu)
+        if np.any(nu <= 0.):
+            raise ValueError("Number of degrees of freedom for Student's "
+                             "t-likelihood must be positive")
+
+        residual = self.y - self.model_batch(parameters)
+        log_l =\
+            np.sum(- (nu + 1) * np.log1p(self.lam * residual**2 / nu) / 2 +
+                   np.log(self.lam / (nu * np.pi)) / 2 +
+                   gammaln((nu + 1) / 2) - gammaln(nu / 2), axis=-1)
+        return log_l
+
     def __repr__(self):
         base_string = '(x={}, y={}, func={}, nu={}, sigma={})'
         return self.__class__.__name__ + base_string.format(
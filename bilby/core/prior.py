@@ -27,6 +27,7 @@ class PriorDict(OrderedDict):
             If given, a file containing the prior to generate the prior set.
         """
         OrderedDict.__init__(self)
+        self._cached_priors = dict()
         if isinstance(dictionary, dict):
             self.from_dictionary(dictionary)
         elif type(dictionary) is str:
@@ -40,6 +41,46 @@ class PriorDict(OrderedDict):
 
         self.convert_floats_to_delta_functions()
 
+    def __setitem__(self, key, value):
+        OrderedDict.__setitem__(self, key, value)
+        self._cached_priors = dict()
+
+    def __delitem__(self, key):
+        OrderedDict.__delitem__(self, key)
+        self._cached_priors = dict()
+
+    def pop(self, *args):
+        self._cached_priors = dict()
+        return OrderedDict.pop(self, *args)
+
+    def popitem(self, *args, **kwargs):
+        self._cached_priors = dict()
+        return OrderedDict.popitem(self, *args, **kwargs)
+
+    def clear(self):
+        self._cached_priors = dict()
+        OrderedDict.clear(self)
+
+    def _priors_for_keys(self, keys):
+        """ The priors for keys, in order, cached until the dictionary changes
+
+        Parameters
+        ----------
+        keys: list
+            List of prior keys
+
+        Returns
+        -------
+        list: The Prior instances for each of the keys
+        """
+        keys = tuple(keys)
+        try:
+            return self._cached_priors[keys]
+        except KeyError:
+            priors = [self[key] for key in keys]
+            self._cached_priors[keys] = priors
+            return priors
+
     def to_file(self, outdir, label):
         """ Write the prior distribution to file.
 
@@ -170,6 +211,30 @@ class PriorDict(OrderedDict):
         """
         return self.sample_subset(keys=self.keys(), size=size)
 
+    def sample_array(self, keys, size=None):
+        """Draw samples of a set of parameters as an array
+
+        Parameters
+        ----------
+        keys: list
+            List of prior keys to draw samples from, in the order of the
+            columns of the output
+        size: int, optional
+            The number of samples to draw
+
+        Returns
+        -------
+        array_like: The samples, shape (size, len(keys)), or (len(keys),) if
+            size is None
+        """
+        priors = self._priors_for_keys(keys)
+        if size is None:
+            return np.array([prior.sample() for prior in priors])
+        samples = np.empty((size, len(priors)))
+        for ii, prior in enumerate(priors):
+            samples[:, ii] = prior.sample(size=size)
+        return samples
+
     def sample_subset(self, keys=iter([]), size=None):
         """Draw samples from the prior set for parameters which are not a DeltaFunction
 
@@ -229,6 +294,32 @@ class PriorDict(OrderedDict):
         return np.sum([self[key].ln_prob(sample[key]) for key in sample],
                       axis=axis)
 
+    def ln_prob_array(self, keys, samples):
+        """Log probability of samples given as an array
+
+        Parameters
+        ----------
+        keys: list
+            List of prior keys associated with the columns of samples
+        samples: array_like
+            Array of samples, shape (n_points, len(keys)) or (len(keys),)
+
+        Returns
+        -------
+        float or ndarray:
+            Joint log probability of each sample, shape (n_points,)
+
+        """
+        priors = self._priors_for_keys(keys)
+        if np.ndim(samples) == 2:
+            samples = np.asarray(samples, dtype=float)
+            ln_prob = np.zeros(len(samples))
+            for ii, prior in enumerate(priors):
+                ln_prob += prior.ln_prob(samples[:, ii])
+            return ln_prob
+        return np.sum([prior.ln_prob(sample)
+                       for prior, sample in zip(priors, samples)])
+
     def rescale(self, keys, theta):
         """Rescale samples from unit cube to prior
 
@@ -236,14 +327,25 @@ class PriorDict(OrderedDict):
         ----------
         keys: list
             List of prior keys to be rescaled
-        theta: list
-            List of randomly drawn values on a unit cube associated with the prior keys
+        theta: list or array_like
+            List of randomly drawn values on a unit cube associated with the
+            prior keys, or an array of shape (n_points, len(keys)) of such
+            values
 
         Returns
         -------
-        list: List of floats containing the rescaled sample
-        """
-        return [self[key].rescale(sample) for key, sample in zip(keys, theta)]
+        list or array_like: List of floats containing the rescaled sample, or
+            an array of shape (n_points, len(keys)) if theta is two
+            dimensional
+        """
+        priors = self._priors_for_keys(keys)
+        if np.ndim(theta) == 2:
+            theta = np.asarray(theta, dtype=float)
+            rescaled = np.empty(theta.shape)
+            for ii, prior in enumerate(priors):
+                rescaled[:, ii] = prior.rescale(theta[:, ii])
+            return rescaled
+        return [prior.rescale(sample) for prior, sample in zip(priors, theta)]
 
     def test_redundancy(self, key):
         """Empty redundancy test, should be overwritten in subclasses"""
@@ -1303,9 +1405,9 @@ class Beta(Prior):
 
         # deal with the fact that if alpha or beta are < 1 you get infinities at 0 and 1
         if isinstance(val, np.ndarray):
-            pdf = np.zeros(len(val))
-            pdf[np.isfinite(spdf)] = spdf[np.isfinite]
-            return spdf
+            pdf = np.zeros(val.shape)
+            pdf[np.isfinite(spdf)] = spdf[np.isfinite(spdf)]
+            return pdf
         else:
             return 0.
 
@@ -1316,9 +1418,9 @@ class Beta(Prior):
             return spdf
 
         if isinstance(val, np.ndarray):
-            pdf = -np.inf * np.ones(len(val))
-            pdf[np.isfinite(spdf)] = spdf[np.isfinite]
-            return spdf
+            pdf = -np.inf * np.ones(val.shape)
+            pdf[np.isfinite(spdf)] = spdf[np.isfinite(spdf)]
+            return pdf
         else:
             return -np.inf
 
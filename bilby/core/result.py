@@ -7,6 +7,7 @@ from collections import OrderedDict, namedtuple
 import numpy as np
 import deepdish
 import pandas as pd
+import tables
 import corner
 import scipy.stats
 import matplotlib
@@ -36,12 +37,69 @@ def result_file_name(outdir, label):
     return '{}/{}_result.h5'.format(outdir, label)
 
 
-def read_in_result(filename=None, outdir=None, label=None):
+def read_in_result(filename=None, outdir=None, label=None, lazy=False):
     """ Wrapper to bilby.core.result.Result.from_hdf5 """
-    return Result.from_hdf5(filename=filename, outdir=outdir, label=label)
+    return Result.from_hdf5(filename=filename, outdir=outdir, label=label,
+                            lazy=lazy)
+
+
+def _result_file_entries(filename):
+    """ The group containing a saved result and the names of its entries
+
+    `Result.save_to_file` saves an OrderedDict, which deepdish writes to a
+    group named 'data'. The scalar entries are stored as attributes of the
+    group, the others as nodes.
+
+    Parameters
+    ----------
+    filename: str
+        The result file
+
+    Returns
+    -------
+    group: str
+        The path to the group containing the result
+    entries: list
+        The names of the entries of the result
+    """
+    def user_attributes(node):
+        return [key for key in node._v_attrs._f_list('user')
+                if not key.startswith('DEEPDISH_IO')]
+
+    with tables.open_file(filename, 'r') as f:
+        node = f.root
+        group = ''
+        if list(node._v_children) == ['data'] and \
+                len(user_attributes(node)) == 0:
+            node = node.data
+            group = '/data'
+        return group, list(node._v_children) + user_attributes(node)
+
+
+def _posterior_from_columns(posterior, columns=None):
+    """ Convert a posterior saved as a dictionary of columns to a DataFrame
+
+    Parameters
+    ----------
+    posterior: dict, pandas.DataFrame
+        The posterior as read from file, older result files store a DataFrame
+    columns: list, optional
+        The order of the columns
+
+    Returns
+    -------
+    pandas.DataFrame: The posterior
+    """
+    if isinstance(posterior, dict):
+        posterior = pd.DataFrame(posterior, columns=columns)
+    return posterior
 
 
 class Result(object):
+    # The entries which are only read from file when accessed by a result
+    # loaded with lazy=True
+    lazy_entries = ['posterior', 'samples', 'nested_samples', 'walkers']
+
     def __init__(self, label='no_label', outdir='.', sampler=None,
                  search_parameter_keys=None, fixed_parameter_keys=None,
                  priors=None, sampler_kwargs=None, injection_parameters=None,
@@ -101,6 +159,9 @@ class Result(object):
 
         """
 
+        self._lazy_file = None
+        self._unloaded_entries = set()
+        self._posterior_columns = None
         self.label = label
         self.outdir = os.path.abspath(outdir)
         self.sampler = sampler
@@ -131,7 +192,7 @@ class Result(object):
         self._kde = None
 
     @classmethod
-    def from_hdf5(cls, filename=None, outdir=None, label=None):
+    def from_hdf5(cls, filename=None, outdir=None, label=None, lazy=False):
         """ Read in a saved .h5 data file
 
         Parameters
@@ -140,6 +201,11 @@ class Result(object):
             If given, try to load from this filename
         outdir, label: str
             If given, use the default naming convention for saved results file
+        lazy: bool
+            If True, the entries in `Result.lazy_entries`, i.e., the posterior,
+            samples, nested_samples and walkers, are only read from the file
+            when they are first accessed. The file must not be changed
+            before then.
 
         Returns
         -------
@@ -156,18 +222,44 @@ class Result(object):
                 raise ValueError("No information given to load file")
             else:
                 filename = result_file_name(outdir, label)
-        if os.path.isfile(filename):
+        if not os.path.isfile(filename):
+            raise IOError("No result '{}' found".format(filename))
+        if lazy:
+            group, entries = _result_file_entries(filename)
+            keys = [key for key in entries if key not in cls.lazy_entries]
+            dictionary = dict(zip(keys, deepdish.io.load(
+                filename, ['{}/{}'.format(group, key) for key in keys])))
+        else:
             dictionary = deepdish.io.load(filename)
             # Some versions of deepdish/pytables return the dictionanary as
             # a dictionary with a kay 'data'
             if len(dictionary) == 1 and 'data' in dictionary:
                 dictionary = dictionary['data']
-            try:
-                return cls(**dictionary)
-            except TypeError as e:
-                raise IOError("Unable to load dictionary, error={}".format(e))
-        else:
-            raise IOError("No result '{}' found".format(filename))
+        posterior_columns = dictionary.pop('posterior_columns', None)
+        if 'posterior' in dictionary:
+            dictionary['posterior'] = _posterior_from_columns(
+                dictionary['posterior'], posterior_columns)
+        try:
+            result = cls(**dictionary)
+        except TypeError as e:
+            raise IOError("Unable to load dictionary, error={}".format(e))
+        if lazy:
+            result._lazy_file = (filename, group)
+            result._unloaded_entries = set(cls.lazy_entries) & set(entries)
+            result._posterior_columns = posterior_columns
+        return result
+
+    def _load_lazy_entry(self, name):
+        """ Read an entry of a result loaded with lazy=True, if it has not
+        been read or set yet """
+        if name not in self._unloaded_entries:
+            return
+        filename, group = self._lazy_file
+        logger.debug("Reading {} from {}".format(name, filename))
+        value = deepdish.io.load(filename, '{}/{}'.format(group, name))
+        if name == 'posterior':
+            value = _posterior_from_columns(value, self._posterior_columns)
+        setattr(self, name, value)
 
     def __str__(self):
         """Print a summary """
@@ -216,6 +308,7 @@ class Result(object):
     @property
     def samples(self):
         """ An array of samples """
+        self._load_lazy_entry('samples')
         if self._samples is not None:
             return self._samples
         else:
@@ -223,11 +316,13 @@ class Result(object):
 
     @samples.setter
     def samples(self, samples):
+        self._unloaded_entries.discard('samples')
         self._samples = samples
 
     @property
     def nested_samples(self):
         """" An array of unweighted samples """
+        self._load_lazy_entry('nested_samples')
         if self._nested_samples is not None:
             return self._nested_samples
         else:
@@ -235,11 +330,13 @@ class Result(object):
 
     @nested_samples.setter
     def nested_samples(self, nested_samples):
+        self._unloaded_entries.discard('nested_samples')
         self._nested_samples = nested_samples
 
     @property
     def walkers(self):
         """" An array of the ensemble walkers """
+        self._load_lazy_entry('walkers')
         if self._walkers is not None:
             return self._walkers
         else:
@@ -247,6 +344,7 @@ class Result(object):
 
     @walkers.setter
     def walkers(self, walkers):
+        self._unloaded_entries.discard('walkers')
         self._walkers = walkers
 
     @property
@@ -264,6 +362,7 @@ class Result(object):
     @property
     def posterior(self):
         """ A pandas data frame of the posterior """
+        self._load_lazy_entry('posterior')
         if self._posterior is not None:
             return self._posterior
         else:
@@ -271,6 +370,7 @@ class Result(object):
 
     @posterior.setter
     def posterior(self, posterior):
+        self._unloaded_entries.discard('posterior')
         self._posterior = posterior
 
     @property
@@ -307,6 +407,10 @@ class Result(object):
         """
         Writes the Result to a deepdish h5 file
 
+        The posterior is written as one dataset per parameter, and the scalar
+        entries as attributes, so that they can be read individually, see
+        `Result.from_hdf5`.
+
         Parameters
         ----------
         overwrite: bool, optional
@@ -318,6 +422,10 @@ class Result(object):
         outdir = self._safe_outdir_creation(outdir, self.save_to_file)
         file_name = result_file_name(outdir, self.label)
 
+        # Read any lazily loaded entries before their file may be replaced
+        for name in list(self._unloaded_entries):
+            self._load_lazy_entry(name)
+
         if os.path.isfile(file_name):
             if overwrite:
                 logger.debug('Removing existing file {}'.format(file_name))
@@ -332,6 +440,13 @@ class Result(object):
 
         # Convert the prior to a string representation for saving on disk
         dictionary = self._get_save_data_dictionary()
+        # Save the posterior as one dataset per parameter
+        if isinstance(dictionary.get('posterior', None), pd.DataFrame):
+            dictionary['posterior_columns'] = [
+                str(key) for key in self.posterior.columns]
+            dictionary['posterior'] = {
+                str(key): self.posterior[key].values
+                for key in self.posterior.columns}
         if dictionary.get('priors', False):
             dictionary['priors'] = {key: str(self.priors[key]) for key in self.priors}
 
@@ -859,7 +974,7 @@ class Result(object):
         plt.close(fig)
 
     def samples_to_posterior(self, likelihood=None, priors=None,
-                             conversion_function=None):
+                             conversion_function=None, npool=1):
         """
         Convert array of samples to posterior (a Pandas data frame)
 
@@ -874,6 +989,9 @@ class Result(object):
         conversion_function: function, optional
             Function which adds in extra parameters to the data frame,
             should take the data_frame, likelihood and prior as arguments.
+        npool: int, optional
+            Number of processes the conversion function may use, this is
+            only passed if the conversion function takes an `npool` argument.
         """
         try:
             data_frame = self.posterior
@@ -888,12 +1006,18 @@ class Result(object):
             data_frame['log_likelihood'] = getattr(
                 self, 'log_likelihood_evaluations', np.nan)
             if self.log_prior_evaluations is None:
-                data_frame['log_prior'] = self.priors.ln_prob(
-                    data_frame[self.search_parameter_keys], axis=0)
+                data_frame['log_prior'] = self.priors.ln_prob_array(
+                    self.search_parameter_keys,
+                    data_frame[self.search_parameter_keys].values)
             else:
                 data_frame['log_prior'] = self.log_prior_evaluations
         if conversion_function is not None:
-            data_frame = conversion_function(data_frame, likelihood, priors)
+            if npool > 1 and 'npool' in infer_parameters_from_function(
+                    conversion_function):
+                data_frame = conversion_function(
+                    data_frame, likelihood, priors, npool=npool)
+            else:
+                data_frame = conversion_function(data_frame, likelihood, priors)
         self.posterior = data_frame
 
     def calculate_prior_values(self, priors):
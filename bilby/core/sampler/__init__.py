@@ -43,7 +43,7 @@ def run_sampler(likelihood, priors=None, label='label', outdir='outdir',
                 sampler='dynesty', use_ratio=None, injection_parameters=None,
                 conversion_function=None, plot=False, default_priors_file=None,
                 clean=None, meta_data=None, save=True, result_class=None,
-                **kwargs):
+                npool=1, **kwargs):
     """
     The primary interface to easy parameter estimation
 
@@ -89,6 +89,11 @@ def run_sampler(likelihood, priors=None, label='label', outdir='outdir',
         The result class to use. By default, `bilby.core.result.Result` is used,
         but objects which inherit from this class can be given providing
         additional methods.
+    npool: int
+        The number of processes to use for likelihood evaluations (for the
+        samplers which support this) and for the conversion function (if it
+        takes an `npool` argument). The pool is shut down when sampling
+        finishes, or fails.
     **kwargs:
         All kwargs are passed directly to the samplers `run` function
 
@@ -135,7 +140,7 @@ def run_sampler(likelihood, priors=None, label='label', outdir='outdir',
                 likelihood, priors=priors, outdir=outdir, label=label,
                 injection_parameters=injection_parameters, meta_data=meta_data,
                 use_ratio=use_ratio, plot=plot, result_class=result_class,
-                **kwargs)
+                npool=npool, **kwargs)
         else:
             print(IMPLEMENTED_SAMPLERS)
             raise ValueError(
@@ -145,7 +150,7 @@ def run_sampler(likelihood, priors=None, label='label', outdir='outdir',
             likelihood, priors=priors,
             outdir=outdir, label=label, use_ratio=use_ratio, plot=plot,
             injection_parameters=injection_parameters, meta_data=meta_data,
-            **kwargs)
+            npool=npool, **kwargs)
     else:
         raise ValueError(
             "Provided sampler should be a Sampler object or name of a known "
@@ -157,22 +162,25 @@ def run_sampler(likelihood, priors=None, label='label', outdir='outdir',
 
     start_time = datetime.datetime.now()
 
-    if command_line_args.test:
-        result = sampler._run_test()
-    else:
-        result = sampler.run_sampler()
+    sampler._setup_pool()
+    try:
+        if command_line_args.test:
+            result = sampler._run_test()
+        else:
+            result = sampler.run_sampler()
+    finally:
+        sampler._close_pool()
 
     end_time = datetime.datetime.now()
     result.sampling_time = (end_time - start_time).total_seconds()
     logger.info('Sampling time: {}'.format(end_time - start_time))
 
+    result.log_noise_evidence = likelihood.noise_log_likelihood()
     if sampler.use_ratio:
-        result.log_noise_evidence = likelihood.noise_log_likelihood()
         result.log_bayes_factor = result.log_evidence
         result.log_evidence = \
             result.log_bayes_factor + result.log_noise_evidence
     else:
-        result.log_noise_evidence = likelihood.noise_log_likelihood()
         result.log_bayes_factor = \
             result.log_evidence - result.log_noise_evidence
 
@@ -182,7 +190,8 @@ def run_sampler(likelihood, priors=None, label='label', outdir='outdir',
                 result.injection_parameters)
 
     result.samples_to_posterior(likelihood=likelihood, priors=priors,
-                                conversion_function=conversion_function)
+                                conversion_function=conversion_function,
+                                npool=npool)
     if save:
         result.save_to_file()
         logger.info("Results saved to {}/".format(outdir))
@@ -1,5 +1,9 @@
 from __future__ import absolute_import
 import datetime
+import multiprocessing
+import os
+import struct
+
 import numpy as np
 
 from pandas import DataFrame
@@ -39,6 +43,9 @@ class Sampler(object):
         The result class to use. By default, `bilby.core.result.Result` is used,
         but objects which inherit from this class can be given providing
         additional methods.
+    npool: int, optional
+        The number of processes to evaluate the likelihood with, the pool is
+        created by `_setup_pool`, which is called by `run_sampler`
     **kwargs: dict
         Additional keyword arguments
 
@@ -67,6 +74,10 @@ class Sampler(object):
         Container for the results of the sampling run
     kwargs: dict
         Dictionary of keyword arguments that can be used in the external sampler
+    npool: int
+        The number of processes to evaluate the likelihood with
+    pool: multiprocessing.Pool, None
+        The pool of processes, this is only set while the sampler is running
 
     Raises
     ------
@@ -81,12 +92,13 @@ class Sampler(object):
 
     """
     default_kwargs = dict()
+    supports_pool = False
 
     def __init__(
             self, likelihood, priors, outdir='outdir', label='label',
             use_ratio=False, plot=False, skip_import_verification=False,
             injection_parameters=None, meta_data=None, result_class=None,
-            **kwargs):
+            npool=1, **kwargs):
         self.likelihood = likelihood
         if isinstance(priors, PriorDict):
             self.priors = priors
@@ -101,6 +113,8 @@ class Sampler(object):
             self._verify_external_sampler()
         self.external_sampler_function = None
         self.plot = plot
+        self.npool = npool
+        self.pool = None
 
         self.__search_parameter_keys = []
         self.__fixed_parameter_keys = []
@@ -307,8 +321,7 @@ class Sampler(object):
         float: TODO: Fill in proper explanation of what this is.
 
         """
-        return self.priors.ln_prob({
-            key: t for key, t in zip(self.__search_parameter_keys, theta)})
+        return self.priors.ln_prob_array(self.__search_parameter_keys, theta)
 
     def log_likelihood(self, theta):
         """
@@ -331,6 +344,30 @@ class Sampler(object):
         else:
             return self.likelihood.log_likelihood()
 
+    def log_likelihood_batch(self, theta_array):
+        """ The log-likelihood at a batch of points, using the vectorised
+        implementation of the likelihood where there is one
+
+        Parameters
+        ----------
+        theta_array: array_like
+            Array of values for the likelihood parameters with shape
+            (n_points, ndim)
+
+        Returns
+        -------
+        array_like: Log-likelihood or log-likelihood-ratio at each point,
+            shape (n_points,)
+
+        """
+        theta_array = np.atleast_2d(theta_array)
+        parameters = {key: theta_array[:, ii] for ii, key
+                      in enumerate(self.__search_parameter_keys)}
+        if self.use_ratio:
+            return self.likelihood.log_likelihood_ratio_batch(parameters)
+        else:
+            return self.likelihood.log_likelihood_batch(parameters)
+
     def get_random_draw_from_prior(self):
         """ Get a random draw from the prior distribution
 
@@ -341,9 +378,7 @@ class Sampler(object):
             with delta-function (or fixed) priors are not returned
 
         """
-        new_sample = self.priors.sample()
-        draw = np.array(list(new_sample[key]
-                             for key in self.__search_parameter_keys))
+        draw = self.priors.sample_array(self.__search_parameter_keys)
         self.check_draw(draw)
         return draw
 
@@ -358,6 +393,53 @@ class Sampler(object):
         """A template method to run in subclasses"""
         pass
 
+    def _setup_pool(self):
+        """ Create a pool of `npool` processes to evaluate the likelihood
+
+        The likelihood and priors are sent to each process once, when it is
+        started, rather than with every task. The pool is stored as
+        `self.pool` and should be closed with `_close_pool`.
+        """
+        if self.npool is None or self.npool <= 1:
+            self.pool = None
+        elif not self.supports_pool:
+            logger.warning("Sampler {} does not support npool, running "
+                           "without parallelisation".format(
+                               self.__class__.__name__))
+            self.pool = None
+        elif self.kwargs.get('pool', None) is not None:
+            logger.info("Using the pool given in the sampler kwargs rather "
+                        "than creating one with npool={}".format(self.npool))
+            self.pool = None
+        else:
+            logger.info("Setting up a pool of {} processes".format(self.npool))
+            self.pool = multiprocessing.Pool(
+                processes=self.npool, initializer=_initialize_global_variables,
+                initargs=(self.likelihood, self.priors,
+                          self.__search_parameter_keys, self.use_ratio))
+        _initialize_global_variables(
+            self.likelihood, self.priors, self.__search_parameter_keys,
+            self.use_ratio)
+
+    def _close_pool(self):
+        """ Shut down the pool of processes, if there is one """
+        if self.pool is not None:
+            logger.info("Closing the pool of {} processes".format(self.npool))
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __getstate__(self):
+        # Pools cannot be pickled, so discard any pool before pickling
+        state = self.__dict__.copy()
+        state['pool'] = None
+        kwargs = state.get('_Sampler__kwargs', dict())
+        if kwargs.get('pool', None) is not None:
+            kwargs = kwargs.copy()
+            kwargs['pool'] = None
+            state['_Sampler__kwargs'] = kwargs
+        return state
+
     def _run_test(self):
         """
         TODO: Implement this method
@@ -416,6 +498,50 @@ class Sampler(object):
                 self.__class__.__name__, kwargs_print))
 
 
+_likelihood = None
+_priors = None
+_search_parameter_keys = None
+_use_ratio = False
+
+
+def _initialize_global_variables(likelihood, priors, search_parameter_keys,
+                                 use_ratio):
+    """ Store the likelihood and priors as global variables of this module, so
+    that they are available to each process in a pool, see
+    `Sampler._setup_pool` """
+    global _likelihood
+    global _priors
+    global _search_parameter_keys
+    global _use_ratio
+    _likelihood = likelihood
+    _priors = priors
+    _search_parameter_keys = search_parameter_keys
+    _use_ratio = use_ratio
+
+
+def _prior_transform_wrapper(theta):
+    """ `Sampler.prior_transform` using the global variables, for use with a
+    pool of processes """
+    return _priors.rescale(_search_parameter_keys, theta)
+
+
+def _log_prior_wrapper(theta):
+    """ `Sampler.log_prior` using the global variables, for use with a pool
+    of processes """
+    return _priors.ln_prob_array(_search_parameter_keys, theta)
+
+
+def _log_likelihood_wrapper(theta):
+    """ `Sampler.log_likelihood` using the global variables, for use with a
+    pool of processes """
+    for key, value in zip(_search_parameter_keys, theta):
+        _likelihood.parameters[key] = value
+    if _use_ratio:
+        return _likelihood.log_likelihood_ratio()
+    else:
+        return _likelihood.log_likelihood()
+
+
 class NestedSampler(Sampler):
     npoints_equiv_kwargs = ['nlive', 'nlives', 'n_live_points', 'npoints', 'npoint', 'Nlive']
 
@@ -456,8 +582,167 @@ class NestedSampler(Sampler):
         return unsorted_loglikelihoods[idxs]
 
 
+class NumpyChainStore(object):
+    """ Buffered storage of an MCMC chain in a binary `.npy` file
+
+    Each step of the chain is an array of fixed shape, e.g., (nwalkers,
+    ndim + 2) for the positions, log likelihood and log prior of each walker.
+    Steps are held in memory and appended to the file in blocks of
+    `n_buffer_steps`. The header of the file is rewritten after each block,
+    so the file can be read with `numpy.load`, and memory mapped, at any
+    time. Alternative backends can be used by the samplers by providing a
+    class with the same interface as `chain_store_class`.
+
+    Parameters
+    ----------
+    filename: str
+        The `.npy` file to store the chain in
+    n_buffer_steps: int
+        The number of steps to hold in memory before writing to disk
+
+    """
+
+    header_length = 256
+
+    def __init__(self, filename, n_buffer_steps=100):
+        self.filename = filename
+        self.n_buffer_steps = max(int(n_buffer_steps), 1)
+        self._buffer = []
+
+    @property
+    def exists(self):
+        """ Whether any steps have been written to the file """
+        return os.path.isfile(self.filename) and self.nsteps_on_disk > 0
+
+    @property
+    def nsteps_on_disk(self):
+        if not os.path.isfile(self.filename):
+            return 0
+        return self._read_shape()[0]
+
+    def reset(self):
+        """ Remove any stored steps """
+        self._buffer = []
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def append(self, step):
+        """ Add a step to the chain, writing to disk when the buffer is full
+
+        Parameters
+        ----------
+        step: array_like
+            The state of the chain at this step
+        """
+        self._buffer.append(np.array(step, dtype='<f8'))
+        if len(self._buffer) >= self.n_buffer_steps:
+            self.flush()
+
+    def flush(self):
+        """ Write any buffered steps to disk """
+        if len(self._buffer) == 0:
+            return
+        block = np.array(self._buffer, dtype='<f8')
+        step_shape = block.shape[1:]
+        directory = os.path.dirname(self.filename)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+        if os.path.isfile(self.filename):
+            shape = self._read_shape()
+            if shape[1:] != step_shape:
+                raise ValueError(
+                    "Cannot append steps of shape {} to the chain in {} with "
+                    "steps of shape {}".format(
+                        step_shape, self.filename, shape[1:]))
+            nsteps = shape[0]
+            mode = 'r+b'
+        else:
+            nsteps = 0
+            mode = 'w+b'
+        with open(self.filename, mode) as ff:
+            # The data is written before the header is updated so that an
+            # interrupted write leaves a readable file
+            ff.seek(self.header_length + nsteps * block[0].nbytes)
+            ff.truncate()
+            ff.write(block.tobytes())
+            ff.flush()
+            os.fsync(ff.fileno())
+            ff.seek(0)
+            ff.write(self._header((nsteps + len(block),) + step_shape))
+            ff.flush()
+            os.fsync(ff.fileno())
+        self._buffer = []
+
+    def read(self):
+        """ Memory map the full chain, shape (nsteps,) + step shape """
+        self.flush()
+        return np.load(self.filename, mmap_mode='r')
+
+    def read_last(self):
+        """ Read only the last step of the chain """
+        return np.array(self.read()[-1])
+
+    def _read_shape(self):
+        with open(self.filename, 'rb') as ff:
+            np.lib.format.read_magic(ff)
+            shape, _, _ = np.lib.format.read_array_header_1_0(ff)
+        return shape
+
+    def _header(self, shape):
+        """ A version 1.0 `.npy` header padded to `header_length` bytes """
+        header = "{{'descr': '<f8', 'fortran_order': False, 'shape': {}, }}".format(
+            repr(tuple(shape)))
+        header = header.ljust(self.header_length - 11) + '\n'
+        return (b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) +
+                header.encode('latin1'))
+
+    @classmethod
+    def from_legacy_text_file(cls, text_file, filename, nwalkers,
+                              n_buffer_steps=100):
+        """ Convert a text chain file, as written by previous versions of the
+        `emcee` wrapper, to binary format
+
+        The text file has a header followed by a row for each walker at
+        each step, containing the walker index, the parameters, the log
+        likelihood and the log prior. Any incomplete final step is dropped.
+
+        Parameters
+        ----------
+        text_file: str
+            The text chain file
+        filename: str
+            The `.npy` file to write
+        nwalkers: int
+            The number of walkers in the chain
+        n_buffer_steps: int
+            Passed to the new store
+
+        Returns
+        -------
+        NumpyChainStore: The store containing the converted chain
+        """
+        with open(text_file, 'r') as ff:
+            lines = ff.readlines()
+        # The header was written without a newline, so the first row of the
+        # chain follows the last column name on the first line
+        if len(lines) > 0 and lines[0].startswith('walker'):
+            lines[0] = lines[0][lines[0].rfind('log_l') + len('log_l'):]
+        old_chain = np.genfromtxt(
+            [line for line in lines if line.strip() != ''], ndmin=2)
+        nsteps = len(old_chain) // nwalkers
+        old_chain = old_chain[:nsteps * nwalkers, 1:].reshape(
+            (nsteps, nwalkers, -1))
+        store = cls(filename, n_buffer_steps=n_buffer_steps)
+        store.reset()
+        for step in old_chain:
+            store.append(step)
+        store.flush()
+        return store
+
+
 class MCMCSampler(Sampler):
     nwalkers_equiv_kwargs = ['nwalker', 'nwalkers', 'draws']
+    chain_store_class = NumpyChainStore
 
     def print_nburn_logging_info(self):
         """ Prints logging info as to how nburn was calculated """
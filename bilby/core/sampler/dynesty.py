@@ -1,14 +1,18 @@
 from __future__ import absolute_import
 
+import json
 import os
+import shutil
 import sys
+from collections import OrderedDict
 
 import numpy as np
 from pandas import DataFrame
-from deepdish.io import load, save
+from deepdish.io import load
 
 from ..utils import logger, check_directory_exists_and_if_not_mkdir
-from .base_sampler import Sampler, NestedSampler
+from .base_sampler import (
+    Sampler, NestedSampler, _log_likelihood_wrapper, _prior_transform_wrapper)
 
 
 class Dynesty(NestedSampler):
@@ -68,6 +72,9 @@ class Dynesty(NestedSampler):
         check_point_delta_t).
     resume: bool
         If true, resume run from checkpoint (if available)
+    npool: int (1)
+        The number of processes to evaluate the likelihood with, by default
+        `queue_size` is set to this.
     """
     default_kwargs = dict(bound='multi', sample='rwalk',
                           verbose=True,
@@ -83,6 +90,7 @@ class Dynesty(NestedSampler):
                           dlogz=0.1, maxiter=None, maxcall=None,
                           logl_max=np.inf, add_live=True, print_progress=True,
                           save_bounds=True)
+    supports_pool = True
 
     def __init__(self, likelihood, priors, outdir='outdir', label='label', use_ratio=False, plot=False,
                  skip_import_verification=False, check_point=True, n_check_point=None, check_point_delta_t=600,
@@ -169,10 +177,22 @@ class Dynesty(NestedSampler):
 
     def run_sampler(self):
         import dynesty
-        self.sampler = dynesty.NestedSampler(
-            loglikelihood=self.log_likelihood,
-            prior_transform=self.prior_transform,
-            ndim=self.ndim, **self.sampler_init_kwargs)
+        sampler_init_kwargs = self.sampler_init_kwargs
+        if self.pool is not None:
+            sampler_init_kwargs['pool'] = self.pool
+            if sampler_init_kwargs['queue_size'] is None:
+                sampler_init_kwargs['queue_size'] = self.npool
+            self.sampler = dynesty.NestedSampler(
+                loglikelihood=_log_likelihood_wrapper,
+                prior_transform=_prior_transform_wrapper,
+                ndim=self.ndim, **sampler_init_kwargs)
+        else:
+            if sampler_init_kwargs['live_points'] is None:
+                sampler_init_kwargs['live_points'] = self._initial_live_points()
+            self.sampler = dynesty.NestedSampler(
+                loglikelihood=self.log_likelihood,
+                prior_transform=self.prior_transform,
+                ndim=self.ndim, **sampler_init_kwargs)
 
         if self.check_point:
             out = self._run_external_sampler_with_checkpointing()
@@ -203,6 +223,23 @@ class Dynesty(NestedSampler):
 
         return self.result
 
+    def _initial_live_points(self):
+        """ Draw the initial live points from the prior, evaluating the
+        likelihood for all of them at once with `log_likelihood_batch`
+
+        Returns
+        -------
+        list: The positions in the unit cube, the parameter values and the
+            log-likelihood of the live points, as expected by dynesty
+        """
+        rstate = self.kwargs['rstate']
+        if rstate is None:
+            rstate = np.random
+        live_u = rstate.rand(self.kwargs['nlive'], self.ndim)
+        live_v = self.priors.rescale(self.search_parameter_keys, live_u)
+        live_logl = self.log_likelihood_batch(live_v)
+        return [live_u, live_v, live_logl]
+
     def _run_external_sampler_without_checkpointing(self):
         logger.debug("Running sampler without checkpointing")
         self.sampler.run_nested(**self.sampler_function_kwargs)
@@ -214,6 +251,8 @@ class Dynesty(NestedSampler):
             resume = self.read_saved_state(continuing=True)
             if resume:
                 logger.info('Resuming from previous run.')
+        else:
+            self._remove_checkpoint()
 
         old_ncall = self.sampler.ncall
         sampler_kwargs = self.sampler_function_kwargs.copy()
@@ -234,163 +273,178 @@ class Dynesty(NestedSampler):
         self._remove_checkpoint()
         return self.sampler.results
 
+    # Map from the attributes of the dynesty sampler storing the dead points
+    # to the names they are checkpointed under
+    _checkpoint_dead_point_keys = OrderedDict([
+        ('saved_u', 'unit_cube_samples'), ('saved_v', 'physical_samples'),
+        ('saved_logl', 'sample_likelihoods'),
+        ('saved_logvol', 'sample_log_volume'),
+        ('saved_logwt', 'sample_log_weights'),
+        ('saved_logz', 'cumulative_log_evidence'),
+        ('saved_logzvar', 'cumulative_log_evidence_error'),
+        ('saved_h', 'cumulative_information'), ('saved_id', 'id'),
+        ('saved_it', 'it'), ('saved_nc', 'nc'),
+        ('saved_boundidx', 'boundidx'), ('saved_bounditer', 'bounditer'),
+        ('saved_scale', 'scale')])
+    _checkpoint_live_point_keys = [
+        'live_logl', 'live_u', 'live_v', 'live_bound', 'live_it']
+
+    @property
+    def resume_directory(self):
+        """ The directory containing the checkpoint, this holds one segment
+        of dead points for each checkpoint and a manifest listing them """
+        return '{}/{}_resume'.format(self.outdir, self.label)
+
+    @property
+    def _legacy_resume_file(self):
+        return '{}/{}_resume.h5'.format(self.outdir, self.label)
+
     def _remove_checkpoint(self):
         """Remove checkpointed state"""
-        if os.path.isfile('{}/{}_resume.h5'.format(self.outdir, self.label)):
-            os.remove('{}/{}_resume.h5'.format(self.outdir, self.label))
+        if os.path.isdir(self.resume_directory):
+            shutil.rmtree(self.resume_directory)
+        if os.path.isfile(self._legacy_resume_file):
+            os.remove(self._legacy_resume_file)
+
+    def _read_manifest(self):
+        """ Read the checkpoint manifest, returns None if there is no
+        checkpoint """
+        manifest_file = os.path.join(self.resume_directory, 'manifest.json')
+        if not os.path.isfile(manifest_file):
+            return None
+        with open(manifest_file, 'r') as ff:
+            return json.load(ff)
+
+    def _read_segment(self, segment):
+        with np.load(os.path.join(self.resume_directory, segment)) as data:
+            return {key: data[key] for key in data.files}
 
     def read_saved_state(self, continuing=False):
         """
-        Read a saved state of the sampler to disk.
+        Read a saved state of the sampler from disk.
 
         The required information to reconstruct the state of the run is read
-        from an hdf5 file.
-        This currently adds the whole chain to the sampler.
-        We then remove the old checkpoint and write all unnecessary items back
-        to disk.
-        FIXME: Load only the necessary quantities, rather than read/write?
+        from the segments listed in the checkpoint manifest. Checkpoints
+        written by earlier versions, in a single hdf5 file, are also read.
 
         Parameters
         ----------
-        sampler: `dynesty.NestedSampler`
-            NestedSampler instance to reconstruct from the saved state.
         continuing: bool
-            Whether the run is continuing or terminating, if True, the loaded
-            state is mostly written back to disk.
+            Whether the run is continuing or terminating. If True, only the
+            most recent dead point is loaded, as only this is needed to
+            continue the run, and the checkpoint is kept. Otherwise, all of
+            the dead points are loaded and the checkpoint is removed.
+
+        Returns
+        -------
+        bool: Whether a saved state was found
         """
-        resume_file = '{}/{}_resume.h5'.format(self.outdir, self.label)
-
-        if os.path.isfile(resume_file):
-            saved = load(resume_file)
-
-            self.sampler.saved_u = list(saved['unit_cube_samples'])
-            self.sampler.saved_v = list(saved['physical_samples'])
-            self.sampler.saved_logl = list(saved['sample_likelihoods'])
-            self.sampler.saved_logvol = list(saved['sample_log_volume'])
-            self.sampler.saved_logwt = list(saved['sample_log_weights'])
-            self.sampler.saved_logz = list(saved['cumulative_log_evidence'])
-            self.sampler.saved_logzvar = list(saved['cumulative_log_evidence_error'])
-            self.sampler.saved_id = list(saved['id'])
-            self.sampler.saved_it = list(saved['it'])
-            self.sampler.saved_nc = list(saved['nc'])
-            self.sampler.saved_boundidx = list(saved['boundidx'])
-            self.sampler.saved_bounditer = list(saved['bounditer'])
-            self.sampler.saved_scale = list(saved['scale'])
-            self.sampler.saved_h = list(saved['cumulative_information'])
-            self.sampler.ncall = saved['ncall']
-            self.sampler.live_logl = list(saved['live_logl'])
-            self.sampler.it = saved['iteration'] + 1
-            self.sampler.live_u = saved['live_u']
-            self.sampler.live_v = saved['live_v']
-            self.sampler.nlive = saved['nlive']
-            self.sampler.live_bound = saved['live_bound']
-            self.sampler.live_it = saved['live_it']
-            self.sampler.added_live = saved['added_live']
-            self._remove_checkpoint()
-            if continuing:
-                self.write_current_state()
-            return True
+        manifest = self._read_manifest()
+        if manifest is None and os.path.isfile(self._legacy_resume_file):
+            return self._read_legacy_saved_state(continuing=continuing)
+        elif manifest is None or len(manifest['segments']) == 0:
+            return False
 
+        if continuing:
+            segments = list()
+            for segment in manifest['segments'][::-1]:
+                segments.insert(0, self._read_segment(segment))
+                if len(segments[0]['id']) > 0:
+                    break
+            segments = segments[:1] + segments[-1:]
+            dead_points = {key: segments[0][key][-1:]
+                           for key in self._checkpoint_dead_point_keys.values()}
         else:
-            return False
+            segments = [self._read_segment(segment)
+                        for segment in manifest['segments']]
+            dead_points = {
+                key: np.concatenate([segment[key] for segment in segments
+                                     if len(segment[key]) > 0])
+                for key in self._checkpoint_dead_point_keys.values()}
+        for attribute, key in self._checkpoint_dead_point_keys.items():
+            setattr(self.sampler, attribute, list(dead_points[key]))
+        for key in self._checkpoint_live_point_keys:
+            setattr(self.sampler, key, segments[-1][key])
+        self.sampler.live_logl = list(self.sampler.live_logl)
+        self.sampler.ncall = manifest['ncall']
+        self.sampler.it = manifest['iteration'] + 1
+        self.sampler.nlive = manifest['nlive']
+        self.sampler.added_live = manifest['added_live']
+        if not continuing:
+            self._remove_checkpoint()
+        return True
+
+    def _read_legacy_saved_state(self, continuing=False):
+        """ Read a checkpoint written to a single hdf5 file by earlier
+        versions, when continuing this is converted to the current format """
+        saved = load(self._legacy_resume_file)
+        for attribute, key in self._checkpoint_dead_point_keys.items():
+            setattr(self.sampler, attribute, list(saved[key]))
+        for key in self._checkpoint_live_point_keys:
+            setattr(self.sampler, key, saved[key])
+        self.sampler.live_logl = list(self.sampler.live_logl)
+        self.sampler.ncall = saved['ncall']
+        self.sampler.it = saved['iteration'] + 1
+        self.sampler.nlive = saved['nlive']
+        self.sampler.added_live = saved['added_live']
+        self._remove_checkpoint()
+        if continuing:
+            self.write_current_state()
+        return True
 
     def write_current_state(self):
         """
         Write the current state of the sampler to disk.
 
-        The required information to reconstruct the state of the run are written
-        to an hdf5 file.
-        All but the most recent removed live point in the chain are removed from
-        the sampler to reduce memory usage.
-        This means it is necessary to not append the first live point to the
-        file if updating a previous checkpoint.
+        Each checkpoint appends one segment to the checkpoint directory
+        containing the dead points found since the previous checkpoint and
+        the current live points, so the cost of a checkpoint does not grow
+        with the length of the run. The segment is then added to the
+        manifest, which is replaced atomically, so an interrupted checkpoint
+        leaves the previous checkpoint intact.
 
-        Parameters
-        ----------
-        sampler: `dynesty.NestedSampler`
-            NestedSampler to write to disk.
+        All but the most recent dead point are removed from the sampler to
+        reduce memory usage. This means it is necessary to not append the
+        first dead point to the checkpoint if updating a previous checkpoint.
         """
-        check_directory_exists_and_if_not_mkdir(self.outdir)
-        resume_file = '{}/{}_resume.h5'.format(self.outdir, self.label)
-
-        if os.path.isfile(resume_file):
-            saved = load(resume_file)
-
-            current_state = dict(
-                unit_cube_samples=np.vstack([
-                    saved['unit_cube_samples'], self.sampler.saved_u[1:]]),
-                physical_samples=np.vstack([
-                    saved['physical_samples'], self.sampler.saved_v[1:]]),
-                sample_likelihoods=np.concatenate([
-                    saved['sample_likelihoods'], self.sampler.saved_logl[1:]]),
-                sample_log_volume=np.concatenate([
-                    saved['sample_log_volume'], self.sampler.saved_logvol[1:]]),
-                sample_log_weights=np.concatenate([
-                    saved['sample_log_weights'], self.sampler.saved_logwt[1:]]),
-                cumulative_log_evidence=np.concatenate([
-                    saved['cumulative_log_evidence'], self.sampler.saved_logz[1:]]),
-                cumulative_log_evidence_error=np.concatenate([
-                    saved['cumulative_log_evidence_error'],
-                    self.sampler.saved_logzvar[1:]]),
-                cumulative_information=np.concatenate([
-                    saved['cumulative_information'], self.sampler.saved_h[1:]]),
-                id=np.concatenate([saved['id'], self.sampler.saved_id[1:]]),
-                it=np.concatenate([saved['it'], self.sampler.saved_it[1:]]),
-                nc=np.concatenate([saved['nc'], self.sampler.saved_nc[1:]]),
-                boundidx=np.concatenate([
-                    saved['boundidx'], self.sampler.saved_boundidx[1:]]),
-                bounditer=np.concatenate([
-                    saved['bounditer'], self.sampler.saved_bounditer[1:]]),
-                scale=np.concatenate([saved['scale'], self.sampler.saved_scale[1:]]),
-            )
-
+        check_directory_exists_and_if_not_mkdir(self.resume_directory)
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = dict(segments=list())
+            first = 0
         else:
-            current_state = dict(
-                unit_cube_samples=self.sampler.saved_u,
-                physical_samples=self.sampler.saved_v,
-                sample_likelihoods=self.sampler.saved_logl,
-                sample_log_volume=self.sampler.saved_logvol,
-                sample_log_weights=self.sampler.saved_logwt,
-                cumulative_log_evidence=self.sampler.saved_logz,
-                cumulative_log_evidence_error=self.sampler.saved_logzvar,
-                cumulative_information=self.sampler.saved_h,
-                id=self.sampler.saved_id,
-                it=self.sampler.saved_it,
-                nc=self.sampler.saved_nc,
-                boundidx=self.sampler.saved_boundidx,
-                bounditer=self.sampler.saved_bounditer,
-                scale=self.sampler.saved_scale,
-            )
-
-        current_state.update(
-            ncall=self.sampler.ncall, live_logl=self.sampler.live_logl,
-            iteration=self.sampler.it - 1, live_u=self.sampler.live_u,
-            live_v=self.sampler.live_v, nlive=self.sampler.nlive,
-            live_bound=self.sampler.live_bound, live_it=self.sampler.live_it,
-            added_live=self.sampler.added_live
-        )
-
-        weights = np.exp(current_state['sample_log_weights'] -
-                         current_state['cumulative_log_evidence'][-1])
-        current_state['posterior'] = self.external_sampler.utils.resample_equal(
-            np.array(current_state['physical_samples']), weights)
-
-        save(resume_file, current_state)
-
-        self.sampler.saved_id = [self.sampler.saved_id[-1]]
-        self.sampler.saved_u = [self.sampler.saved_u[-1]]
-        self.sampler.saved_v = [self.sampler.saved_v[-1]]
-        self.sampler.saved_logl = [self.sampler.saved_logl[-1]]
-        self.sampler.saved_logvol = [self.sampler.saved_logvol[-1]]
-        self.sampler.saved_logwt = [self.sampler.saved_logwt[-1]]
-        self.sampler.saved_logz = [self.sampler.saved_logz[-1]]
-        self.sampler.saved_logzvar = [self.sampler.saved_logzvar[-1]]
-        self.sampler.saved_h = [self.sampler.saved_h[-1]]
-        self.sampler.saved_nc = [self.sampler.saved_nc[-1]]
-        self.sampler.saved_boundidx = [self.sampler.saved_boundidx[-1]]
-        self.sampler.saved_it = [self.sampler.saved_it[-1]]
-        self.sampler.saved_bounditer = [self.sampler.saved_bounditer[-1]]
-        self.sampler.saved_scale = [self.sampler.saved_scale[-1]]
+            first = 1
+
+        segment_data = {
+            key: np.array(getattr(self.sampler, attribute)[first:])
+            for attribute, key in self._checkpoint_dead_point_keys.items()}
+        segment_data.update({key: np.array(getattr(self.sampler, key))
+                             for key in self._checkpoint_live_point_keys})
+        segment = 'segment_{:06d}.npz'.format(len(manifest['segments']))
+        self._atomic_write(segment, lambda ff: np.savez(ff, **segment_data))
+
+        manifest['segments'].append(segment)
+        manifest.update(
+            ncall=int(self.sampler.ncall), iteration=int(self.sampler.it - 1),
+            nlive=int(self.sampler.nlive),
+            added_live=bool(self.sampler.added_live))
+        self._atomic_write(
+            'manifest.json', lambda ff: ff.write(json.dumps(manifest).encode()))
+
+        for attribute in self._checkpoint_dead_point_keys:
+            setattr(self.sampler, attribute,
+                    [getattr(self.sampler, attribute)[-1]])
+
+    def _atomic_write(self, filename, write):
+        """ Write a file in the checkpoint directory by writing to a temporary
+        file and renaming it """
+        filename = os.path.join(self.resume_directory, filename)
+        temporary_filename = '{}.tmp'.format(filename)
+        with open(temporary_filename, 'wb') as ff:
+            write(ff)
+            ff.flush()
+            os.fsync(ff.fileno())
+        os.rename(temporary_filename, filename)
 
     def generate_trace_plots(self, dynesty_results):
         check_directory_exists_and_if_not_mkdir(self.outdir)
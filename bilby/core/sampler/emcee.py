@@ -8,7 +8,8 @@ from distutils.version import LooseVersion
 
 from ..utils import (
     logger, get_progress_bar, check_directory_exists_and_if_not_mkdir)
-from .base_sampler import MCMCSampler, SamplerError
+from .base_sampler import (
+    MCMCSampler, SamplerError, _log_likelihood_wrapper, _log_prior_wrapper)
 
 
 class Emcee(MCMCSampler):
@@ -37,6 +38,17 @@ class Emcee(MCMCSampler):
         The number of autocorrelation times to discard as burn-in
     a: float (2)
         The proposal scale factor
+    vectorize: bool (False)
+        If true, the likelihood is evaluated for all of the walkers at once
+        using `likelihood.log_likelihood_batch`. Requires emcee > 2.2.1
+    npool: int (1)
+        The number of processes to evaluate the walkers with. This is ignored
+        if `vectorize=True`.
+    resume: bool (True)
+        If true, resume from the last walker positions stored in
+        `{outdir}/emcee_{label}/chain.npy`
+    n_buffer_steps: int (100)
+        The number of steps to hold in memory before writing to the chain file
 
 
     """
@@ -45,12 +57,12 @@ class Emcee(MCMCSampler):
                           postargs=None, pool=None, live_dangerously=False,
                           runtime_sortingfn=None, lnprob0=None, rstate0=None,
                           blobs0=None, iterations=100, thin=1, storechain=True,
-                          mh_proposal=None)
+                          mh_proposal=None, vectorize=False)
 
     def __init__(self, likelihood, priors, outdir='outdir', label='label',
                  use_ratio=False, plot=False, skip_import_verification=False,
                  pos0=None, nburn=None, burn_in_fraction=0.25, resume=True,
-                 burn_in_act=3, **kwargs):
+                 burn_in_act=3, n_buffer_steps=100, **kwargs):
         import emcee
         if LooseVersion(emcee.__version__) > LooseVersion('2.2.1'):
             self.prerelease = True
@@ -65,7 +77,7 @@ class Emcee(MCMCSampler):
         self.nburn = nburn
         self.burn_in_fraction = burn_in_fraction
         self.burn_in_act = burn_in_act
-        self._old_chain = None
+        self.n_buffer_steps = n_buffer_steps
 
     def _translate_kwargs(self, kwargs):
         if 'nwalkers' not in kwargs:
@@ -117,7 +129,13 @@ class Emcee(MCMCSampler):
                        for key, value in self.kwargs.items()
                        if key not in self.sampler_function_kwargs}
 
-        init_kwargs['lnpostfn'] = self.lnpostfn
+        if init_kwargs.get('vectorize', False):
+            init_kwargs['lnpostfn'] = self.lnpostfn_batch
+        elif self.pool is not None:
+            init_kwargs['lnpostfn'] = _emcee_lnpostfn
+            init_kwargs['pool'] = self.pool
+        else:
+            init_kwargs['lnpostfn'] = self.lnpostfn
         init_kwargs['dim'] = self.ndim
 
         # updated init keywords for emcee > v2.2.1
@@ -133,9 +151,17 @@ class Emcee(MCMCSampler):
             for key in oldfunckeys:
                 if key in init_kwargs:
                     del init_kwargs[key]
+        elif init_kwargs.pop('vectorize', False):
+            logger.warning("The 'vectorize' option requires emcee > 2.2.1 "
+                           "and will be ignored.")
+            init_kwargs['lnpostfn'] = self.lnpostfn
 
         return init_kwargs
 
+    @property
+    def supports_pool(self):
+        return not self.kwargs.get('vectorize', False)
+
     @property
     def nburn(self):
         if type(self.__nburn) in [float, int]:
@@ -158,6 +184,12 @@ class Emcee(MCMCSampler):
     def nwalkers(self):
         return self.kwargs['nwalkers']
 
+    @property
+    def walker_shape(self):
+        """ The shape of the walker positions at each step, excluding the
+        parameter dimension """
+        return (self.nwalkers,)
+
     @property
     def nsteps(self):
         return self.kwargs['iterations']
@@ -166,68 +198,56 @@ class Emcee(MCMCSampler):
     def nsteps(self, nsteps):
         self.kwargs['iterations'] = nsteps
 
-    def __getstate__(self):
-        # In order to be picklable with dill, we need to discard the pool
-        # object before trying.
-        d = self.__dict__
-        d["_Sampler__kwargs"]["pool"] = None
-        return d
+    @property
+    def chain_directory(self):
+        return os.path.join(self.outdir, 'emcee_{}'.format(self.label))
+
+    @property
+    def chain_store(self):
+        """ The `chain_store_class` instance used to store the chain """
+        return self.chain_store_class(
+            os.path.join(self.chain_directory, 'chain.npy'),
+            n_buffer_steps=self.n_buffer_steps)
 
     def run_sampler(self):
         import emcee
         tqdm = get_progress_bar()
         sampler = emcee.EnsembleSampler(**self.sampler_init_kwargs)
-        out_dir = os.path.join(self.outdir, 'emcee_{}'.format(self.label))
-        out_file = os.path.join(out_dir, 'chain.dat')
+        check_directory_exists_and_if_not_mkdir(self.chain_directory)
+        store = self.chain_store
 
         if self.resume:
-            self.load_old_chain(out_file)
+            self.load_old_chain(store)
         else:
+            store.reset()
             self._set_pos0()
 
-        check_directory_exists_and_if_not_mkdir(out_dir)
-        if not os.path.isfile(out_file):
-            with open(out_file, "w") as ff:
-                ff.write('walker\t{}\tlog_l'.format(
-                    '\t'.join(self.search_parameter_keys)))
-        template =\
-            '{:d}' + '\t{:.9e}' * (len(self.search_parameter_keys) + 2) + '\n'
-
         for sample in tqdm(sampler.sample(**self.sampler_function_kwargs),
                            total=self.nsteps):
             if self.prerelease:
                 points = np.hstack([sample.coords, sample.blobs])
             else:
                 points = np.hstack([sample[0], np.array(sample[3])])
-            with open(out_file, "a") as ff:
-                for ii, point in enumerate(points):
-                    ff.write(template.format(ii, *point))
+            store.append(points)
 
         self.result.sampler_output = np.nan
-        blobs_flat = np.array(sampler.blobs).reshape((-1, 2))
-        log_likelihoods, log_priors = blobs_flat.T
-        if self._old_chain is not None:
-            chain = np.vstack([self._old_chain[:, :-2],
-                               sampler.chain.reshape((-1, self.ndim))])
-            log_ls = np.hstack([self._old_chain[:, -2], log_likelihoods])
-            log_ps = np.hstack([self._old_chain[:, -1], log_priors])
-            self.nsteps = chain.shape[0] // self.nwalkers
-        else:
-            chain = sampler.chain.reshape((-1, self.ndim))
-            log_ls = log_likelihoods
-            log_ps = log_priors
-        self.calculate_autocorrelation(chain)
+        full_chain = store.read()
+        self.nsteps = full_chain.shape[0]
+        chain = np.array(full_chain[:, :, :self.ndim])
+        self.calculate_autocorrelation(
+            chain.swapaxes(0, 1).reshape((-1, self.ndim)))
         self.print_nburn_logging_info()
         self.result.nburn = self.nburn
-        n_samples = self.nwalkers * self.nburn
         if self.result.nburn > self.nsteps:
             raise SamplerError(
                 "The run has finished, but the chain is not burned in: "
                 "`nburn < nsteps`. Try increasing the number of steps.")
-        self.result.samples = chain[n_samples:, :]
-        self.result.log_likelihood_evaluations = log_ls[n_samples:]
-        self.result.log_prior_evaluations = log_ps[n_samples:]
-        self.result.walkers = sampler.chain
+        self.result.samples = chain[self.nburn:].reshape((-1, self.ndim))
+        self.result.log_likelihood_evaluations = np.array(
+            full_chain[self.nburn:, :, -2]).reshape(-1)
+        self.result.log_prior_evaluations = np.array(
+            full_chain[self.nburn:, :, -1]).reshape(-1)
+        self.result.walkers = chain.swapaxes(0, 1)
         self.result.log_evidence = np.nan
         self.result.log_evidence_err = np.nan
         return self.result
@@ -251,18 +271,40 @@ class Emcee(MCMCSampler):
             self.pos0 = [self.get_random_draw_from_prior()
                          for _ in range(self.nwalkers)]
 
-    def load_old_chain(self, file_name=None):
-        if file_name is None:
-            out_dir = os.path.join(self.outdir, 'emcee_{}'.format(self.label))
-            file_name = os.path.join(out_dir, 'chain.dat')
-        if os.path.isfile(file_name):
-            old_chain = np.genfromtxt(file_name, skip_header=1)
-            self.pos0 = [np.squeeze(old_chain[-(self.nwalkers - ii), 1:-2])
-                         for ii in range(self.nwalkers)]
-            self._old_chain = old_chain[:-self.nwalkers + 1, 1:]
-            logger.info('Resuming from {}'.format(os.path.abspath(file_name)))
+    def load_old_chain(self, store=None):
+        """ Set the initial walker positions from the last step of a previous
+        run, reading only that step from disk
+
+        Text chain files written by previous versions are converted to the
+        binary format first.
+
+        Parameters
+        ----------
+        store: NumpyChainStore, optional
+            The chain store to resume from, defaults to `self.chain_store`
+        """
+        if store is None:
+            store = self.chain_store
+        legacy_file = os.path.join(self.chain_directory, 'chain.dat')
+        if not store.exists and os.path.isfile(legacy_file):
+            logger.info('Converting {} to binary format'.format(legacy_file))
+            store = self.chain_store_class.from_legacy_text_file(
+                legacy_file, store.filename, self.nwalkers,
+                n_buffer_steps=store.n_buffer_steps)
+        if store.exists:
+            last_step = store.read_last()
+            if tuple(last_step.shape[:-1]) != self.walker_shape:
+                raise ValueError(
+                    "Unable to resume from {}: the chain has walkers of "
+                    "shape {}, but {} were requested".format(
+                        store.filename, last_step.shape[:-1],
+                        self.walker_shape))
+            self.pos0 = last_step[..., :self.ndim]
+            logger.info('Resuming from {}'.format(
+                os.path.abspath(store.filename)))
         else:
-            logger.warning('Failed to resume. {} not found.'.format(file_name))
+            logger.warning('Failed to resume. {} not found.'.format(
+                store.filename))
             self._set_pos0()
 
     def lnpostfn(self, theta):
@@ -272,3 +314,36 @@ class Emcee(MCMCSampler):
         else:
             log_likelihood = self.log_likelihood(theta)
             return log_likelihood + log_prior, [log_likelihood, log_prior]
+
+    def lnpostfn_batch(self, theta_array):
+        """ The log posterior of all of the walkers, for `vectorize=True`
+
+        Parameters
+        ----------
+        theta_array: array_like
+            The positions of the walkers, shape (nwalkers, ndim)
+
+        Returns
+        -------
+        list: The output of `lnpostfn` for each walker
+        """
+        log_priors = np.array([self.log_prior(theta) for theta in theta_array])
+        log_likelihoods = np.full(len(theta_array), np.nan)
+        finite = ~np.isinf(log_priors)
+        if np.any(finite):
+            log_likelihoods[finite] = self.log_likelihood_batch(
+                theta_array[finite])
+        return [(-np.inf, [np.nan, np.nan]) if np.isinf(log_prior)
+                else (log_likelihood + log_prior, [log_likelihood, log_prior])
+                for log_likelihood, log_prior in zip(log_likelihoods, log_priors)]
+
+
+def _emcee_lnpostfn(theta):
+    """ `Emcee.lnpostfn` using the global variables set up by
+    `Sampler._setup_pool`, for use with a pool of processes """
+    log_prior = _log_prior_wrapper(theta)
+    if np.isinf(log_prior):
+        return -np.inf, [np.nan, np.nan]
+    else:
+        log_likelihood = _log_likelihood_wrapper(theta)
+        return log_likelihood + log_prior, [log_likelihood, log_prior]
@@ -1,10 +1,13 @@
 from __future__ import absolute_import, division, print_function
 
+import os
+
 import numpy as np
 
-from ..utils import get_progress_bar
+from ..utils import get_progress_bar, check_directory_exists_and_if_not_mkdir
 from . import Emcee
-from .base_sampler import SamplerError
+from .base_sampler import (
+    SamplerError, _log_likelihood_wrapper, _log_prior_wrapper)
 
 
 class Ptemcee(Emcee):
@@ -25,6 +28,11 @@ class Ptemcee(Emcee):
         The fixed number of steps to discard as burn-in
     ntemps: int (2)
         The number of temperatures used by ptemcee
+    resume: bool (False)
+        If true, resume from the last walker positions stored in
+        `{outdir}/ptemcee_{label}/chain.npy`
+    n_buffer_steps: int (100)
+        The number of steps to hold in memory before writing to the chain file
 
     """
     default_kwargs = dict(ntemps=2, nwalkers=500,
@@ -40,10 +48,19 @@ class Ptemcee(Emcee):
 
     def __init__(self, likelihood, priors, outdir='outdir', label='label', use_ratio=False, plot=False,
                  skip_import_verification=False, nburn=None, burn_in_fraction=0.25,
-                 burn_in_act=3, **kwargs):
+                 burn_in_act=3, resume=False, n_buffer_steps=100, **kwargs):
         Emcee.__init__(self, likelihood=likelihood, priors=priors, outdir=outdir, label=label,
                        use_ratio=use_ratio, plot=plot, skip_import_verification=skip_import_verification,
-                       nburn=nburn, burn_in_fraction=burn_in_fraction, burn_in_act=burn_in_act, **kwargs)
+                       nburn=nburn, burn_in_fraction=burn_in_fraction, burn_in_act=burn_in_act,
+                       resume=resume, n_buffer_steps=n_buffer_steps, **kwargs)
+
+    @property
+    def chain_directory(self):
+        return os.path.join(self.outdir, 'ptemcee_{}'.format(self.label))
+
+    @property
+    def walker_shape(self):
+        return (self.kwargs['ntemps'], self.nwalkers)
 
     @property
     def sampler_function_kwargs(self):
@@ -59,22 +76,36 @@ class Ptemcee(Emcee):
     def run_sampler(self):
         import ptemcee
         tqdm = get_progress_bar()
-        sampler = ptemcee.Sampler(dim=self.ndim, logl=self.log_likelihood,
-                                  logp=self.log_prior, **self.sampler_init_kwargs)
-        self.pos0 = [[self.get_random_draw_from_prior()
-                      for _ in range(self.nwalkers)]
-                     for _ in range(self.kwargs['ntemps'])]
+        sampler_init_kwargs = self.sampler_init_kwargs
+        if self.pool is not None:
+            sampler_init_kwargs['pool'] = self.pool
+            sampler = ptemcee.Sampler(
+                dim=self.ndim, logl=_log_likelihood_wrapper,
+                logp=_log_prior_wrapper, **sampler_init_kwargs)
+        else:
+            sampler = ptemcee.Sampler(
+                dim=self.ndim, logl=self.log_likelihood, logp=self.log_prior,
+                **sampler_init_kwargs)
+        check_directory_exists_and_if_not_mkdir(self.chain_directory)
+        store = self.chain_store
+        if self.resume:
+            self.load_old_chain(store)
+        else:
+            store.reset()
+            self._set_pos0()
 
-        log_likelihood_evaluations = []
-        log_prior_evaluations = []
         for pos, logpost, loglike in tqdm(
                 sampler.sample(self.pos0, **self.sampler_function_kwargs),
                 total=self.nsteps):
-            log_likelihood_evaluations.append(loglike)
-            log_prior_evaluations.append(logpost - loglike)
-            pass
+            store.append(np.concatenate(
+                [pos, loglike[..., np.newaxis],
+                 (logpost - loglike)[..., np.newaxis]], axis=-1))
 
-        self.calculate_autocorrelation(sampler.chain.reshape((-1, self.ndim)))
+        full_chain = store.read()
+        self.nsteps = full_chain.shape[0]
+        chain = np.array(full_chain[:, 0, :, :self.ndim])
+        self.calculate_autocorrelation(
+            chain.swapaxes(0, 1).reshape((-1, self.ndim)))
         self.result.sampler_output = np.nan
         self.print_nburn_logging_info()
         self.result.nburn = self.nburn
@@ -82,16 +113,21 @@ class Ptemcee(Emcee):
             raise SamplerError(
                 "The run has finished, but the chain is not burned in: "
                 "`nburn < nsteps`. Try increasing the number of steps.")
-        self.result.samples = sampler.chain[0, :, self.nburn:, :].reshape(
-            (-1, self.ndim))
+        self.result.samples = chain[self.nburn:].reshape((-1, self.ndim))
         self.result.log_likelihood_evaluations = np.array(
-            log_likelihood_evaluations)[self.nburn:, 0, :].reshape((-1))
+            full_chain[self.nburn:, 0, :, -2]).reshape(-1)
         self.result.log_prior_evaluations = np.array(
-            log_prior_evaluations)[self.nburn:, 0, :].reshape((-1))
+            full_chain[self.nburn:, 0, :, -1]).reshape(-1)
         self.result.betas = sampler.betas
         self.result.log_evidence, self.result.log_evidence_err =\
             sampler.log_evidence_estimate(
-                sampler.loglikelihood, self.nburn / self.nsteps)
-        self.result.walkers = sampler.chain[0, :, :, :]
+                np.array(full_chain[:, :, :, -2]).transpose((1, 2, 0)),
+                self.nburn / self.nsteps)
+        self.result.walkers = chain.swapaxes(0, 1)
 
         return self.result
+
+    def _set_pos0(self):
+        self.pos0 = [[self.get_random_draw_from_prior()
+                      for _ in range(self.nwalkers)]
+                     for _ in range(self.kwargs['ntemps'])]
@@ -22,6 +22,7 @@ class CoupledTimeAndFrequencySeries(object):
         self._time_array_updated = False
         self._frequency_array = None
         self._time_array = None
+        self._frequency_array_is_uniform = True
 
     def __repr__(self):
         return self.__class__.__name__ + '(duration={}, sampling_frequency={}, start_time={})'\
@@ -31,6 +32,10 @@ class CoupledTimeAndFrequencySeries(object):
     def frequency_array(self):
         """ Frequency array for the waveforms. Automatically updates if sampling_frequency or duration are updated.
 
+        An evenly sampled frequency array sets the sampling_frequency and
+        duration. A non-uniform sequence of frequencies is stored as given and
+        leaves them unchanged, see `frequency_array_is_uniform`.
+
         Returns
         -------
         array_like: The frequency array
@@ -45,15 +50,32 @@ class CoupledTimeAndFrequencySeries(object):
                                  'legitimate sampling_frequency ({}) or duration ({})'
                                  .format(self.sampling_frequency, self.duration))
 
+            self._frequency_array_updated = True
+
         return self._frequency_array
 
     @frequency_array.setter
     def frequency_array(self, frequency_array):
         self._frequency_array = frequency_array
-        self._sampling_frequency, self._duration = \
-            utils.get_sampling_frequency_and_duration_from_frequency_array(frequency_array)
+        self._frequency_array_is_uniform = \
+            utils.is_evenly_sampled(frequency_array)
+        if self._frequency_array_is_uniform:
+            self._sampling_frequency, self._duration = \
+                utils.get_sampling_frequency_and_duration_from_frequency_array(frequency_array)
         self._frequency_array_updated = True
 
+    @property
+    def frequency_array_is_uniform(self):
+        """ Whether the frequency array is evenly sampled. This is False
+        after a non-uniform frequency array has been set, until the
+        sampling_frequency or duration are set.
+
+        Returns
+        -------
+        bool
+        """
+        return self._frequency_array_is_uniform
+
     @property
     def time_array(self):
         """ Time array for the waveforms. Automatically updates if sampling_frequency or duration are updated.
@@ -100,6 +122,7 @@ class CoupledTimeAndFrequencySeries(object):
     def duration(self, duration):
         self._duration = duration
         self._frequency_array_updated = False
+        self._frequency_array_is_uniform = True
         self._time_array_updated = False
 
     @property
@@ -117,6 +140,7 @@ class CoupledTimeAndFrequencySeries(object):
     def sampling_frequency(self, sampling_frequency):
         self._sampling_frequency = sampling_frequency
         self._frequency_array_updated = False
+        self._frequency_array_is_uniform = True
         self._time_array_updated = False
 
     @property
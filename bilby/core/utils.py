@@ -2,7 +2,6 @@ from __future__ import division
 
 import logging
 import os
-from math import fmod
 import argparse
 import traceback
 import inspect
@@ -19,6 +18,7 @@ speed_of_light = 299792458.0  # m/s
 parsec = 3.0856775814671916e+16  # m
 solar_mass = 1.9884754153381438e+30  # Kg
 radius_of_earth = 6378100.0  # m
+gravitational_constant = 6.67408e-11  # m^3 kg^-1 s^-2
 
 _TOL = 14
 
@@ -110,6 +110,24 @@ def get_sampling_frequency_and_duration_from_time_array(time_array):
     return sampling_frequency, duration
 
 
+def is_evenly_sampled(array, tol=1e-10):
+    """
+    Check whether an array, e.g., of frequencies, is evenly sampled
+
+    Parameters
+    ----------
+    array: array_like
+        The array to check
+    tol: float
+        The maximum allowed range of the differences between elements
+
+    Returns
+    -------
+    bool: Whether the array is evenly sampled
+    """
+    return len(array) > 1 and np.ptp(np.diff(array)) <= tol
+
+
 def get_sampling_frequency_and_duration_from_frequency_array(frequency_array):
     """
     Calculate sampling frequency and duration from a frequency array
@@ -129,8 +147,7 @@ def get_sampling_frequency_and_duration_from_frequency_array(frequency_array):
 
     """
 
-    tol = 1e-10
-    if np.ptp(np.diff(frequency_array)) > tol:
+    if not is_evenly_sampled(frequency_array):
         raise ValueError("Your frequency series was not evenly sampled")
 
     number_of_frequencies = len(frequency_array)
@@ -241,12 +258,12 @@ def gps_time_to_gmst(gps_time):
 
     Parameters
     -------
-    gps_time: float
+    gps_time: float or array_like
         gps time
 
     Returns
     -------
-    float: Greenwich mean sidereal time in radians
+    float or array_like: Greenwich mean sidereal time in radians
 
     """
     omega_earth = 2 * np.pi * (1 / 365.2425 + 1) / 86400.
@@ -254,7 +271,7 @@ def gps_time_to_gmst(gps_time):
     gmst_2000 = (6 + 39. / 60 + 51.251406103947375 / 3600) * np.pi / 12
     correction_2018 = -0.00017782487379358614
     sidereal_time = omega_earth * (gps_time - gps_2000) + gmst_2000 + correction_2018
-    gmst = fmod(sidereal_time, 2 * np.pi)
+    gmst = np.fmod(sidereal_time, 2 * np.pi)
     return gmst
 
 
@@ -726,6 +743,144 @@ class UnsortedInterp2d(interp2d):
         return interp2d.__call__(self, x, y, dx=dx, dy=dy)[unsorted_idxs]
 
 
+class LogSpacedInterp2d(object):
+    """
+    Bilinear interpolation on a rectangular grid with logarithmically spaced
+    axes.
+
+    The grid cell containing each point is computed analytically from the
+    spacing of the axes, so no sorting or per-point Python work is required
+    and the input ordering is preserved. Each axis must be strictly
+    increasing; runs of nodes with a constant ratio between neighbours (e.g.,
+    `np.logspace`, or `-np.logspace` for negative values) are indexed
+    analytically, any other nodes are located with a binary search over the
+    start of the runs. Points outside the grid are evaluated at the nearest
+    edge of the grid.
+
+    Parameters
+    ----------
+    x: array_like
+        The nodes of the first axis, of length N
+    y: array_like
+        The nodes of the second axis, of length M
+    z: array_like
+        The values on the grid, with shape (M, N), i.e., `z[j, i]` is the
+        value at `(x[i], y[j])`. This is the convention of
+        `scipy.interpolate.interp2d`.
+    """
+
+    def __init__(self, x, y, z):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.z = np.asarray(z)
+        if self.z.shape != (len(self.y), len(self.x)):
+            raise ValueError(
+                'The shape of z, {}, does not match the lengths of y and x, '
+                '({}, {})'.format(self.z.shape, len(self.y), len(self.x)))
+        self._x_runs = self._find_geometric_runs(self.x)
+        self._y_runs = self._find_geometric_runs(self.y)
+
+    def __call__(self, x, y):
+        """ Evaluate the interpolant
+
+        Parameters
+        ----------
+        x, y: array_like
+            The points to evaluate the interpolant at, these are broadcast
+            against each other.
+
+        Returns
+        -------
+        array_like: The interpolated values, with the broadcast shape of x and y
+        """
+        ii, x_weight = self._cell_and_weight(x, self.x, self._x_runs)
+        jj, y_weight = self._cell_and_weight(y, self.y, self._y_runs)
+        z = self.z
+        out = ((1 - y_weight) * ((1 - x_weight) * z[jj, ii] +
+                                 x_weight * z[jj, ii + 1]) +
+               y_weight * ((1 - x_weight) * z[jj + 1, ii] +
+                           x_weight * z[jj + 1, ii + 1]))
+        return out[()]
+
+    @staticmethod
+    def _find_geometric_runs(axis):
+        """ Group the cells of an axis into runs with a constant node ratio
+
+        Parameters
+        ----------
+        axis: array_like
+            A strictly increasing array
+
+        Returns
+        -------
+        starts: array_like
+            The index of the first cell in each run
+        last_offsets: array_like
+            The number of cells in each run minus one
+        inverse_log_ratios: array_like
+            The inverse of the log of the ratio between neighbouring nodes in
+            each run, this is zero for single cells which are not part of a
+            geometric run.
+        """
+        if len(axis) < 2 or np.any(np.diff(axis) <= 0):
+            raise ValueError('Interpolation axes must be strictly increasing '
+                             'with at least two nodes')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = axis[1:] / axis[:-1]
+        starts = list()
+        lengths = list()
+        for cell, ratio in enumerate(ratios):
+            if (len(starts) > 0 and ratio > 0 and ratios[starts[-1]] > 0 and
+                    np.isclose(ratio, ratios[starts[-1]], rtol=1e-8, atol=0)):
+                lengths[-1] += 1
+            else:
+                starts.append(cell)
+                lengths.append(1)
+        starts = np.array(starts)
+        lengths = np.array(lengths)
+        inverse_log_ratios = np.zeros(len(starts))
+        geometric = lengths > 1
+        inverse_log_ratios[geometric] = 1 / np.log(ratios[starts[geometric]])
+        return starts, lengths - 1, inverse_log_ratios
+
+    @staticmethod
+    def _cell_and_weight(values, axis, runs):
+        """ The index of the cell containing each value and the position
+        within that cell
+
+        Parameters
+        ----------
+        values: array_like
+            The points to locate
+        axis: array_like
+            The nodes of the axis
+        runs: tuple
+            The output of `_find_geometric_runs` for the axis
+
+        Returns
+        -------
+        cells: array_like
+            The index of the lower node of the cell containing each point
+        weights: array_like
+            The fractional position of each point in its cell
+        """
+        starts, last_offsets, inverse_log_ratios = runs
+        values = np.minimum(np.maximum(values, axis[0]), axis[-1])
+        if len(starts) == 1:
+            offset = np.log(values / axis[0]) * inverse_log_ratios[0]
+            offset = np.minimum(np.maximum(offset, 0), last_offsets[0])
+            cells = offset.astype(int)
+        else:
+            run = np.searchsorted(axis[starts], values, side='right') - 1
+            start = starts[run]
+            ratio = values / axis[start]
+            offset = np.log(np.where(ratio > 0, ratio, 1)) * inverse_log_ratios[run]
+            offset = np.minimum(np.maximum(offset, 0), last_offsets[run])
+            cells = start + offset.astype(int)
+        weights = (values - axis[cells]) / (axis[cells + 1] - axis[cells])
+        return cells, weights
+
+
 #  Instantiate the default argument parser at runtime
 command_line_args, command_line_parser = set_up_command_line_arguments()
 #  Instantiate the default logging
@@ -2,7 +2,7 @@
 """
 
 import numpy as np
-from scipy.interpolate import UnivariateSpline
+from scipy.interpolate import make_interp_spline
 
 
 class Recalibrate(object):
@@ -50,7 +50,11 @@ class Recalibrate(object):
                             if self.prefix in key})
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return self._public_attributes() == other._public_attributes()
+
+    def _public_attributes(self):
+        return {key: value for key, value in self.__dict__.items()
+                if not key.startswith('_')}
 
 
 class CubicSpline(Recalibrate):
@@ -84,11 +88,51 @@ class CubicSpline(Recalibrate):
         self.minimum_frequency = minimum_frequency
         self.maximum_frequency = maximum_frequency
         self.__spline_points = np.logspace(np.log10(minimum_frequency), np.log10(maximum_frequency), n_points)
+        self._amplitude_names = ['amplitude_{}'.format(ii) for ii in range(n_points)]
+        self._phase_names = ['phase_{}'.format(ii) for ii in range(n_points)]
+        self._basis_frequency_array = None
+        self._basis_matrix = None
 
     @property
     def spline_points(self):
         return self.__spline_points
 
+    def basis_matrix(self, frequency_array):
+        """ The linear map from the spline node values to the spline
+        evaluated at the given frequencies
+
+        The spline is the natural cubic spline interpolating the nodes. The
+        matrix is computed once and reused while the same frequencies are
+        requested, e.g., the frequencies in the analysis band of an
+        interferometer.
+
+        Parameters
+        ----------
+        frequency_array: array-like
+            The frequency values to evaluate the spline at.
+
+        Returns
+        -------
+        basis_matrix: array-like
+            Array of shape (n_points, len(frequency_array)), such that
+            `np.dot(node_values, basis_matrix)` is the spline evaluated at
+            `frequency_array`.
+        """
+        if self._basis_frequency_array is not frequency_array and not (
+                self._basis_frequency_array is not None and
+                np.array_equal(self._basis_frequency_array, frequency_array)):
+            basis = make_interp_spline(
+                self.spline_points, np.eye(self.n_points), k=3, bc_type='natural')
+            self._basis_matrix = np.ascontiguousarray(basis(frequency_array).T)
+            self._basis_frequency_array = frequency_array
+        return self._basis_matrix
+
+    def set_calibration_parameters(self, **params):
+        for name in self._amplitude_names + self._phase_names:
+            key = self.prefix + name
+            if key in params:
+                self.params[name] = params[key]
+
     def __repr__(self):
         return self.__class__.__name__ + '(prefix=\'{}\', minimum_frequency={}, maximum_frequency={}, n_points={})'\
             .format(self.prefix, self.minimum_frequency, self.maximum_frequency, self.n_points)
@@ -112,14 +156,37 @@ class CubicSpline(Recalibrate):
             The factor to multiply the strain by.
         """
         self.set_calibration_parameters(**params)
-        amplitude_parameters = [self.params['amplitude_{}'.format(ii)] for ii in range(self.n_points)]
-        amplitude_spline = UnivariateSpline(self.spline_points, amplitude_parameters)
-        delta_amplitude = amplitude_spline(frequency_array)
+        amplitude_parameters = [self.params[name] for name in self._amplitude_names]
+        phase_parameters = [self.params[name] for name in self._phase_names]
+        return self._calibration_factor_from_nodes(
+            frequency_array, amplitude_parameters, phase_parameters)
 
-        phase_parameters = [self.params['phase_{}'.format(ii)] for ii in range(self.n_points)]
-        phase_spline = UnivariateSpline(self.spline_points, phase_parameters)
-        delta_phase = phase_spline(frequency_array)
+    def get_calibration_factors(self, frequency_array, parameters):
+        """Apply calibration model for many sets of parameters
 
-        calibration_factor = (1 + delta_amplitude) * (2 + 1j * delta_phase) / (2 - 1j * delta_phase)
+        Parameters
+        ----------
+        frequency_array: array-like
+            The frequency values to calculate the calibration factor for.
+        parameters: dict, pandas.DataFrame
+            The calibration parameters, each entry is an array with one value
+            per set of parameters, e.g., a posterior.
 
-        return calibration_factor
+        Returns
+        -------
+        calibration_factors : array-like
+            The factors to multiply the strain by, shape
+            (n_sets, len(frequency_array)).
+        """
+        amplitude_parameters = np.column_stack(
+            [parameters[self.prefix + name] for name in self._amplitude_names])
+        phase_parameters = np.column_stack(
+            [parameters[self.prefix + name] for name in self._phase_names])
+        return self._calibration_factor_from_nodes(
+            frequency_array, amplitude_parameters, phase_parameters)
+
+    def _calibration_factor_from_nodes(self, frequency_array, amplitude_parameters, phase_parameters):
+        basis_matrix = self.basis_matrix(frequency_array)
+        delta_amplitude = np.dot(amplitude_parameters, basis_matrix)
+        delta_phase = np.dot(phase_parameters, basis_matrix)
+        return (1 + delta_amplitude) * (2 + 1j * delta_phase) / (2 - 1j * delta_phase)
@@ -1,11 +1,20 @@
 from __future__ import division
 
+import datetime
+import multiprocessing
+
 import numpy as np
 from pandas import DataFrame
 
+try:
+    from scipy.special import logsumexp
+except ImportError:
+    from scipy.misc import logsumexp
+
 from ..core.utils import logger, solar_mass
-from ..core.prior import DeltaFunction, Interped
-from .utils import lalsim_SimInspiralTransformPrecessingNewInitialConditions
+from ..core.prior import DeltaFunction
+from .utils import (lalsim_SimInspiralTransformPrecessingNewInitialConditions,
+                    ln_i0)
 from .cosmology import get_cosmology
 
 try:
@@ -641,7 +650,7 @@ def lambda_tilde_to_lambda_1_lambda_2(
 
 
 def _generate_all_cbc_parameters(sample, defaults, base_conversion,
-                                 likelihood=None, priors=None):
+                                 likelihood=None, priors=None, npool=1):
     """Generate all cbc parameters, helper function for BBH/BNS"""
     output_sample = sample.copy()
     waveform_defaults = defaults
@@ -662,13 +671,13 @@ def _generate_all_cbc_parameters(sample, defaults, base_conversion,
         if likelihood.distance_marginalization:
             output_sample = \
                 generate_distance_samples_from_marginalized_likelihood(
-                    output_sample, likelihood)
+                    output_sample, likelihood, npool=npool)
     output_sample = generate_source_frame_parameters(output_sample)
-    compute_snrs(output_sample, likelihood)
+    compute_snrs(output_sample, likelihood, npool=npool)
     return output_sample
 
 
-def generate_all_bbh_parameters(sample, likelihood=None, priors=None):
+def generate_all_bbh_parameters(sample, likelihood=None, priors=None, npool=1):
     """
     From either a single sample or a set of samples fill in all missing
     BBH parameters, in place.
@@ -683,6 +692,8 @@ def generate_all_bbh_parameters(sample, likelihood=None, priors=None):
         likelihood.interferometers.
     priors: dict, optional
         Dictionary of prior objects, used to fill in non-sampled parameters.
+    npool: int, optional
+        The number of processes to use when computing the SNRs.
     """
     waveform_defaults = {
         'reference_frequency': 50.0, 'waveform_approximant': 'IMRPhenomPv2',
@@ -690,11 +701,11 @@ def generate_all_bbh_parameters(sample, likelihood=None, priors=None):
     output_sample = _generate_all_cbc_parameters(
         sample, defaults=waveform_defaults,
         base_conversion=convert_to_lal_binary_black_hole_parameters,
-        likelihood=likelihood, priors=priors)
+        likelihood=likelihood, priors=priors, npool=npool)
     return output_sample
 
 
-def generate_all_bns_parameters(sample, likelihood=None, priors=None):
+def generate_all_bns_parameters(sample, likelihood=None, priors=None, npool=1):
     """
     From either a single sample or a set of samples fill in all missing
     BNS parameters, in place.
@@ -712,6 +723,8 @@ def generate_all_bns_parameters(sample, likelihood=None, priors=None):
         likelihood.interferometers.
     priors: dict, optional
         Dictionary of prior objects, used to fill in non-sampled parameters.
+    npool: int, optional
+        The number of processes to use when computing the SNRs.
     """
     waveform_defaults = {
         'reference_frequency': 50.0, 'waveform_approximant': 'TaylorF2',
@@ -719,7 +732,7 @@ def generate_all_bns_parameters(sample, likelihood=None, priors=None):
     output_sample = _generate_all_cbc_parameters(
         sample, defaults=waveform_defaults,
         base_conversion=convert_to_lal_binary_neutron_star_parameters,
-        likelihood=likelihood, priors=priors)
+        likelihood=likelihood, priors=priors, npool=npool)
     output_sample = generate_tidal_parameters(output_sample)
     return output_sample
 
@@ -928,134 +941,404 @@ def generate_source_frame_parameters(sample):
     return output_sample
 
 
-def compute_snrs(sample, likelihood):
+def compute_snrs(sample, likelihood, npool=1, chunk_size=None):
     """
     Compute the optimal and matched filter snrs of all posterior samples
     and print it out.
 
+    For a set of samples, the samples are split into chunks which are
+    evaluated in order, optionally by a pool of processes. The snrs are
+    written into preallocated arrays, which are added to the samples once
+    all chunks are done.
+
     Parameters
     ----------
     sample: dict or array_like
 
     likelihood: bilby.gw.likelihood.GravitationalWaveTransient
         Likelihood function to be applied on the posterior
+    npool: int, optional
+        The number of processes to use for a set of samples, the likelihood
+        is sent to each process once.
+    chunk_size: int, optional
+        The number of samples in each chunk, by default the samples are
+        split into ten chunks per process.
 
     """
     if likelihood is not None:
         if isinstance(sample, dict):
-            signal_polarizations =\
-                likelihood.waveform_generator.frequency_domain_strain(sample)
-            for ifo in likelihood.interferometers:
-                signal = ifo.get_detector_response(signal_polarizations, sample)
+            matched_filter_snrs, optimal_snrs = _compute_snrs_for_chunk(
+                [sample], likelihood)
+            for ii, ifo in enumerate(likelihood.interferometers):
                 sample['{}_matched_filter_snr'.format(ifo.name)] =\
-                    ifo.matched_filter_snr(signal=signal)
-                sample['{}_optimal_snr'.format(ifo.name)] = \
-                    ifo.optimal_snr_squared(signal=signal) ** 0.5
+                    matched_filter_snrs[0, ii]
+                sample['{}_optimal_snr'.format(ifo.name)] =\
+                    optimal_snrs[0, ii]
         else:
             logger.info(
                 'Computing SNRs for every sample, this may take some time.')
-            all_interferometers = likelihood.interferometers
-            matched_filter_snrs = {ifo.name: [] for ifo in all_interferometers}
-            optimal_snrs = {ifo.name: [] for ifo in all_interferometers}
-            for ii in range(len(sample)):
-                signal_polarizations =\
-                    likelihood.waveform_generator.frequency_domain_strain(
-                        dict(sample.iloc[ii]))
-                for ifo in all_interferometers:
-                    signal = ifo.get_detector_response(
-                        signal_polarizations, sample.iloc[ii])
-                    matched_filter_snrs[ifo.name].append(
-                        ifo.matched_filter_snr(signal=signal))
-                    optimal_snrs[ifo.name].append(
-                        ifo.optimal_snr_squared(signal=signal) ** 0.5)
-
-            for ifo in likelihood.interferometers:
+            n_ifos = len(likelihood.interferometers)
+            matched_filter_snrs = np.empty((len(sample), n_ifos), dtype=complex)
+            optimal_snrs = np.empty((len(sample), n_ifos))
+            for start, stop, output in _evaluate_in_chunks(
+                    _compute_snrs_for_chunk, sample, likelihood, npool=npool,
+                    chunk_size=chunk_size, label='SNRs'):
+                matched_filter_snrs[start:stop], optimal_snrs[start:stop] =\
+                    output
+
+            for ii, ifo in enumerate(likelihood.interferometers):
                 sample['{}_matched_filter_snr'.format(ifo.name)] =\
-                    matched_filter_snrs[ifo.name]
-                sample['{}_optimal_snr'.format(ifo.name)] =\
-                    optimal_snrs[ifo.name]
-
-            likelihood.interferometers = all_interferometers
+                    matched_filter_snrs[:, ii]
+                sample['{}_optimal_snr'.format(ifo.name)] = optimal_snrs[:, ii]
 
     else:
         logger.debug('Not computing SNRs.')
 
 
-def generate_distance_samples_from_marginalized_likelihood(samples, likelihood):
+def _evaluate_in_chunks(function, samples, likelihood, npool=1,
+                        chunk_size=None, arrays=(), label='samples'):
+    """ Evaluate a function on consecutive chunks of the rows of a DataFrame
+
+    The chunks are evaluated in order, by a pool of processes if `npool` is
+    greater than one, and the progress is logged after each chunk.
+
+    Parameters
+    ----------
+    function: callable
+        A module level function, called as
+        `function(records, likelihood, *chunk_arrays)`, where `records` is a
+        list of dictionaries of the parameters of each row of the chunk and
+        `chunk_arrays` are the slices of `arrays` for the chunk
+    samples: pandas.DataFrame
+        The samples to evaluate
+    likelihood: bilby.gw.likelihood.GravitationalWaveTransient
+        The likelihood passed to the function, this is sent to each process
+        once
+    npool: int, optional
+        The number of processes to use
+    chunk_size: int, optional
+        The number of samples in each chunk, by default the samples are split
+        into ten chunks per process
+    arrays: tuple, optional
+        Arrays with an entry for each sample, which are sliced and passed to
+        the function with each chunk
+    label: str, optional
+        A description of what is computed, used when logging the progress
+
+    Yields
+    ------
+    start, stop: int
+        The rows of samples in the chunk
+    output:
+        The output of the function for the chunk
+    """
+    n_samples = len(samples)
+    if chunk_size is None:
+        chunk_size = int(np.ceil(n_samples / (10 * npool)))
+    chunk_size = max(int(chunk_size), 1)
+    tasks = ((function,
+              samples.iloc[ii:ii + chunk_size].to_dict('records'),
+              [array[ii:ii + chunk_size] for array in arrays])
+             for ii in range(0, n_samples, chunk_size))
+
+    start_time = datetime.datetime.now()
+    pool = None
+    if npool > 1:
+        pool = multiprocessing.Pool(
+            processes=npool, initializer=_initialize_conversion_likelihood,
+            initargs=(likelihood,))
+        outputs = pool.imap(_evaluate_chunk_with_global_likelihood, tasks)
+    else:
+        outputs = (function(records, likelihood, *chunk_arrays)
+                   for function, records, chunk_arrays in tasks)
+    try:
+        start = 0
+        for output in outputs:
+            stop = min(start + chunk_size, n_samples)
+            yield start, stop, output
+            elapsed = (datetime.datetime.now() - start_time).total_seconds()
+            logger.info(
+                'Computed {} for {}/{} samples ({:.1f} samples/s)'.format(
+                    label, stop, n_samples, stop / max(elapsed, 1e-9)))
+            start = stop
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+_conversion_likelihood = None
+
+
+def _initialize_conversion_likelihood(likelihood):
+    """ Store the likelihood in each process of the pool used by
+    `_evaluate_in_chunks` """
+    global _conversion_likelihood
+    _conversion_likelihood = likelihood
+
+
+def _evaluate_chunk_with_global_likelihood(task):
+    function, records, chunk_arrays = task
+    return function(records, _conversion_likelihood, *chunk_arrays)
+
+
+def _compute_inner_products_for_chunk(samples, likelihood):
+    """ The noise weighted inner products of the signal of each sample in
+    each interferometer
+
+    The inner products are evaluated on the in-band data products of each
+    interferometer, see
+    `bilby.gw.detector.Interferometer.frozen_analysis_data`.
+
+    Parameters
+    ----------
+    samples: list
+        List of dictionaries of parameters
+    likelihood: bilby.gw.likelihood.GravitationalWaveTransient
+        The likelihood providing the waveform generator and interferometers
+
+    Returns
+    -------
+    d_inner_h: array_like
+        The complex inner products <h|d>, shape (len(samples), n_ifos)
+    optimal_snr_squared: array_like
+        The inner products <h|h>, shape (len(samples), n_ifos)
+    """
+    interferometers = likelihood.interferometers
+    analysis_data = [ifo.frozen_analysis_data for ifo in interferometers]
+    d_inner_h = np.empty((len(samples), len(interferometers)), dtype=complex)
+    optimal_snr_squared = np.empty((len(samples), len(interferometers)))
+    for ii, sample in enumerate(samples):
+        signal_polarizations =\
+            likelihood.waveform_generator.frequency_domain_strain(sample)
+        signals = interferometers.get_detector_responses(
+            signal_polarizations, sample)
+        for jj, signal in enumerate(signals):
+            signal = signal[analysis_data[jj].frequency_slice]
+            d_inner_h[ii, jj] = analysis_data[jj].inner_product(signal)
+            optimal_snr_squared[ii, jj] =\
+                analysis_data[jj].optimal_snr_squared(signal)
+    return d_inner_h, optimal_snr_squared
+
+
+def _compute_snrs_for_chunk(samples, likelihood):
+    """ The matched filter and optimal snrs of a list of samples
+
+    Parameters
+    ----------
+    samples: list
+        List of dictionaries of parameters
+    likelihood: bilby.gw.likelihood.GravitationalWaveTransient
+        The likelihood providing the waveform generator and interferometers
+
+    Returns
+    -------
+    matched_filter_snrs: array_like
+        The complex matched filter snrs, shape (len(samples), n_ifos)
+    optimal_snrs: array_like
+        The optimal snrs, shape (len(samples), n_ifos)
+    """
+    d_inner_h, optimal_snr_squared = _compute_inner_products_for_chunk(
+        samples, likelihood)
+    optimal_snrs = optimal_snr_squared ** 0.5
+    return d_inner_h / optimal_snrs, optimal_snrs
+
+
+def _compute_time_series_inner_products_for_chunk(samples, likelihood):
+    """ The inner products of the signal of each sample, summed over the
+    interferometers, as a function of the coalescence time
+
+    The time series is computed with a single FFT for the network, as in
+    `bilby.gw.likelihood.GravitationalWaveTransient.log_likelihood_ratio`,
+    and only the times with non-zero prior probability are kept.
+
+    Parameters
+    ----------
+    samples: list
+        List of dictionaries of parameters
+    likelihood: bilby.gw.likelihood.GravitationalWaveTransient
+        A likelihood with time marginalization
+
+    Returns
+    -------
+    d_inner_h: array_like
+        The complex inner products <h|d> at each time with non-zero prior
+        probability, shape (len(samples), n_times)
+    optimal_snr_squared: array_like
+        The inner products <h|h>, shape (len(samples),)
+    """
+    interferometers = likelihood.interferometers
+    d_inner_h = np.zeros((len(samples), len(likelihood._time_prior_weights)),
+                         dtype=complex)
+    optimal_snr_squared = np.zeros(len(samples))
+    for ii, sample in enumerate(samples):
+        signal_polarizations =\
+            likelihood.waveform_generator.frequency_domain_strain(sample)
+        signals = interferometers.get_detector_responses(
+            signal_polarizations, sample)
+        for ifo, signal in zip(interferometers, signals):
+            analysis_data = ifo.frozen_analysis_data
+            optimal_snr_squared[ii] += analysis_data.optimal_snr_squared(
+                signal[analysis_data.frequency_slice])
+        d_inner_h[ii] = likelihood._time_shifted_d_inner_h(signals)
+    return d_inner_h, optimal_snr_squared
+
+
+def generate_distance_samples_from_marginalized_likelihood(
+        samples, likelihood, npool=1, chunk_size=None,
+        max_chunk_elements=int(1e7)):
     """
     Reconstruct the distance posterior from a run which used a likelihood which
     explicitly marginalised over distance.
 
     See Eq. (C29-C32) of https://arxiv.org/abs/1809.02293
 
+    The inner products of each sample are computed in chunks, optionally by
+    a pool of processes. For each chunk, the likelihood is evaluated on the
+    distance grid of the likelihood, marginalised over time and phase if
+    the likelihood marginalised over them, and the distances are drawn by
+    inverse transform sampling on the grid.
+
     Parameters
     ----------
-    samples: DataFrame
+    samples: DataFrame or dict
         Posterior from run with distance marginalisation turned on.
     likelihood: bilby.gw.likelihood.GravitationalWaveTransient
         Likelihood used during sampling.
+    npool: int, optional
+        The number of processes to use for a set of samples.
+    chunk_size: int, optional
+        The number of samples in each chunk, by default the samples are
+        split into ten chunks per process, with at most
+        `max_chunk_elements` / len(likelihood._distance_array) samples per
+        chunk. Each process holds several (chunk_size, distance grid) arrays.
+    max_chunk_elements: int, optional
+        The maximum number of elements of the (chunk_size, distance grid)
+        arrays used for the default chunk_size, 1e7 by default, i.e., 80 MB
+        per array.
 
     Return
     ------
-    sample: DataFrame
+    sample: DataFrame or dict
         Returns the posterior with distance samples.
     """
     if not likelihood.distance_marginalization:
         return samples
-    if likelihood.phase_marginalization or likelihood.time_marginalization:
-        logger.warning('Cannot currently reconstruct distance posterior '
-                       'when other marginalizations are turned on.')
-        return samples
     if isinstance(samples, dict):
-        pass
+        samples['luminosity_distance'] =\
+            _generate_distance_samples_for_chunk(
+                [samples], likelihood, np.random.uniform(0, 1, 1))[0]
     elif isinstance(samples, DataFrame):
-        for ii in range(len(samples)):
-            temp = _generate_distance_sample_from_marginalized_likelihood(
-                dict(samples.iloc[ii]), likelihood)
-            samples['luminosity_distance'][ii] = temp['luminosity_distance']
+        logger.info('Reconstructing the distance posterior.')
+        if chunk_size is None:
+            chunk_size = min(
+                int(np.ceil(len(samples) / (10 * npool))),
+                max_chunk_elements // len(likelihood._distance_array))
+        distances = np.empty(len(samples))
+        for start, stop, output in _evaluate_in_chunks(
+                _generate_distance_samples_for_chunk, samples, likelihood,
+                npool=npool, chunk_size=chunk_size,
+                arrays=(np.random.uniform(0, 1, len(samples)),),
+                label='distance samples'):
+            distances[start:stop] = output
+        samples['luminosity_distance'] = distances
     return samples
 
 
-def _generate_distance_sample_from_marginalized_likelihood(sample, likelihood):
+def _generate_distance_samples_for_chunk(samples, likelihood, uniform_draws):
     """
-    Generate a single sample from the posterior distribution for luminosity
-    distance when using a likelihood which explicitly marginalises over
-    distance.
+    Draw samples from the posterior distribution for luminosity distance
+    when using a likelihood which explicitly marginalises over distance.
 
     See Eq. (C29-C32) of https://arxiv.org/abs/1809.02293
 
     Parameters
     ----------
-    sample: dict
-        The set of parameters used with the marginalised likelihood.
+    samples: list
+        List of dictionaries of the parameters used with the marginalised
+        likelihood.
     likelihood: bilby.gw.likelihood.GravitationalWaveTransient
         The likelihood used.
+    uniform_draws: array_like
+        A draw from the unit interval for each sample, used for the inverse
+        transform sampling.
 
     Returns
     -------
-    sample: dict
-        Modifed dictionary with the distance sampled from the posterior.
+    array_like: A distance for each sample, drawn from its posterior.
     """
-    signal_polarizations = \
-        likelihood.waveform_generator.frequency_domain_strain(sample)
-    d_inner_h = 0
-    rho_opt_sq = 0
-    for ifo in likelihood.interferometers:
-        signal = ifo.get_detector_response(signal_polarizations, sample)
-        d_inner_h += ifo.inner_product(signal=signal)
-        rho_opt_sq += ifo.optimal_snr_squared(signal=signal)
+    distance_array = likelihood._distance_array
+    sample_distances = np.array(
+        [sample['luminosity_distance'] for sample in samples])
+    distance_ratio = sample_distances[:, np.newaxis] / distance_array
+
+    if likelihood.time_marginalization:
+        d_inner_h, rho_opt_sq = _compute_time_series_inner_products_for_chunk(
+            samples, likelihood)
+        time_prior_array = likelihood._time_prior_weights
+        distance_log_like = np.empty(distance_ratio.shape)
+        block_size = max(int(1e6 // len(distance_array)), 1)
+        for ii in range(len(samples)):
+            # Blocks of times keep the (n_times, n_distances) array small
+            log_like = -np.inf
+            for start in range(0, d_inner_h.shape[1], block_size):
+                block = d_inner_h[ii, start:start + block_size, np.newaxis]
+                if likelihood.phase_marginalization:
+                    block = ln_i0(abs(block) * distance_ratio[ii])
+                else:
+                    block = block.real * distance_ratio[ii]
+                log_like = np.logaddexp(log_like, logsumexp(
+                    block, axis=0,
+                    b=time_prior_array[start:start + block_size, np.newaxis]))
+            distance_log_like[ii] = log_like
+    else:
+        d_inner_h, rho_opt_sq = _compute_inner_products_for_chunk(
+            samples, likelihood)
+        d_inner_h = np.sum(d_inner_h, axis=1)[:, np.newaxis]
+        rho_opt_sq = np.sum(rho_opt_sq, axis=1)
+        if likelihood.phase_marginalization:
+            distance_log_like = ln_i0(abs(d_inner_h) * distance_ratio)
+        else:
+            distance_log_like = d_inner_h.real * distance_ratio
+    distance_log_like -= rho_opt_sq[:, np.newaxis] * distance_ratio ** 2 / 2
 
-    d_inner_h_dist = (d_inner_h * sample['luminosity_distance'] /
-                      likelihood._distance_array)
+    distance_post = np.exp(
+        distance_log_like - np.max(distance_log_like, axis=1)[:, np.newaxis])
+    distance_post *= likelihood.distance_prior_array
+    return _inverse_transform_sample(distance_array, distance_post,
+                                     uniform_draws)
 
-    rho_opt_sq_dist = (rho_opt_sq * sample['luminosity_distance']**2 /
-                       likelihood._distance_array**2)
 
-    distance_log_like = (d_inner_h_dist.real - rho_opt_sq_dist.real / 2)
+def _inverse_transform_sample(xx, yy, uniform_draws):
+    """ Draw from each of a set of distributions tabulated on a shared grid
 
-    distance_post = np.exp(distance_log_like - max(distance_log_like)) *\
-        likelihood.distance_prior_array
+    The cumulative distribution of each row of `yy` is computed with the
+    trapezium rule and inverted by linear interpolation, as for
+    `bilby.core.prior.Interped`.
+
+    Parameters
+    ----------
+    xx: array_like
+        The grid, shape (n_grid,)
+    yy: array_like
+        The unnormalised probability densities on the grid, shape
+        (n_distributions, n_grid)
+    uniform_draws: array_like
+        A draw from the unit interval for each distribution
 
-    sample['luminosity_distance'] = Interped(
-        likelihood._distance_array, distance_post).sample()
-    return sample
+    Returns
+    -------
+    array_like: A sample from each distribution
+    """
+    cumulative = np.zeros(yy.shape)
+    cumulative[:, 1:] = np.cumsum(
+        (yy[:, 1:] + yy[:, :-1]) * np.diff(xx) / 2, axis=1)
+    cumulative /= cumulative[:, -1:]
+    uniform_draws = np.asarray(uniform_draws)[:, np.newaxis]
+    upper = np.clip(np.sum(cumulative < uniform_draws, axis=1), 1, len(xx) - 1)
+    rows = np.arange(len(yy))
+    lower_cdf = cumulative[rows, upper - 1]
+    upper_cdf = cumulative[rows, upper]
+    fraction = (uniform_draws[:, 0] - lower_cdf) / np.where(
+        upper_cdf > lower_cdf, upper_cdf - lower_cdf, 1)
+    return xx[upper - 1] + np.clip(fraction, 0, 1) * (xx[upper] - xx[upper - 1])
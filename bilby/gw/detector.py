@@ -185,6 +185,127 @@ class InterferometerList(list):
         super(InterferometerList, self).insert(index, interferometer)
         self._check_interferometers()
 
+    def antenna_responses_and_time_delays(self, ra, dec, time, psi,
+                                          modes=('plus', 'cross')):
+        """ Calculate the antenna responses and time delays from the
+        geocenter of all the interferometers
+
+        The sky geometry is computed once and shared between the
+        interferometers, see
+        `bilby.gw.utils.get_antenna_responses_and_time_delays`.
+
+        Parameters
+        ----------
+        ra: float or array_like
+            right ascension in radians
+        dec: float or array_like
+            declination in radians
+        time: float or array_like
+            geocentric GPS time
+        psi: float or array_like
+            binary polarisation angle counter-clockwise about the direction
+            of propagation
+        modes: list
+            The polarisation modes, e.g., ['plus', 'cross']
+
+        Returns
+        -------
+        responses: array_like
+            The antenna responses, shape (n_interferometers, n_modes) + the
+            broadcast shape of ra, dec, time and psi
+        time_delays: array_like
+            The time delays from the geocenter in seconds, shape
+            (n_interferometers,) + the broadcast shape of ra, dec, time and
+            psi
+        """
+        return gwutils.get_antenna_responses_and_time_delays(
+            ra, dec, time, psi,
+            detector_tensors=[ifo.detector_tensor for ifo in self],
+            vertices=[ifo.vertex for ifo in self], modes=modes)
+
+    def antenna_response_grid(self, ra, dec, geocent_time, psi=0,
+                              modes=('plus', 'cross'), chunk_size=2 ** 16):
+        """ Calculate the antenna responses and time delays of all the
+        interferometers on a grid of points
+
+        The inputs are broadcast against each other and the resulting grid is
+        flattened, so, e.g., passing `ra[:, np.newaxis]`,
+        `dec[:, np.newaxis]` and `geocent_time[np.newaxis, :]` evaluates
+        every sky position at every time. The grid is evaluated in chunks of
+        at most `chunk_size` points so the memory used by the intermediate
+        arrays is bounded independently of the size of the grid.
+
+        Parameters
+        ----------
+        ra: float or array_like
+            right ascension in radians
+        dec: float or array_like
+            declination in radians
+        geocent_time: float or array_like
+            geocentric GPS time
+        psi: float or array_like
+            binary polarisation angle counter-clockwise about the direction
+            of propagation
+        modes: list
+            The polarisation modes, e.g., ['plus', 'cross']
+        chunk_size: int
+            The maximum number of points evaluated at once
+
+        Returns
+        -------
+        responses: array_like
+            The antenna responses, shape (n_interferometers, n_modes,
+            n_points)
+        time_delays: array_like
+            The time delays from the geocenter in seconds, shape
+            (n_interferometers, n_points)
+        """
+        ra, dec, geocent_time, psi = np.broadcast_arrays(
+            *np.atleast_1d(ra, dec, geocent_time, psi))
+        shape = ra.shape
+        n_points = ra.size
+        chunk_size = max(int(chunk_size), 1)
+        responses = np.empty((len(self), len(modes), n_points))
+        time_delays = np.empty((len(self), n_points))
+        for start in range(0, n_points, chunk_size):
+            stop = min(start + chunk_size, n_points)
+            index = np.unravel_index(np.arange(start, stop), shape)
+            responses[..., start:stop], time_delays[:, start:stop] = \
+                self.antenna_responses_and_time_delays(
+                    ra[index], dec[index], geocent_time[index], psi[index],
+                    modes=modes)
+        return responses, time_delays
+
+    def get_detector_responses(self, waveform_polarizations, parameters,
+                               frequencies=None):
+        """ Get the response of each interferometer to a waveform
+
+        The antenna responses and time delays of all the interferometers are
+        computed together, see `antenna_responses_and_time_delays`.
+
+        Parameters
+        ----------
+        waveform_polarizations: dict
+            polarizations of the waveform
+        parameters: dict
+            parameters describing position and time of arrival of the signal
+        frequencies: array_like, optional
+            The frequencies at which the waveform_polarizations are given, see
+            `Interferometer.get_detector_response`
+
+        Returns
+        -------
+        list: The signal observed in each interferometer
+        """
+        responses, time_delays = self.antenna_responses_and_time_delays(
+            parameters['ra'], parameters['dec'], parameters['geocent_time'],
+            parameters['psi'], modes=list(waveform_polarizations.keys()))
+        return [interferometer.get_detector_response(
+                waveform_polarizations, parameters,
+                antenna_responses=responses[ii], time_delay=time_delays[ii],
+                frequencies=frequencies)
+                for ii, interferometer in enumerate(self)]
+
     @property
     def meta_data(self):
         """ Dictionary of the per-interferometer meta_data """
@@ -413,7 +534,7 @@ class InterferometerStrainData(object):
 
     def add_to_frequency_domain_strain(self, x):
         """Deprecated"""
-        self._frequency_domain_strain += x
+        self._frequency_domain_strain = self._frequency_domain_strain + x
 
     def low_pass_filter(self, filter_freq=None):
         """ Low pass filter the data """
@@ -869,6 +990,7 @@ class Interferometer(object):
             minimum_frequency=minimum_frequency,
             maximum_frequency=maximum_frequency)
         self.meta_data = dict()
+        self._frozen_analysis_data = None
 
     def __eq__(self, other):
         if self.name == other.name and \
@@ -1248,7 +1370,44 @@ class Interferometer(object):
         polarization_tensor = gwutils.get_polarization_tensor(ra, dec, time, psi, mode)
         return np.einsum('ij,ij->', self.detector_tensor, polarization_tensor)
 
-    def get_detector_response(self, waveform_polarizations, parameters):
+    def antenna_responses_and_time_delay(self, ra, dec, time, psi,
+                                         modes=('plus', 'cross')):
+        """
+        Calculate the antenna response to several polarization modes and the
+        time delay from the geocenter, sharing the sky geometry between them
+
+        See `bilby.gw.utils.get_antenna_responses_and_time_delays`.
+
+        Parameters
+        -------
+        ra: float or array_like
+            right ascension in radians
+        dec: float or array_like
+            declination in radians
+        time: float or array_like
+            geocentric GPS time
+        psi: float or array_like
+            binary polarisation angle counter-clockwise about the direction of propagation
+        modes: list
+            polarisation modes (e.g. ['plus', 'cross'])
+
+        Returns
+        -------
+        responses: array_like
+            The antenna response to each mode, shape (n_modes,) + the
+            broadcast shape of ra, dec, time and psi
+        time_delay: float or array_like
+            The time delay from geocenter in seconds
+
+        """
+        responses, time_delays = gwutils.get_antenna_responses_and_time_delays(
+            ra, dec, time, psi, detector_tensors=[self.detector_tensor],
+            vertices=[self.vertex], modes=modes)
+        return responses[0], time_delays[0]
+
+    def get_detector_response(self, waveform_polarizations, parameters,
+                              antenna_responses=None, time_delay=None,
+                              frequencies=None):
         """ Get the detector response for a particular waveform
 
         Parameters
@@ -1257,33 +1416,52 @@ class Interferometer(object):
             polarizations of the waveform
         parameters: dict
             parameters describing position and time of arrival of the signal
+        antenna_responses: array_like, optional
+            The antenna response to each of the polarizations, in the order
+            of `waveform_polarizations`
+        time_delay: float, optional
+            The time delay from the geocenter. If either this or
+            `antenna_responses` is not given, both are calculated with
+            `antenna_responses_and_time_delay`.
+        frequencies: array_like, optional
+            The frequencies at which the waveform_polarizations are given if
+            they are not the frequency_array of the interferometer, e.g., a
+            non-uniform sequence of frequencies. The response is then neither
+            restricted to the frequency_mask nor evaluated anywhere else.
 
         Returns
         -------
         array_like: A 3x3 array representation of the detector response (signal observed in the interferometer)
         """
-        signal = {}
-        for mode in waveform_polarizations.keys():
-            det_response = self.antenna_response(
-                parameters['ra'],
-                parameters['dec'],
-                parameters['geocent_time'],
-                parameters['psi'], mode)
-
-            signal[mode] = waveform_polarizations[mode] * det_response
-        signal_ifo = sum(signal.values())
+        if antenna_responses is None or time_delay is None:
+            antenna_responses, time_delay = \
+                self.antenna_responses_and_time_delay(
+                    parameters['ra'], parameters['dec'],
+                    parameters['geocent_time'], parameters['psi'],
+                    modes=list(waveform_polarizations.keys()))
+        signal_ifo = sum(
+            waveform_polarizations[mode] * det_response for mode, det_response
+            in zip(waveform_polarizations.keys(), antenna_responses))
+
+        dt = parameters['geocent_time'] + time_delay - self.strain_data.start_time
+
+        if frequencies is not None:
+            signal_ifo = signal_ifo * np.exp(-1j * 2 * np.pi * dt * frequencies)
+            signal_ifo *= self.calibration_model.get_calibration_factor(
+                frequencies, prefix='recalib_{}_'.format(self.name),
+                **parameters)
+            return signal_ifo
 
         signal_ifo *= self.strain_data.frequency_mask
 
-        time_shift = self.time_delay_from_geocenter(
-            parameters['ra'], parameters['dec'], parameters['geocent_time'])
-        dt = parameters['geocent_time'] + time_shift - self.strain_data.start_time
-
         signal_ifo = signal_ifo * np.exp(
             -1j * 2 * np.pi * dt * self.frequency_array)
 
-        signal_ifo *= self.calibration_model.get_calibration_factor(
-            self.frequency_array, prefix='recalib_{}_'.format(self.name), **parameters)
+        frozen_analysis_data = self.frozen_analysis_data
+        signal_ifo[frozen_analysis_data.frequency_slice] *= \
+            self.calibration_model.get_calibration_factor(
+                frozen_analysis_data.frequency_array,
+                prefix='recalib_{}_'.format(self.name), **parameters)
 
         return signal_ifo
 
@@ -1533,6 +1711,23 @@ class Interferometer(object):
             power_spectral_density=self.power_spectral_density_array,
             duration=self.strain_data.duration)
 
+    @property
+    def frozen_analysis_data(self):
+        """ The in-band data products used when evaluating the likelihood
+
+        These are computed once and reused until the strain data, the power
+        spectral density, or the frequency bounds of the interferometer
+        change, at which point they are recomputed.
+
+        Returns
+        -------
+        bilby.gw.detector.FrozenAnalysisData: The precomputed data products
+        """
+        if self._frozen_analysis_data is None or \
+                not self._frozen_analysis_data.is_valid_for(self):
+            self._frozen_analysis_data = FrozenAnalysisData(self)
+        return self._frozen_analysis_data
+
     @property
     def whitened_frequency_domain_strain(self):
         """ Calculates the whitened data by dividing data by the amplitude spectral density
@@ -1710,6 +1905,141 @@ class Interferometer(object):
         return res
 
 
+class FrozenAnalysisData(object):
+
+    def __init__(self, interferometer):
+        """ Data products of an interferometer restricted to the analysis band
+
+        The masked frequency data, the data divided by the power spectral
+        density, the inverse power spectral density and the normalisation
+        of the inner product are computed once. The noise weighted inner
+        products can then be evaluated on compact, contiguous arrays, rather
+        than re-interpolating the power spectral density and re-masking the
+        data on each call.
+
+        Parameters
+        ----------
+        interferometer: bilby.gw.detector.Interferometer
+            The interferometer to compute the data products for
+
+        Attributes
+        ----------
+        frequency_slice: slice, array_like
+            Selects the analysis band from an array defined on the full
+            frequency array of the interferometer. This is a slice when the
+            analysis band is contiguous and an index array otherwise.
+        frequency_array: array_like
+            The frequencies in the analysis band
+        frequency_domain_strain: array_like
+            The frequency domain strain in the analysis band
+        power_spectral_density_array: array_like
+            The (windowed) power spectral density in the analysis band
+        inverse_power_spectral_density_array: array_like
+            The reciprocal of `power_spectral_density_array`
+        data_over_power_spectral_density: array_like
+            The in-band strain divided by the in-band power spectral density
+        conjugate_data_over_power_spectral_density: array_like
+            The complex conjugate of `data_over_power_spectral_density`
+        duration_factor: float
+            The normalisation of the noise weighted inner product, 4 / duration
+        noise_log_likelihood: float
+            The log-likelihood of the data under the noise-only hypothesis,
+            -<data|data> / 2
+        """
+        strain_data = interferometer.strain_data
+        frequency_domain_strain = interferometer.frequency_domain_strain
+        indices = np.flatnonzero(interferometer.frequency_mask)
+        if len(indices) > 0 and indices[-1] - indices[0] + 1 == len(indices):
+            self.frequency_slice = slice(indices[0], indices[-1] + 1)
+        else:
+            self.frequency_slice = indices
+
+        self.frequency_array = np.ascontiguousarray(
+            interferometer.frequency_array[self.frequency_slice])
+        self.frequency_domain_strain = np.ascontiguousarray(
+            frequency_domain_strain[self.frequency_slice])
+        self.power_spectral_density_array = np.ascontiguousarray(
+            interferometer.power_spectral_density_array[self.frequency_slice])
+        self.inverse_power_spectral_density_array = \
+            1 / self.power_spectral_density_array
+        self.data_over_power_spectral_density = \
+            self.frequency_domain_strain * \
+            self.inverse_power_spectral_density_array
+        self.conjugate_data_over_power_spectral_density = \
+            self.data_over_power_spectral_density.conjugate()
+        self.duration_factor = 4 / strain_data.duration
+        self.noise_log_likelihood = -self.inner_product(
+            self.frequency_domain_strain).real / 2
+
+        self._dependencies = self._get_dependencies(interferometer)
+
+    @staticmethod
+    def _get_dependencies(interferometer):
+        """ The objects and values the data products are derived from
+
+        The objects are compared by identity, and the values by equality.
+        References to the objects are kept so that their identity can not be
+        reused by a new object.
+        """
+        strain_data = interferometer.strain_data
+        power_spectral_density = interferometer.power_spectral_density
+        objects = (strain_data, strain_data._frequency_domain_strain,
+                   strain_data.frequency_array, power_spectral_density,
+                   power_spectral_density.power_spectral_density_interpolated)
+        values = (strain_data.minimum_frequency, strain_data.maximum_frequency,
+                  strain_data.window_factor, strain_data.duration)
+        return objects, values
+
+    def is_valid_for(self, interferometer):
+        """ Check whether the data products are up to date
+
+        Parameters
+        ----------
+        interferometer: bilby.gw.detector.Interferometer
+            The interferometer to check against
+
+        Returns
+        -------
+        bool: True if nothing the data products depend on has changed
+        """
+        objects, values = self._get_dependencies(interferometer)
+        frozen_objects, frozen_values = self._dependencies
+        return (all(new is old for new, old in zip(objects, frozen_objects)) and
+                values == frozen_values)
+
+    def inner_product(self, signal):
+        """ The noise weighted inner product of the signal and the data
+
+        Parameters
+        ----------
+        signal: array_like
+            The signal in the analysis band, i.e.,
+            `signal[frozen_analysis_data.frequency_slice]`
+
+        Returns
+        -------
+        complex: The inner product <signal|data>
+        """
+        return self.duration_factor * np.vdot(
+            signal, self.data_over_power_spectral_density)
+
+    def optimal_snr_squared(self, signal):
+        """ The noise weighted inner product of the signal with itself
+
+        Parameters
+        ----------
+        signal: array_like
+            The signal in the analysis band, i.e.,
+            `signal[frozen_analysis_data.frequency_slice]`
+
+        Returns
+        -------
+        float: The optimal signal to noise ratio squared
+        """
+        return self.duration_factor * np.vdot(
+            signal, signal * self.inverse_power_spectral_density_array).real
+
+
 class TriangularInterferometer(InterferometerList):
 
     def __init__(self, name, power_spectral_density, minimum_frequency, maximum_frequency,
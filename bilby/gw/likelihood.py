@@ -1,22 +1,29 @@
 from __future__ import division
+
+import hashlib
+import os
+import shutil
+import tempfile
+from multiprocessing.pool import ThreadPool
+
 import numpy as np
-from scipy.interpolate import interp1d
 
 try:
     from scipy.special import logsumexp
 except ImportError:
     from scipy.misc import logsumexp
-from scipy.special import i0e
 
 from ..core import likelihood
-from ..core.utils import logger, UnsortedInterp2d
+from ..core import utils
+from ..core.utils import logger, LogSpacedInterp2d
 from ..core.prior import Prior, Uniform
+from .conversion import component_masses_to_chirp_mass
 from .detector import InterferometerList
 from .prior import BBHPriorDict
 from .source import lal_binary_black_hole
-from .utils import noise_weighted_inner_product, build_roq_weights, blockwise_dot_product
+from .utils import (build_roq_weights, build_time_shifted_roq_weights,
+                    get_available_memory, ln_i0)
 from .waveform_generator import WaveformGenerator
-from math import ceil
 
 
 class GravitationalWaveTransient(likelihood.Likelihood):
@@ -47,6 +54,16 @@ class GravitationalWaveTransient(likelihood.Likelihood):
         This is done analytically using a Bessel function.
     priors: dict, optional
         If given, used in the distance and phase marginalization.
+    distance_marginalization_lookup_table: (dict, str), optional
+        If a dict, dictionary containing the lookup_table, distance_array,
+        (distance) prior_array, and phase_marginalization flag, e.g., as
+        stored by `cache_lookup_table`. If a string, the name of a file
+        containing these quantities. If None (default), a file in the current
+        directory named from the distance grid and prior is used, see
+        `cached_lookup_table_filename`. The lookup table is
+        only read if it was built for the same distance grid, distance prior
+        and phase marginalization setting, otherwise it is rebuilt and written
+        to the file.
 
     Returns
     -------
@@ -57,7 +74,7 @@ class GravitationalWaveTransient(likelihood.Likelihood):
     """
 
     def __init__(self, interferometers, waveform_generator, time_marginalization=False, distance_marginalization=False,
-                 phase_marginalization=False, priors=None):
+                 phase_marginalization=False, priors=None, distance_marginalization_lookup_table=None):
 
         self.waveform_generator = waveform_generator
         likelihood.Likelihood.__init__(self, dict())
@@ -82,15 +99,14 @@ class GravitationalWaveTransient(likelihood.Likelihood):
 
         if self.phase_marginalization:
             self._check_prior_is_set(key='phase')
-            self._bessel_function_interped = None
-            self._setup_phase_marginalization()
             priors['phase'] = float(0)
 
         if self.distance_marginalization:
             self._check_prior_is_set(key='luminosity_distance')
             self._distance_array = np.linspace(self.priors['luminosity_distance'].minimum,
                                                self.priors['luminosity_distance'].maximum, int(1e4))
-            self._setup_distance_marginalization()
+            self._setup_distance_marginalization(
+                distance_marginalization_lookup_table)
             priors['luminosity_distance'] = float(self._ref_dist)
 
     def __repr__(self):
@@ -147,14 +163,21 @@ class GravitationalWaveTransient(likelihood.Likelihood):
             self.__prior = None
 
     def noise_log_likelihood(self):
+        """ Calculates the noise log-likelihood
+
+        This is constant for fixed data, it is computed once for each
+        interferometer and reused until the data or power spectral density
+        change, see `bilby.gw.detector.Interferometer.frozen_analysis_data`.
+
+        Returns
+        -------
+        float: The noise log likelihood
+
+        """
         log_l = 0
         for interferometer in self.interferometers:
-            log_l -= noise_weighted_inner_product(
-                interferometer.frequency_domain_strain,
-                interferometer.frequency_domain_strain,
-                interferometer.power_spectral_density_array,
-                self.waveform_generator.duration) / 2
-        return log_l.real
+            log_l += interferometer.frozen_analysis_data.noise_log_likelihood
+        return log_l
 
     def log_likelihood_ratio(self):
         waveform_polarizations =\
@@ -165,23 +188,16 @@ class GravitationalWaveTransient(likelihood.Likelihood):
 
         d_inner_h = 0
         optimal_snr_squared = 0
-        d_inner_h_squared_tc_array = np.zeros(
-            self.interferometers.frequency_array[0:-1].shape,
-            dtype=np.complex128)
-        for interferometer in self.interferometers:
-            signal_ifo = interferometer.get_detector_response(
-                waveform_polarizations, self.parameters)
-
-            d_inner_h += interferometer.inner_product(signal=signal_ifo)
-            optimal_snr_squared += interferometer.optimal_snr_squared(signal=signal_ifo)
-            if self.time_marginalization:
-                d_inner_h_squared_tc_array +=\
-                    4 / self.waveform_generator.duration * np.fft.fft(
-                        signal_ifo[0:-1] *
-                        interferometer.frequency_domain_strain.conjugate()[0:-1] /
-                        interferometer.power_spectral_density_array[0:-1])
+        signals = self.interferometers.get_detector_responses(
+            waveform_polarizations, self.parameters)
+        for interferometer, signal_ifo in zip(self.interferometers, signals):
+            analysis_data = interferometer.frozen_analysis_data
+            in_band_signal = signal_ifo[analysis_data.frequency_slice]
+            d_inner_h += analysis_data.inner_product(in_band_signal)
+            optimal_snr_squared += analysis_data.optimal_snr_squared(in_band_signal)
 
         if self.time_marginalization:
+            d_inner_h_squared_tc_array = self._time_shifted_d_inner_h(signals)
 
             if self.distance_marginalization:
                 rho_mf_ref_tc_array, rho_opt_ref = self._setup_rho(
@@ -193,24 +209,45 @@ class GravitationalWaveTransient(likelihood.Likelihood):
                     dist_marged_log_l_tc_array = self._interp_dist_margd_loglikelihood(
                         rho_mf_ref_tc_array.real, rho_opt_ref)
                 log_l = logsumexp(dist_marged_log_l_tc_array,
-                                  b=self.time_prior_array)
+                                  b=self._time_prior_weights)
             elif self.phase_marginalization:
-                log_l = logsumexp(self._bessel_function_interped(abs(
+                log_l = logsumexp(ln_i0(abs(
                     d_inner_h_squared_tc_array)),
-                    b=self.time_prior_array) - optimal_snr_squared / 2
+                    b=self._time_prior_weights) - optimal_snr_squared / 2
             else:
                 log_l = logsumexp(
                     d_inner_h_squared_tc_array.real,
-                    b=self.time_prior_array) - optimal_snr_squared / 2
+                    b=self._time_prior_weights) - optimal_snr_squared / 2
+
+            return log_l.real
 
-        elif self.distance_marginalization:
+        return self._marginalized_log_likelihood_ratio(
+            d_inner_h, optimal_snr_squared)
+
+    def _marginalized_log_likelihood_ratio(self, d_inner_h, optimal_snr_squared):
+        """ The log likelihood ratio, marginalized over distance and phase if
+        required, from the inner products of the signal with the data and
+        with itself summed over the interferometers
+
+        Parameters
+        ----------
+        d_inner_h: complex
+            The inner product of the signal and the data
+        optimal_snr_squared: float
+            The inner product of the signal with itself
+
+        Returns
+        -------
+        float: The log likelihood ratio
+        """
+        if self.distance_marginalization:
             rho_mf_ref, rho_opt_ref = self._setup_rho(d_inner_h, optimal_snr_squared)
             if self.phase_marginalization:
                 rho_mf_ref = abs(rho_mf_ref)
-            log_l = self._interp_dist_margd_loglikelihood(rho_mf_ref.real, rho_opt_ref)[0]
+            log_l = self._interp_dist_margd_loglikelihood(rho_mf_ref.real, rho_opt_ref)
 
         elif self.phase_marginalization:
-            d_inner_h = self._bessel_function_interped(abs(d_inner_h))
+            d_inner_h = ln_i0(abs(d_inner_h))
             log_l = d_inner_h - optimal_snr_squared / 2
 
         else:
@@ -249,41 +286,175 @@ class GravitationalWaveTransient(likelihood.Likelihood):
         if self.phase_marginalization:
             return np.logspace(-5, 10, self._dist_margd_loglikelihood_array.shape[1])
         else:
-            return np.hstack((-np.logspace(3, -3, self._dist_margd_loglikelihood_array.shape[1] / 2),
-                              np.logspace(-3, 10, self._dist_margd_loglikelihood_array.shape[1] / 2)))
-
-    def _setup_distance_marginalization(self):
-        self._create_lookup_table()
-        self._interp_dist_margd_loglikelihood = UnsortedInterp2d(
+            return np.hstack((-np.logspace(3, -3, self._dist_margd_loglikelihood_array.shape[1] // 2),
+                              np.logspace(-3, 10, self._dist_margd_loglikelihood_array.shape[1] // 2)))
+
+    def _setup_distance_marginalization(self, lookup_table=None):
+        self.distance_prior_array = np.array(
+            self.priors['luminosity_distance'].prob(self._distance_array))
+        self._lookup_table_filename = None
+        if isinstance(lookup_table, str) or lookup_table is None:
+            self._lookup_table_filename = lookup_table
+            lookup_table = self.load_lookup_table(
+                self.cached_lookup_table_filename)
+        if isinstance(lookup_table, dict) and \
+                self._test_cached_lookup_table(lookup_table)[0]:
+            self._dist_margd_loglikelihood_array = np.array(
+                lookup_table['lookup_table'])
+        else:
+            self._create_lookup_table()
+            self.cache_lookup_table()
+        self._interp_dist_margd_loglikelihood = LogSpacedInterp2d(
             self._rho_mf_ref_array, self._rho_opt_ref_array,
             self._dist_margd_loglikelihood_array)
 
-    def _create_lookup_table(self):
-        """ Make the lookup table """
-        self.distance_prior_array = np.array([self.priors['luminosity_distance'].prob(distance)
-                                              for distance in self._distance_array])
+    @property
+    def cached_lookup_table_filename(self):
+        """ The file the distance marginalization lookup table is cached in
+
+        If no filename was given, this is a hidden file in the current
+        working directory, named by the distance bounds, the phase
+        marginalization setting and a hash of the distance grid and prior,
+        so that likelihoods with different distance priors do not share it.
+        """
+        if self._lookup_table_filename is None:
+            sha = hashlib.sha1()
+            for array in [self._distance_array, self.distance_prior_array]:
+                sha.update(np.ascontiguousarray(array, dtype=float).view(
+                    np.uint8).ravel())
+            self._lookup_table_filename = os.path.abspath(
+                '.distance_marginalization_lookup_dmin{}_dmax{}_n{}{}_{}.npz'
+                .format(self._distance_array[0], self._distance_array[-1],
+                        len(self._distance_array),
+                        '_phase' if self.phase_marginalization else '',
+                        sha.hexdigest()[:10]))
+            logger.info('Using distance marginalization lookup table file '
+                        '{}'.format(self._lookup_table_filename))
+        return self._lookup_table_filename
+
+    def load_lookup_table(self, filename):
+        """ Read a cached distance marginalization lookup table
+
+        Parameters
+        ----------
+        filename: str
+            The file to read
+
+        Returns
+        -------
+        dict: The contents of the file, if it exists and was built for the
+            same distance grid, distance prior and phase marginalization
+            setting as this likelihood, otherwise None.
+        """
+        if not os.path.exists(filename):
+            logger.debug('Distance marginalization lookup table {} does not '
+                         'exist'.format(filename))
+            return None
+        try:
+            loaded_file = dict(np.load(filename))
+        except (IOError, ValueError) as e:
+            logger.info('Unable to read distance marginalization lookup table '
+                        '{}: {}'.format(filename, e))
+            return None
+        match, failure = self._test_cached_lookup_table(loaded_file)
+        if match:
+            logger.info('Loaded distance marginalization lookup table from '
+                        '{}.'.format(filename))
+            return loaded_file
+        else:
+            logger.info('Distance marginalization lookup table {} does not '
+                        'match for {}.'.format(filename, failure))
+            return None
+
+    def cache_lookup_table(self):
+        """ Write the distance marginalization lookup table to file
+
+        The table is written to a temporary file which is then moved into
+        place, so that parallel jobs never read a partially written table.
+        """
+        filename = self.cached_lookup_table_filename
+        temporary_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            with open(temporary_filename, 'wb') as f:
+                np.savez(f, distance_array=self._distance_array,
+                         prior_array=self.distance_prior_array,
+                         lookup_table=self._dist_margd_loglikelihood_array,
+                         reference_distance=self._ref_dist,
+                         phase_marginalization=self.phase_marginalization)
+            os.rename(temporary_filename, filename)
+            logger.info('Distance marginalization lookup table written to '
+                        '{}.'.format(filename))
+        except (IOError, OSError) as e:
+            logger.info('Unable to write distance marginalization lookup '
+                        'table to {}: {}'.format(filename, e))
+
+    def _test_cached_lookup_table(self, loaded_file):
+        """ Check a loaded lookup table was built for this likelihood
+
+        Returns
+        -------
+        match: bool
+            Whether the lookup table can be used
+        failure: str
+            The first key which does not match, None if they all match
+        """
+        pairs = dict(
+            distance_array=self._distance_array,
+            prior_array=self.distance_prior_array,
+            reference_distance=self._ref_dist,
+            phase_marginalization=self.phase_marginalization)
+        for key in pairs:
+            if key not in loaded_file:
+                return False, key
+            elif not np.array_equal(np.atleast_1d(loaded_file[key]),
+                                    np.atleast_1d(pairs[key])):
+                return False, key
+        if np.shape(loaded_file.get('lookup_table')) != (400, 800):
+            return False, 'lookup_table'
+        return True, None
+
+    def _create_lookup_table(self, max_elements=2 ** 24):
+        """ Make the lookup table
+
+        For each pair of reference optimal and matched filter snrs the
+        likelihood is marginalised over the distance grid. This is done for
+        blocks of rows of the table at a time, the number of elements
+        processed simultaneously is limited by `max_elements`.
+
+        Parameters
+        ----------
+        max_elements: int
+            The maximum number of elements in a single block of the
+            (rho_opt, rho_mf, distance) grid.
+        """
         logger.info('Building lookup table for distance marginalisation.')
 
         self._dist_margd_loglikelihood_array = np.zeros((400, 800))
-        for ii, rho_opt_ref in enumerate(self._rho_opt_ref_array):
-            for jj, rho_mf_ref in enumerate(self._rho_mf_ref_array):
-                optimal_snr_squared_array = rho_opt_ref * self._ref_dist ** 2. / self._distance_array ** 2
-                d_inner_h_array = rho_mf_ref * self._ref_dist / self._distance_array
-                if self.phase_marginalization:
-                    d_inner_h_array =\
-                        self._bessel_function_interped(abs(d_inner_h_array))
-                self._dist_margd_loglikelihood_array[ii][jj] = \
-                    logsumexp(d_inner_h_array - optimal_snr_squared_array / 2,
-                              b=self.distance_prior_array * self._delta_distance)
-        log_norm = logsumexp(0. / self._distance_array - 0. / self._distance_array ** 2.,
-                             b=self.distance_prior_array * self._delta_distance)
-        self._dist_margd_loglikelihood_array -= log_norm
+        support = self.distance_prior_array > 0
+        distance_ratio = self._ref_dist / self._distance_array[support]
+        log_weights = np.log(
+            self.distance_prior_array[support] * self._delta_distance)
 
-    def _setup_phase_marginalization(self):
-        self._bessel_function_interped = interp1d(
-            np.logspace(-5, 10, int(1e6)), np.logspace(-5, 10, int(1e6)) +
-            np.log([i0e(snr) for snr in np.logspace(-5, 10, int(1e6))]),
-            bounds_error=False, fill_value=(0, np.nan))
+        d_inner_h_array = np.outer(self._rho_mf_ref_array, distance_ratio)
+        if self.phase_marginalization:
+            d_inner_h_array = ln_i0(abs(d_inner_h_array))
+        d_inner_h_array += log_weights
+        half_distance_ratio_squared = distance_ratio ** 2 / 2
+
+        n_rows = max(1, max_elements // d_inner_h_array.size)
+        for start in range(0, len(self._rho_opt_ref_array), n_rows):
+            rho_opt_ref = self._rho_opt_ref_array[start:start + n_rows]
+            exponent = d_inner_h_array - np.multiply.outer(
+                rho_opt_ref, half_distance_ratio_squared)[:, np.newaxis, :]
+            maximum = np.max(exponent, axis=-1)
+            exponent -= maximum[..., np.newaxis]
+            np.exp(exponent, out=exponent)
+            self._dist_margd_loglikelihood_array[start:start + n_rows] = \
+                np.log(np.sum(exponent, axis=-1)) + maximum
+            del exponent
+
+        log_norm = logsumexp(log_weights)
+        self._dist_margd_loglikelihood_array -= log_norm
 
     def _setup_time_marginalization(self):
         delta_tc = 2 / self.waveform_generator.sampling_frequency
@@ -294,6 +465,44 @@ class GravitationalWaveTransient(likelihood.Likelihood):
                     self.waveform_generator.sampling_frequency + 1))[1:]
         self.time_prior_array =\
             self.priors['geocent_time'].prob(times) * delta_tc
+        support = np.flatnonzero(self.time_prior_array > 0)
+        if len(support) > 0 and support[-1] - support[0] + 1 == len(support):
+            self._time_prior_support = slice(support[0], support[-1] + 1)
+        else:
+            self._time_prior_support = support
+        self._time_prior_weights = self.time_prior_array[self._time_prior_support]
+        self._time_series_buffer = np.zeros(
+            len(self.interferometers.frequency_array), dtype=np.complex128)
+
+    def _time_shifted_d_inner_h(self, signals):
+        """ The inner product of the signal and the data, summed over the
+        interferometers, at each coalescence time with non-zero prior
+        probability
+
+        The products of the in-band signal with the conjugate data over the
+        power spectral density of each interferometer are added into a
+        preallocated buffer, so a single FFT gives the time series for the
+        whole network.
+
+        Parameters
+        ----------
+        signals: list
+            The signal in each interferometer on its full frequency array
+
+        Returns
+        -------
+        array_like: The complex inner products at the times selected by
+            `self._time_prior_support`
+        """
+        buffer = self._time_series_buffer
+        buffer.fill(0)
+        for interferometer, signal_ifo in zip(self.interferometers, signals):
+            analysis_data = interferometer.frozen_analysis_data
+            frequency_slice = analysis_data.frequency_slice
+            buffer[frequency_slice] += signal_ifo[frequency_slice] *\
+                analysis_data.conjugate_data_over_power_spectral_density
+        return 4 / self.waveform_generator.duration *\
+            np.fft.fft(buffer[0:-1])[self._time_prior_support]
 
 
 class BasicGravitationalWaveTransient(likelihood.Likelihood):
@@ -336,10 +545,8 @@ class BasicGravitationalWaveTransient(likelihood.Likelihood):
         """
         log_l = 0
         for interferometer in self.interferometers:
-            log_l -= 2. / self.waveform_generator.duration * np.sum(
-                abs(interferometer.frequency_domain_strain) ** 2 /
-                interferometer.power_spectral_density_array)
-        return log_l.real
+            log_l += interferometer.frozen_analysis_data.noise_log_likelihood
+        return log_l
 
     def log_likelihood(self):
         """ Calculates the real part of log-likelihood value
@@ -403,35 +610,202 @@ class ROQGravitationalWaveTransient(GravitationalWaveTransient):
         given some set of parameters
     linear_matrix: str, array
         Either a string point to the file from which to load the linear_matrix
-        array, or the array itself.
+        array, or the array itself. Not required if roq_bases is given.
     quadratic_matrix: str, array
         Either a string point to the file from which to load the quadratic_matrix
-        array, or the array itself.
+        array, or the array itself. Not required if roq_bases is given.
     priors: dict, bilby.prior.PriorDict
         A dictionary of priors containing at least the geocent_time prior
+    weights_block_size: int, optional
+        The number of linear basis elements for which the weights are
+        computed at once, with one FFT each. By default, as many as fit in a
+        quarter of the available memory, shared between the interferometers.
+    npool: int, optional
+        The number of interferometers for which the weights are computed in
+        parallel threads, by default all of them.
+    weights_cache_directory: str, optional
+        If given, the weights are read from, or else written to, a
+        subdirectory of this directory named by a hash of the data, power
+        spectral densities, geocent_time prior bounds and basis, see
+        `cached_weights_directory`. The cached weights are memory-mapped, so
+        that jobs on the same node share them.
+    mmap_mode: str, optional
+        If linear_matrix or quadratic_matrix are file names, the mode in
+        which they are memory-mapped by `numpy.load`, e.g., 'r'. By default
+        they are read into memory, unless roq_bases is given, when the
+        chosen basis is memory-mapped read-only.
+    roq_bases: list, optional
+        A list of directories containing ROQ bases, laid out as in
+        https://git.ligo.org/lscsoft/ROQ_data, i.e., with files B_linear.npy,
+        B_quadratic.npy, fnodes_linear.npy, fnodes_quadratic.npy and
+        params.dat, where params.dat has a header naming the columns flow,
+        fhigh, seglen, chirpmassmin and chirpmassmax. The basis used is
+        chosen by `select_roq_basis`, and only its files are read. Its
+        frequency nodes replace those in the waveform_arguments of the
+        waveform_generator, and the minimum and maximum frequency of the
+        interferometers are set to the frequency range of the basis.
 
     """
     def __init__(self, interferometers, waveform_generator,
-                 linear_matrix, quadratic_matrix, priors):
+                 linear_matrix=None, quadratic_matrix=None, priors=None,
+                 weights_block_size=None, npool=None,
+                 weights_cache_directory=None, mmap_mode=None,
+                 roq_bases=None):
         GravitationalWaveTransient.__init__(
             self, interferometers=interferometers,
             waveform_generator=waveform_generator, priors=priors)
+        self.weights_block_size = weights_block_size
+        self.npool = npool
+        self.weights_cache_directory = weights_cache_directory
+        self._basis_files = dict()
+
+        self.roq_basis = None
+        self.roq_params = None
+        self.roq_scale_factor = 1
+        if roq_bases is not None:
+            self.roq_basis, self.roq_params, self.roq_scale_factor = \
+                self.select_roq_basis(roq_bases)
+            self._set_roq_basis_frequencies()
+            if mmap_mode is None:
+                mmap_mode = 'r'
+            linear_matrix = os.path.join(self.roq_basis, 'B_linear.npy')
+            quadratic_matrix = os.path.join(self.roq_basis, 'B_quadratic.npy')
+        elif linear_matrix is None or quadratic_matrix is None:
+            raise ValueError(
+                'Either linear_matrix and quadratic_matrix or roq_bases must '
+                'be given.')
 
         if isinstance(linear_matrix, str):
             logger.info("Loading linear matrix from {}".format(linear_matrix))
-            linear_matrix = np.load(linear_matrix).T
+            self._basis_files['linear'] = linear_matrix
+            linear_matrix = np.load(linear_matrix, mmap_mode=mmap_mode).T
         if isinstance(quadratic_matrix, str):
             logger.info("Loading quadratic_matrix from {}".format(quadratic_matrix))
-            quadratic_matrix = np.load(quadratic_matrix).T
+            self._basis_files['quadratic'] = quadratic_matrix
+            quadratic_matrix = np.load(quadratic_matrix, mmap_mode=mmap_mode).T
 
         self.linear_matrix = linear_matrix
         self.quadratic_matrix = quadratic_matrix
         self.time_samples = None
         self.weights = dict()
-        self._set_weights()
+        if self.weights_cache_directory is None or \
+                not self.load_weights(self.cached_weights_directory):
+            self._set_weights()
+            if self.weights_cache_directory is not None:
+                self.cache_weights()
+        self._time_step = 1 / self.interferometers.sampling_frequency
         self.frequency_nodes_linear =\
             waveform_generator.waveform_arguments['frequency_nodes_linear']
 
+    def select_roq_basis(self, roq_bases):
+        """
+        Choose the ROQ basis which covers the chirp-mass prior
+
+        A basis with native segment duration seglen can be used for data
+        of duration seglen / scale_factor, with its frequencies multiplied
+        and its chirp-mass range divided by scale_factor, as the waveform
+        only depends on the product of the frequency and the mass. A basis
+        is valid for the prior if its rescaled chirp-mass range contains the
+        chirp-mass prior, its rescaled minimum frequency is no less than
+        the minimum frequency of the interferometers and its rescaled
+        maximum frequency is no more than the Nyquist frequency. Of the valid
+        bases, one which does not need rescaling is preferred, then the one
+        with the narrowest chirp-mass range.
+
+        Only the params.dat file of each basis is read.
+
+        Parameters
+        ----------
+        roq_bases: list
+            The directories containing the ROQ bases
+
+        Returns
+        -------
+        directory: str
+            The directory of the chosen basis
+        params: dict
+            The contents of the params.dat file of the basis, rescaled
+        scale_factor: float
+            The ratio of the native segment duration of the basis to the
+            duration of the data
+        """
+        chirp_mass_minimum, chirp_mass_maximum = \
+            self._prior_chirp_mass_range()
+        minimum_frequency = max(
+            ifo.minimum_frequency for ifo in self.interferometers)
+        nyquist_frequency = self.interferometers.sampling_frequency / 2
+
+        candidates = list()
+        for directory in roq_bases:
+            params = np.genfromtxt(
+                os.path.join(directory, 'params.dat'), names=True)
+            params = {key: float(params[key]) for key in params.dtype.names}
+            scale_factor = params['seglen'] / self.interferometers.duration
+            params['flow'] *= scale_factor
+            params['fhigh'] *= scale_factor
+            params['seglen'] /= scale_factor
+            params['chirpmassmin'] /= scale_factor
+            params['chirpmassmax'] /= scale_factor
+            if params['chirpmassmin'] <= chirp_mass_minimum and \
+                    chirp_mass_maximum <= params['chirpmassmax'] and \
+                    params['flow'] >= minimum_frequency and \
+                    params['fhigh'] <= nyquist_frequency:
+                candidates.append(
+                    ((scale_factor != 1,
+                      params['chirpmassmax'] - params['chirpmassmin']),
+                     directory, params, scale_factor))
+            else:
+                logger.debug(
+                    'ROQ basis {} rescaled by {} does not cover the prior'
+                    .format(directory, scale_factor))
+        if len(candidates) == 0:
+            raise ValueError(
+                'None of the ROQ bases {} cover chirp masses {} to {} for '
+                'data of duration {}s'.format(
+                    roq_bases, chirp_mass_minimum, chirp_mass_maximum,
+                    self.interferometers.duration))
+        _, directory, params, scale_factor = min(
+            candidates, key=lambda candidate: candidate[0])
+        logger.info('Using ROQ basis {} with scale factor {}'.format(
+            directory, scale_factor))
+        return directory, params, scale_factor
+
+    def _prior_chirp_mass_range(self):
+        """ The range of chirp masses allowed by the chirp_mass, or else the
+        mass_1 and mass_2, priors """
+        def bounds(key):
+            prior = self.priors[key]
+            return (getattr(prior, 'minimum', prior),
+                    getattr(prior, 'maximum', prior))
+
+        if 'chirp_mass' in self.priors:
+            return bounds('chirp_mass')
+        elif 'mass_1' in self.priors and 'mass_2' in self.priors:
+            return tuple(
+                component_masses_to_chirp_mass(mass_1, mass_2) for
+                mass_1, mass_2 in zip(bounds('mass_1'), bounds('mass_2')))
+        raise ValueError(
+            'A chirp_mass, or mass_1 and mass_2, prior is required to choose '
+            'an ROQ basis')
+
+    def _set_roq_basis_frequencies(self):
+        """ Set the frequency nodes of the waveform_generator and the
+        frequency range of the interferometers for the chosen basis """
+        for key in ['linear', 'quadratic']:
+            self.waveform_generator.waveform_arguments[
+                'frequency_nodes_' + key] = self.roq_scale_factor * np.load(
+                    os.path.join(self.roq_basis,
+                                 'fnodes_{}.npy'.format(key)))
+        for ifo in self.interferometers:
+            if ifo.minimum_frequency != self.roq_params['flow'] or \
+                    ifo.maximum_frequency != self.roq_params['fhigh']:
+                logger.info(
+                    'Setting the frequency range of {} to {} - {} Hz for the '
+                    'ROQ basis'.format(ifo.name, self.roq_params['flow'],
+                                       self.roq_params['fhigh']))
+            ifo.minimum_frequency = self.roq_params['flow']
+            ifo.maximum_frequency = self.roq_params['fhigh']
+
     def log_likelihood_ratio(self):
         optimal_snr_squared = 0.
         matched_filter_snr_squared = 0.
@@ -446,40 +820,37 @@ class ROQGravitationalWaveTransient(GravitationalWaveTransient):
         if waveform is None:
             return np.nan_to_num(-np.inf)
 
-        for ifo in self.interferometers:
-
-            f_plus = ifo.antenna_response(
-                self.parameters['ra'], self.parameters['dec'],
-                self.parameters['geocent_time'], self.parameters['psi'], 'plus')
-            f_cross = ifo.antenna_response(
+        responses, time_delays = \
+            self.interferometers.antenna_responses_and_time_delays(
                 self.parameters['ra'], self.parameters['dec'],
-                self.parameters['geocent_time'], self.parameters['psi'], 'cross')
+                self.parameters['geocent_time'], self.parameters['psi'],
+                modes=['plus', 'cross'])
 
-            dt = ifo.time_delay_from_geocenter(
-                self.parameters['ra'], self.parameters['dec'],
-                ifo.strain_data.start_time)
+        for ifo, (f_plus, f_cross), dt in zip(
+                self.interferometers, responses, time_delays):
             ifo_time = self.parameters['geocent_time'] + dt - \
                 ifo.strain_data.start_time
 
-            h_plus_linear = f_plus * waveform['linear']['plus']
-            h_cross_linear = f_cross * waveform['linear']['cross']
-            h_plus_quadratic = f_plus * waveform['quadratic']['plus']
-            h_cross_quadratic = f_cross * waveform['quadratic']['cross']
+            h_linear = f_plus * waveform['linear']['plus'] + \
+                f_cross * waveform['linear']['cross']
+            h_quadratic = f_plus * waveform['quadratic']['plus'] + \
+                f_cross * waveform['quadratic']['cross']
 
             indices, in_bounds = self._closest_time_indices(ifo_time)
             if not in_bounds:
                 return np.nan_to_num(-np.inf)
 
-            matched_filter_snr_squared_array = np.einsum(
-                'i,ji->j', np.conjugate(h_plus_linear + h_cross_linear),
-                self.weights[ifo.name + '_linear'][indices])
+            matched_filter_snr_squared_array = np.dot(
+                self.weights[ifo.name + '_linear'][indices],
+                np.conjugate(h_linear))
 
-            matched_filter_snr_squared += interp1d(
-                self.time_samples[indices],
-                matched_filter_snr_squared_array, kind='quadratic')(ifo_time)
+            matched_filter_snr_squared += self._interpolate_in_time(
+                matched_filter_snr_squared_array,
+                (ifo_time - self.time_samples[indices.start + 1]) /
+                self._time_step)
 
             optimal_snr_squared += \
-                np.vdot(np.abs(h_plus_quadratic + h_cross_quadratic)**2,
+                np.vdot(np.abs(h_quadratic)**2,
                         self.weights[ifo.name + '_quadratic'])
 
         log_l = matched_filter_snr_squared - optimal_snr_squared / 2
@@ -490,6 +861,9 @@ class ROQGravitationalWaveTransient(GravitationalWaveTransient):
         """
         Get the closest an two neighbouring times
 
+        The index of the closest time is computed directly, as the
+        time_samples are uniformly spaced.
+
         Parameters
         ----------
         time: float
@@ -497,76 +871,692 @@ class ROQGravitationalWaveTransient(GravitationalWaveTransient):
 
         Returns
         -------
-        indices: list
+        indices: slice
             Indices nearest to time.
         in_bounds: bool
             Whether the indices are for valid times.
         """
-        closest = np.argmin(np.absolute(self.time_samples - time))
-        indices = [closest + ii for ii in [-1, 0, 1]]
-        in_bounds = (indices[0] >= 0) & (indices[2] < self.time_samples.size)
+        closest = int(np.round(
+            (time - self.time_samples[0]) / self._time_step))
+        indices = slice(closest - 1, closest + 2)
+        in_bounds = (closest >= 1) & (closest + 1 < len(self.time_samples))
         return indices, in_bounds
 
+    @staticmethod
+    def _interpolate_in_time(values, offset):
+        """
+        Quadratic interpolation through three uniformly spaced values
+
+        Parameters
+        ----------
+        values: array_like
+            The values at the closest and two neighbouring times
+        offset: float
+            The time to interpolate to, relative to the closest time, in
+            units of the spacing of the times
+
+        Returns
+        -------
+        The value of the parabola through the three values at offset
+        """
+        return values[1] + offset * (
+            (values[2] - values[0]) / 2 +
+            offset * ((values[2] + values[0]) / 2 - values[1]))
+
     def _set_weights(self):
         """
         Setup the time-dependent ROQ weights.
         This follows FIXME: Smith et al.
 
         The times are chosen to allow all the merger times allows in the time
-        prior.
+        prior, on the sampling grid of the data. The linear weights are
+        computed with `bilby.gw.utils.build_time_shifted_roq_weights` by FFT,
+        in blocks of basis elements, and for the interferometers in parallel
+        threads.
         """
-        for ifo in self.interferometers:
-            # only get frequency components up to maximum_frequency
-            self.linear_matrix = \
-                self.linear_matrix[:, :sum(ifo.frequency_mask)]
-            self.quadratic_matrix = \
-                self.quadratic_matrix[:, :sum(ifo.frequency_mask)]
-
-            # array of relative time shifts to be applied to the data
-            # 0.045s comes from time for GW to traverse the Earth
-            self.time_samples = np.linspace(
-                self.priors['geocent_time'].minimum - 0.045,
-                self.priors['geocent_time'].maximum + 0.045,
-                int(ceil((self.priors['geocent_time'].maximum -
-                          self.priors['geocent_time'].minimum + 0.09) *
-                         ifo.strain_data.sampling_frequency)))
-            self.time_samples -= ifo.strain_data.start_time
-            time_space = self.time_samples[1] - self.time_samples[0]
-
-            # array to be filled with data, shifted by discrete time_samples
-            tc_shifted_data = np.zeros([
-                len(self.time_samples),
-                len(ifo.frequency_array[ifo.frequency_mask])], dtype=complex)
-
-            # shift data to beginning of the prior
-            # increment by the time step
-            shifted_data =\
-                ifo.frequency_domain_strain[ifo.frequency_mask] * \
-                np.exp(2j * np.pi * ifo.frequency_array[ifo.frequency_mask] *
-                       self.time_samples[0])
-            single_time_shift = np.exp(
-                2j * np.pi * ifo.frequency_array[ifo.frequency_mask] *
-                time_space)
-            for j in range(len(self.time_samples)):
-                tc_shifted_data[j] = shifted_data
-                shifted_data *= single_time_shift
-
-            # to not kill all computers this minimises the memory usage of the
-            # required inner products
-            max_block_gigabytes = 4
-            max_elements = int((max_block_gigabytes * 2 ** 30) / 8)
-
-            self.weights[ifo.name + '_linear'] = blockwise_dot_product(
-                tc_shifted_data /
-                ifo.power_spectral_density_array[ifo.frequency_mask],
-                self.linear_matrix, max_elements) * 4 / ifo.strain_data.duration
-
-            del tc_shifted_data
-
+        # only get frequency components up to maximum_frequency
+        number_of_frequencies = min(
+            sum(ifo.frequency_mask) for ifo in self.interferometers)
+        self.linear_matrix = self.linear_matrix[:, :number_of_frequencies]
+        self.quadratic_matrix = \
+            self.quadratic_matrix[:, :number_of_frequencies]
+
+        # array of relative time shifts to be applied to the data, on the
+        # sampling grid of the data
+        # 0.045s comes from time for GW to traverse the Earth
+        sampling_frequency = self.interferometers.sampling_frequency
+        number_of_time_samples = int(np.round(
+            self.interferometers.duration * sampling_frequency))
+        time_indices = np.arange(
+            int(np.floor((self.priors['geocent_time'].minimum - 0.045 -
+                          self.interferometers.start_time) *
+                         sampling_frequency)),
+            int(np.ceil((self.priors['geocent_time'].maximum + 0.045 -
+                         self.interferometers.start_time) *
+                        sampling_frequency)) + 1)
+        self.time_samples = time_indices / sampling_frequency
+
+        npool = self.npool or len(self.interferometers)
+        # the peak memory of all the threads is a quarter of that available
+        max_block_bytes = get_available_memory() // (4 * npool)
+
+        def set_interferometer_weights(ifo):
+            analysis_data = ifo.frozen_analysis_data
+            self.weights[ifo.name + '_linear'] = \
+                build_time_shifted_roq_weights(
+                    analysis_data.data_over_power_spectral_density,
+                    self.linear_matrix, np.flatnonzero(ifo.frequency_mask),
+                    time_indices, number_of_time_samples,
+                    1 / ifo.strain_data.duration,
+                    block_size=self.weights_block_size,
+                    max_block_bytes=max_block_bytes)
             self.weights[ifo.name + '_quadratic'] = build_roq_weights(
-                1 / ifo.power_spectral_density_array[ifo.frequency_mask],
+                analysis_data.inverse_power_spectral_density_array,
                 self.quadratic_matrix.real, 1 / ifo.strain_data.duration)
 
+        if npool > 1:
+            pool = ThreadPool(npool)
+            try:
+                pool.map(set_interferometer_weights, self.interferometers)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for ifo in self.interferometers:
+                set_interferometer_weights(ifo)
+
+    @property
+    def cached_weights_directory(self):
+        """ The directory in `weights_cache_directory` for these weights
+
+        The name is a hash of everything the weights depend on: the
+        frequency-domain data, power spectral densities and frequency masks
+        of the interferometers, the geocent_time prior bounds and the basis.
+        Bases read from file are identified by the path, size and
+        modification time of the file, rather than its contents.
+        """
+        sha = hashlib.sha1()
+
+        def update(value):
+            if isinstance(value, np.ndarray):
+                value = np.ascontiguousarray(value)
+                sha.update(str((value.dtype, value.shape)).encode())
+                sha.update(value.view(np.uint8).ravel())
+            else:
+                sha.update(repr(value).encode())
+
+        for ifo in self.interferometers:
+            analysis_data = ifo.frozen_analysis_data
+            update(ifo.name)
+            update(analysis_data.data_over_power_spectral_density)
+            update(analysis_data.inverse_power_spectral_density_array)
+            update(np.flatnonzero(ifo.frequency_mask))
+        update((self.interferometers.start_time,
+                self.interferometers.duration,
+                self.interferometers.sampling_frequency,
+                self.priors['geocent_time'].minimum,
+                self.priors['geocent_time'].maximum))
+        for key, matrix in [('linear', self.linear_matrix),
+                            ('quadratic', self.quadratic_matrix)]:
+            if key in self._basis_files:
+                filename = os.path.abspath(self._basis_files[key])
+                update((filename, os.path.getsize(filename),
+                        os.path.getmtime(filename)))
+            else:
+                update(matrix)
+        return os.path.join(self.weights_cache_directory,
+                            '.roq_weights_{}'.format(sha.hexdigest()))
+
+    def load_weights(self, directory):
+        """ Read cached ROQ weights, memory-mapped
+
+        Parameters
+        ----------
+        directory: str
+            The directory written by `cache_weights`
+
+        Returns
+        -------
+        bool: Whether the weights for all the interferometers were read.
+        """
+        if not os.path.isdir(directory):
+            logger.debug('ROQ weights {} do not exist'.format(directory))
+            return False
+        weights = dict()
+        try:
+            time_samples = np.load(os.path.join(directory, 'time_samples.npy'))
+            for ifo in self.interferometers:
+                for key in [ifo.name + '_linear', ifo.name + '_quadratic']:
+                    weights[key] = np.load(
+                        os.path.join(directory, key + '.npy'), mmap_mode='r')
+        except (IOError, ValueError) as e:
+            logger.info('Unable to read ROQ weights {}: {}'.format(
+                directory, e))
+            return False
+        logger.info('Loaded ROQ weights from {}.'.format(directory))
+        self.time_samples = time_samples
+        self.weights = weights
+        return True
+
+    def cache_weights(self):
+        """ Write the ROQ weights to `cached_weights_directory`
+
+        The weights are written to a temporary directory which is then moved
+        into place, so that parallel jobs never read partially written
+        weights.
+        """
+        directory = self.cached_weights_directory
+        temporary_directory = None
+        utils.check_directory_exists_and_if_not_mkdir(
+            self.weights_cache_directory)
+        try:
+            temporary_directory = tempfile.mkdtemp(
+                dir=self.weights_cache_directory, suffix='.tmp')
+            np.save(os.path.join(temporary_directory, 'time_samples.npy'),
+                    self.time_samples)
+            for key in self.weights:
+                np.save(os.path.join(temporary_directory, key + '.npy'),
+                        self.weights[key])
+            os.rename(temporary_directory, directory)
+            logger.info('ROQ weights written to {}.'.format(directory))
+        except (IOError, OSError) as e:
+            if os.path.isdir(directory):
+                logger.debug('ROQ weights {} already written'.format(
+                    directory))
+            else:
+                logger.info('Unable to write ROQ weights to {}: {}'.format(
+                    directory, e))
+            if temporary_directory is not None:
+                shutil.rmtree(temporary_directory, ignore_errors=True)
+
+
+class MBGravitationalWaveTransient(GravitationalWaveTransient):
+    """A multibanded gravitational-wave transient likelihood object
+
+    The waveform is evaluated on a non-uniform frequency grid which is
+    coarser where the signal is shorter, following Vinciguerra et al., (2017)
+    Class. Quantum Grav. 34, 115006 and Morisaki (2021) Phys. Rev. D 104,
+    044062. The frequencies are split into bands b = 0, 1, ..., above
+    frequencies F_b at which the signal, estimated from the chirp time of
+    `reference_chirp_mass`, lasts less than duration / 2 ** b before the
+    latest merger time allowed by the geocent_time prior. In band b the
+    waveform is only evaluated every 2 ** b frequency bins.
+
+    The inner product of the signal and the data is computed with weights
+    built from the Fourier transform of the data over the power spectral
+    density, which are exact for waveforms contained in the time window of
+    each band. The optimal SNR is computed by linear interpolation of the
+    squared amplitude of the signal between the frequencies of each band.
+
+    Note, the frequency_array of the waveform_generator is replaced by the
+    `banded_frequency_array` and the frequency_domain_source_model must
+    accept it, e.g., `bilby.gw.source.lal_binary_neutron_star`. The
+    waveform_generator should not be shared with other likelihoods or used
+    for injections.
+
+    Parameters
+    ----------
+    interferometers: list, bilby.gw.detector.InterferometerList
+        A list of `bilby.detector.Interferometer` instances - contains the
+        detector data and power spectral densities
+    waveform_generator: `bilby.waveform_generator.WaveformGenerator`
+        An object which computes the frequency-domain strain of the signal,
+        given some set of parameters
+    reference_chirp_mass: float
+        A lower bound on the detector frame chirp mass of the signals in
+        solar masses, e.g., the minimum of the chirp mass prior. The longest
+        signals, which set the bands, have this chirp mass.
+    priors: dict, bilby.prior.PriorDict
+        A dictionary of priors containing at least the geocent_time prior
+    distance_marginalization: bool, optional
+        If true, marginalize over distance in the likelihood.
+        This uses a look up table calculated at run time.
+    phase_marginalization: bool, optional
+        If true, marginalize over phase in the likelihood.
+        This is done analytically using a Bessel function.
+    distance_marginalization_lookup_table: (dict, str), optional
+        See `GravitationalWaveTransient`
+    accuracy_factor: float, optional
+        The margin, in units of the time resolution of the bands, added to
+        the signal duration when choosing the bands. Larger values are more
+        accurate and slower, the default is 5.
+    time_offset: float, optional
+        The duration in seconds after the latest merger time which is
+        included in the time window of each band, for the merger, ringdown
+        and the ringing from sharp features of the waveform in frequency.
+        The default is 2.
+
+    """
+    def __init__(self, interferometers, waveform_generator,
+                 reference_chirp_mass, priors, distance_marginalization=False,
+                 phase_marginalization=False,
+                 distance_marginalization_lookup_table=None,
+                 accuracy_factor=5, time_offset=2):
+        GravitationalWaveTransient.__init__(
+            self, interferometers=interferometers,
+            waveform_generator=waveform_generator, priors=priors,
+            distance_marginalization=distance_marginalization,
+            phase_marginalization=phase_marginalization,
+            distance_marginalization_lookup_table=distance_marginalization_lookup_table)
+        self._check_prior_is_set(key='geocent_time')
+        self.reference_chirp_mass = reference_chirp_mass
+        self.accuracy_factor = accuracy_factor
+        self.time_offset = time_offset
+        self.linear_weights = dict()
+        self.quadratic_weights = dict()
+        self._setup_frequency_bands()
+        self._set_weights()
+        self.waveform_generator.frequency_array = self.banded_frequency_array
+
+    def log_likelihood_ratio(self):
+        waveform_polarizations =\
+            self.waveform_generator.frequency_domain_strain(self.parameters)
+
+        if waveform_polarizations is None:
+            return np.nan_to_num(-np.inf)
+
+        d_inner_h = 0
+        optimal_snr_squared = 0
+        signals = self.interferometers.get_detector_responses(
+            waveform_polarizations, self.parameters,
+            frequencies=self.banded_frequency_array)
+        for interferometer, signal_ifo in zip(self.interferometers, signals):
+            d_inner_h += np.vdot(
+                signal_ifo, self.linear_weights[interferometer.name])
+            optimal_snr_squared += np.dot(
+                abs(signal_ifo) ** 2,
+                self.quadratic_weights[interferometer.name])
+
+        return self._marginalized_log_likelihood_ratio(
+            d_inner_h, optimal_snr_squared)
+
+    def _chirp_time(self, frequency):
+        """ The time for the signal of `reference_chirp_mass` to sweep from
+        frequency to merger, to first post-Newtonian order for equal masses,
+        which is the longest for a given chirp mass """
+        chirp_mass = self.reference_chirp_mass * utils.solar_mass * \
+            utils.gravitational_constant / utils.speed_of_light ** 3
+        total_mass = chirp_mass * 4 ** (3 / 5)
+        velocity_squared = (np.pi * total_mass * frequency) ** (2 / 3)
+        return 5 / 256 * (np.pi * frequency) ** (-8 / 3) * \
+            chirp_mass ** (-5 / 3) * (
+                1 + 4 / 3 * (743 / 336 + 11 / 16) * velocity_squared)
+
+    def _taper_width(self, frequency):
+        """ The width of the transition into a band starting at frequency,
+        1 / sqrt(|dtau / df|) for the Newtonian chirp time tau """
+        return (8 / 3 * self._chirp_time(frequency) / frequency) ** (-1 / 2)
+
+    def _setup_frequency_bands(self):
+        """ Choose the bands
+
+        Band b starts at the lowest frequency F_b for which the signal from
+        F_b - Delta_b, where the transition from band b - 1 starts, plus a
+        margin of accuracy_factor / Delta_b, fits into the time window of
+        duration / 2 ** b ending time_offset after the latest merger time.
+        """
+        duration = self.interferometers.duration
+        self.minimum_frequency = min(
+            interferometer.minimum_frequency
+            for interferometer in self.interferometers)
+        self.maximum_frequency = max(
+            interferometer.maximum_frequency
+            for interferometer in self.interferometers)
+        earth_crossing_time = utils.radius_of_earth / utils.speed_of_light
+        self.time_window_end = self.priors['geocent_time'].maximum + \
+            earth_crossing_time + self.time_offset - \
+            self.interferometers.start_time
+        time_window_margin = self.time_window_end - (
+            self.priors['geocent_time'].minimum - earth_crossing_time -
+            self.interferometers.start_time)
+        number_of_time_samples = int(np.round(
+            duration * self.interferometers.sampling_frequency))
+
+        band_frequencies = [self.minimum_frequency]
+        band_durations = [duration]
+        while number_of_time_samples % 2 ** len(band_frequencies) == 0:
+            band_duration = duration / 2 ** len(band_frequencies)
+            maximum_chirp_time = band_duration - time_window_margin
+
+            def fits_in_band(frequency):
+                taper_width = self._taper_width(frequency)
+                return (
+                    frequency - taper_width >= band_frequencies[-1] and
+                    self._chirp_time(frequency - taper_width) +
+                    self.accuracy_factor / taper_width <= maximum_chirp_time)
+
+            if maximum_chirp_time <= 0 or not fits_in_band(self.maximum_frequency):
+                break
+            lower, upper = band_frequencies[-1], self.maximum_frequency
+            while upper - lower > 1 / duration:
+                middle = (lower + upper) / 2
+                if fits_in_band(middle):
+                    upper = middle
+                else:
+                    lower = middle
+            band_frequencies.append(upper)
+            band_durations.append(band_duration)
+
+        taper_width = self.accuracy_factor / self.time_offset
+        highest_frequency = min(self.maximum_frequency + taper_width,
+                                self.interferometers.sampling_frequency / 2)
+        self.highest_band_taper = (
+            highest_frequency - taper_width, highest_frequency)
+        while band_frequencies[-1] > self.highest_band_taper[0]:
+            band_frequencies.pop()
+            band_durations.pop()
+
+        self.band_frequencies = np.array(band_frequencies)
+        self.band_durations = np.array(band_durations)
+        logger.info("Using {} frequency bands starting at {} Hz".format(
+            len(self.band_frequencies), self.band_frequencies))
+
+    def _band_window(self, band, frequencies):
+        """ The smooth window selecting a band, the windows of all the bands
+        sum to one between the minimum and maximum frequency
+
+        The highest band is tapered off over `highest_band_taper`, below the
+        Nyquist frequency, where the exact band 0 takes over, so none of the
+        coarse bands has a sharp edge.
+        """
+        number_of_bands = len(self.band_frequencies)
+        window = np.ones_like(frequencies)
+        if band > 0:
+            end = self.band_frequencies[band]
+            window *= self._rising_taper(
+                frequencies, end - self._taper_width(end), end)
+        if band < number_of_bands - 1:
+            end = self.band_frequencies[band + 1]
+            window *= 1 - self._rising_taper(
+                frequencies, end - self._taper_width(end), end)
+        elif band > 0:
+            window *= 1 - self._rising_taper(
+                frequencies, *self.highest_band_taper)
+        if band == 0 and number_of_bands > 1:
+            window += self._rising_taper(frequencies, *self.highest_band_taper)
+        return window
+
+    @staticmethod
+    def _rising_taper(frequencies, start, end):
+        phase = np.clip((frequencies - start) / (end - start), 0, 1)
+        return (1 - np.cos(np.pi * phase)) / 2
+
+    def _set_weights(self):
+        """ Set up the frequencies at which the waveform is evaluated and the
+        linear and quadratic weights of each interferometer.
+
+        For band b, with the waveform evaluated every L = 2 ** b frequency
+        bins, the time series of the windowed waveform g_b is periodic with
+        P = M / L samples, where M is the number of time samples. If g_b is
+        contained in the time window of P samples W_b, the inner product with
+        weights c_k = 4 / T conj(d_k) / S_k is
+
+            sum_k c_k g_b(f_k) = sum_m g_b(f_mL) ifft(C[W_b])_m
+
+        where C is the length M FFT of c restricted to the band and C[W_b]
+        its values at the samples in W_b, ordered by their index modulo P.
+        """
+        frequency_array = self.interferometers.frequency_array
+        number_of_frequencies = len(frequency_array)
+        number_of_time_samples = 2 * (number_of_frequencies - 1)
+        duration = self.interferometers.duration
+        window_end_index = int(np.ceil(
+            self.time_window_end / duration * number_of_time_samples))
+
+        band_masks = list()
+        band_indices = list()
+        for band in range(len(self.band_frequencies)):
+            step = 2 ** band
+            band_mask = (self._band_window(band, frequency_array) > 0) & \
+                (frequency_array >= self.minimum_frequency)
+            if band == 0:
+                band_mask &= frequency_array <= self.maximum_frequency
+            band_masks.append(band_mask)
+            band_indices.append(np.flatnonzero(band_mask[::step]) * step)
+        quadratic_nodes = list()
+        for interferometer in self.interferometers:
+            indices = np.flatnonzero(interferometer.frequency_mask)
+            bands = np.searchsorted(
+                self.band_frequencies, frequency_array[indices],
+                side='right') - 1
+            steps = 2 ** np.maximum(bands, 0)
+            lower = indices // steps * steps
+            upper = np.minimum(lower + steps, number_of_frequencies - 1)
+            quadratic_nodes.append((indices, lower, upper))
+
+        banded_indices = np.unique(np.concatenate(
+            band_indices + [np.concatenate(nodes[1:])
+                            for nodes in quadratic_nodes]))
+        self.banded_frequency_array = frequency_array[banded_indices]
+
+        for interferometer, (indices, lower, upper) in zip(
+                self.interferometers, quadratic_nodes):
+            analysis_data = interferometer.frozen_analysis_data
+            conjugate_weights = np.zeros(number_of_frequencies, dtype=complex)
+            conjugate_weights[analysis_data.frequency_slice] = \
+                analysis_data.duration_factor * \
+                analysis_data.conjugate_data_over_power_spectral_density
+            linear_weights = np.zeros(len(banded_indices), dtype=complex)
+            for band, indices_in_band in enumerate(band_indices):
+                step = 2 ** band
+                samples = number_of_time_samples // step
+                band_weights = np.zeros(number_of_time_samples, dtype=complex)
+                band_weights[:number_of_frequencies] = \
+                    conjugate_weights * band_masks[band]
+                time_domain_weights = np.fft.fft(band_weights)
+                window_start_index = window_end_index - samples
+                time_indices = window_start_index + np.mod(
+                    np.arange(samples) - window_start_index, samples)
+                coarse_weights = np.fft.ifft(time_domain_weights[
+                    np.mod(time_indices, number_of_time_samples)])
+                linear_weights[np.searchsorted(
+                    banded_indices, indices_in_band)] += \
+                    self._band_window(band, frequency_array[indices_in_band]) *\
+                    coarse_weights[indices_in_band // step]
+            self.linear_weights[interferometer.name] = np.conj(linear_weights)
+
+            noise_weights = analysis_data.duration_factor * \
+                analysis_data.inverse_power_spectral_density_array
+            spacing = np.maximum(upper - lower, 1)
+            fraction = (indices - lower) / spacing
+            quadratic_weights = np.zeros(len(banded_indices))
+            np.add.at(quadratic_weights, np.searchsorted(banded_indices, lower),
+                      noise_weights * (1 - fraction))
+            np.add.at(quadratic_weights, np.searchsorted(banded_indices, upper),
+                      noise_weights * fraction)
+            self.quadratic_weights[interferometer.name] = quadratic_weights
+
+
+class RelativeBinningGravitationalWaveTransient(GravitationalWaveTransient):
+    """A relative binning (heterodyned) likelihood object
+
+    This uses the method described in Zackay et al., (2018) arXiv:1806.08792.
+    The ratio of the waveform to a fiducial waveform, close to the signal,
+    varies slowly with frequency and is approximated as linear in a small
+    number of frequency bins. The inner products of the data and the
+    fiducial waveform in each bin, the summary data, are computed once, so
+    that each likelihood evaluation only needs the waveform at the bin
+    edges.
+
+    The bins are chosen so that the phase difference between waveforms of
+    the form sum_alpha c_alpha f ** gamma_alpha, for the post-Newtonian
+    powers gamma_alpha = -5/3, -2/3, 1, 5/3, 7/3 and coefficients which give
+    a phase difference of at most 2 pi / chi at the edges of the band,
+    changes by less than epsilon in each bin.
+
+    Note, the frequency_array of the waveform_generator is replaced by the
+    `bin_frequencies` and the frequency_domain_source_model must accept it,
+    e.g., `bilby.gw.source.lal_binary_neutron_star`. The waveform_generator
+    should not be shared with other likelihoods or used for injections.
+
+    Parameters
+    ----------
+    interferometers: list, bilby.gw.detector.InterferometerList
+        A list of `bilby.detector.Interferometer` instances - contains the
+        detector data and power spectral densities
+    waveform_generator: `bilby.waveform_generator.WaveformGenerator`
+        An object which computes the frequency-domain strain of the signal,
+        given some set of parameters
+    fiducial_parameters: dict
+        The parameters of the fiducial waveform, including the sky position,
+        time and polarisation, e.g., the maximum likelihood parameters. The
+        likelihood is only accurate for parameters close to these.
+    priors: dict, optional
+        If given, used in the distance and phase marginalization.
+    distance_marginalization: bool, optional
+        If true, marginalize over distance in the likelihood.
+        This uses a look up table calculated at run time.
+    phase_marginalization: bool, optional
+        If true, marginalize over phase in the likelihood.
+        This is done analytically using a Bessel function.
+    distance_marginalization_lookup_table: (dict, str), optional
+        See `GravitationalWaveTransient`
+    epsilon: float, optional
+        The maximum phase difference in each bin, default 0.025
+    chi: float, optional
+        The inverse of the phase difference between the waveforms over the
+        whole band, in units of 2 pi, default 1
+
+    """
+    def __init__(self, interferometers, waveform_generator,
+                 fiducial_parameters, priors=None,
+                 distance_marginalization=False, phase_marginalization=False,
+                 distance_marginalization_lookup_table=None, epsilon=0.025,
+                 chi=1):
+        GravitationalWaveTransient.__init__(
+            self, interferometers=interferometers,
+            waveform_generator=waveform_generator, priors=priors,
+            distance_marginalization=distance_marginalization,
+            phase_marginalization=phase_marginalization,
+            distance_marginalization_lookup_table=distance_marginalization_lookup_table)
+        self.fiducial_parameters = dict(fiducial_parameters)
+        self.epsilon = epsilon
+        self.chi = chi
+        self.summary_data = dict()
+        self._inverse_fiducial_responses = dict()
+        self._set_bins()
+        self._set_summary_data()
+
+    def log_likelihood_ratio(self):
+        waveform_polarizations =\
+            self.waveform_generator.frequency_domain_strain(self.parameters)
+
+        if waveform_polarizations is None:
+            return np.nan_to_num(-np.inf)
+
+        d_inner_h = 0
+        optimal_snr_squared = 0
+        signals = self.interferometers.get_detector_responses(
+            waveform_polarizations, self.parameters,
+            frequencies=self.bin_frequencies)
+        for interferometer, signal_ifo in zip(self.interferometers, signals):
+            ratio = signal_ifo * \
+                self._inverse_fiducial_responses[interferometer.name]
+            ratio_0 = (ratio[1:] + ratio[:-1]) / 2
+            ratio_1 = (ratio[1:] - ratio[:-1]) / self._bin_widths
+            a_0, a_1, b_0, b_1 = self.summary_data[interferometer.name]
+            d_inner_h += np.vdot(ratio_0, a_0) + np.vdot(ratio_1, a_1)
+            optimal_snr_squared += np.dot(b_0, abs(ratio_0) ** 2) + \
+                2 * np.dot(b_1, (ratio_0 * np.conj(ratio_1)).real)
+
+        return self._marginalized_log_likelihood_ratio(
+            d_inner_h, optimal_snr_squared)
+
+    def _maximum_phase_difference(self, frequencies):
+        """ The bound on the phase difference between waveforms, from the
+        lowest frequency, used to choose the bins """
+        minimum_frequency = frequencies[0]
+        maximum_frequency = frequencies[-1]
+        phase = np.zeros_like(frequencies)
+        for power in [-5 / 3, -2 / 3, 1, 5 / 3, 7 / 3]:
+            if power < 0:
+                phase -= (frequencies / minimum_frequency) ** power
+            else:
+                phase += (frequencies / maximum_frequency) ** power
+        return 2 * np.pi / self.chi * (phase - phase[0])
+
+    def _set_bins(self):
+        """ Choose the bin edges, at frequencies of the data, so that the
+        bound on the phase difference grows by at most epsilon per bin """
+        frequency_array = self.interferometers.frequency_array
+        minimum_frequency = min(
+            interferometer.minimum_frequency
+            for interferometer in self.interferometers)
+        maximum_frequency = max(
+            interferometer.maximum_frequency
+            for interferometer in self.interferometers)
+        indices = np.flatnonzero((frequency_array >= minimum_frequency) &
+                                 (frequency_array <= maximum_frequency))
+        phase = self._maximum_phase_difference(frequency_array[indices])
+        number_of_bins = int(np.ceil(phase[-1] / self.epsilon))
+        edges = np.searchsorted(
+            phase, np.linspace(0, phase[-1], number_of_bins + 1))
+        edges = np.unique(np.minimum(edges, len(indices) - 1))
+        self.bin_indices = indices[edges]
+        self.bin_frequencies = frequency_array[self.bin_indices]
+        self._bin_widths = np.diff(self.bin_frequencies)
+        self._bin_centres = (self.bin_frequencies[1:] +
+                             self.bin_frequencies[:-1]) / 2
+        logger.info("Using {} frequency bins for relative binning".format(
+            len(self._bin_widths)))
+
+    def _set_summary_data(self):
+        """ Compute the fiducial waveform and the summary data of each
+        interferometer: the inner products of the data and the fiducial
+        waveform, and of the fiducial waveform with itself, in each bin,
+        without (a_0, b_0) and with (a_1, b_1) a factor of the frequency
+        offset from the bin centre
+
+        The fiducial waveform at the bin edges is computed in the same way
+        as the waveforms in `log_likelihood_ratio`, after the frequency_array
+        of the waveform_generator is set to the `bin_frequencies`.
+        """
+        fiducial_polarizations = \
+            self.waveform_generator.frequency_domain_strain(
+                self.fiducial_parameters)
+        fiducial_responses = self.interferometers.get_detector_responses(
+            fiducial_polarizations, self.fiducial_parameters)
+        self.waveform_generator.frequency_array = self.bin_frequencies
+        fiducial_responses_at_edges = \
+            self.interferometers.get_detector_responses(
+                self.waveform_generator.frequency_domain_strain(
+                    self.fiducial_parameters),
+                self.fiducial_parameters, frequencies=self.bin_frequencies)
+        number_of_bins = len(self._bin_widths)
+        for interferometer, fiducial_response, fiducial_at_edges in zip(
+                self.interferometers, fiducial_responses,
+                fiducial_responses_at_edges):
+            analysis_data = interferometer.frozen_analysis_data
+            in_band_fiducial = fiducial_response[analysis_data.frequency_slice]
+            bins = np.clip(np.searchsorted(
+                self.bin_frequencies, analysis_data.frequency_array,
+                side='right') - 1, 0, number_of_bins - 1)
+            offsets = analysis_data.frequency_array - self._bin_centres[bins]
+
+            data_terms = analysis_data.duration_factor * \
+                analysis_data.data_over_power_spectral_density * \
+                np.conj(in_band_fiducial)
+            power_terms = analysis_data.duration_factor * \
+                abs(in_band_fiducial) ** 2 * \
+                analysis_data.inverse_power_spectral_density_array
+
+            def bin_sums(terms):
+                return np.bincount(
+                    bins, weights=terms.real, minlength=number_of_bins) + \
+                    1j * np.bincount(
+                        bins, weights=terms.imag, minlength=number_of_bins)
+
+            self.summary_data[interferometer.name] = (
+                bin_sums(data_terms), bin_sums(data_terms * offsets),
+                bin_sums(power_terms).real,
+                bin_sums(power_terms * offsets).real)
+
+            inverse_fiducial = np.zeros(len(fiducial_at_edges), dtype=complex)
+            nonzero = fiducial_at_edges != 0
+            inverse_fiducial[nonzero] = 1 / fiducial_at_edges[nonzero]
+            self._inverse_fiducial_responses[interferometer.name] = \
+                inverse_fiducial
+
 
 def get_binary_black_hole_likelihood(interferometers):
     """ A rapper to quickly set up a likelihood for BBH parameter estimation
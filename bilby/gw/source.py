@@ -7,6 +7,7 @@ from ..core.utils import logger
 from .utils import (lalsim_SimInspiralTransformPrecessingNewInitialConditions,
                     lalsim_GetApproximantFromString,
                     lalsim_SimInspiralChooseFDWaveform,
+                    lalsim_SimInspiralChooseFDWaveformSequence,
                     lalsim_SimInspiralWaveformParamsInsertTidalLambda1,
                     lalsim_SimInspiralWaveformParamsInsertTidalLambda2,
                     lalsim_SimIMRPhenomPCalculateModelParametersFromSourceFrame,
@@ -94,23 +95,12 @@ def lal_binary_black_hole(
 
     approximant = lalsim_GetApproximantFromString(waveform_approximant)
 
-    maximum_frequency = frequency_array[-1]
-    delta_frequency = frequency_array[1] - frequency_array[0]
-
-    hplus, hcross = lalsim_SimInspiralChooseFDWaveform(
-        mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
-        spin_2z, luminosity_distance, iota, phase,
-        longitude_ascending_nodes, eccentricity, mean_per_ano, delta_frequency,
-        minimum_frequency, maximum_frequency, reference_frequency,
-        waveform_dictionary, approximant)
-
-    h_plus = hplus.data.data
-    h_cross = hcross.data.data
-
-    h_plus = h_plus[:len(frequency_array)]
-    h_cross = h_cross[:len(frequency_array)]
-
-    return {'plus': h_plus, 'cross': h_cross}
+    return _lal_frequency_domain_waveform(
+        frequency_array, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x,
+        spin_2y, spin_2z, luminosity_distance, iota, phase,
+        longitude_ascending_nodes, eccentricity, mean_per_ano,
+        minimum_frequency, reference_frequency, waveform_dictionary,
+        approximant)
 
 
 def lal_eccentric_binary_black_hole_no_spins(
@@ -319,21 +309,79 @@ def lal_binary_neutron_star(
 
     approximant = lalsim_GetApproximantFromString(waveform_approximant)
 
-    maximum_frequency = frequency_array[-1]
-    delta_frequency = frequency_array[1] - frequency_array[0]
-
-    hplus, hcross = lalsim_SimInspiralChooseFDWaveform(
-        mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
-        spin_2z, luminosity_distance, iota, phase,
-        longitude_ascending_nodes, eccentricity, mean_per_ano, delta_frequency,
-        minimum_frequency, maximum_frequency, reference_frequency,
-        waveform_dictionary, approximant)
+    return _lal_frequency_domain_waveform(
+        frequency_array, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x,
+        spin_2y, spin_2z, luminosity_distance, iota, phase,
+        longitude_ascending_nodes, eccentricity, mean_per_ano,
+        minimum_frequency, reference_frequency, waveform_dictionary,
+        approximant)
+
+
+def _lal_frequency_domain_waveform(
+        frequency_array, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x,
+        spin_2y, spin_2z, luminosity_distance, iota, phase,
+        longitude_ascending_nodes, eccentricity, mean_per_ano,
+        minimum_frequency, reference_frequency, waveform_dictionary,
+        approximant):
+    """ Evaluate a lalsimulation frequency domain waveform
+
+    If the frequency_array starts at zero it is taken to be the evenly sampled
+    frequency array of the data and the waveform is generated with
+    `SimInspiralChooseFDWaveform`. Otherwise it is an arbitrary, e.g.,
+    non-uniform, sequence of frequencies and the waveform is evaluated at
+    exactly those frequencies with `SimInspiralChooseFDWaveformSequence`.
+    In both cases the waveform is zero below the minimum_frequency.
 
-    h_plus = hplus.data.data
-    h_cross = hcross.data.data
+    Parameters
+    ----------
+    frequency_array: array_like
+        The frequencies at which we want to calculate the strain
+    mass_1, mass_2: float
+        The component masses in kg
+    spin_1x, spin_1y, spin_1z, spin_2x, spin_2y, spin_2z: float
+        The dimensionless spin components
+    luminosity_distance: float
+        The luminosity distance in m
+    iota, phase, longitude_ascending_nodes, eccentricity, mean_per_ano: float
+        The orbital parameters
+    minimum_frequency, reference_frequency: float
+        The frequencies at which to start the waveform and at which the
+        parameters are defined
+    waveform_dictionary: lal.Dict, None
+        Additional waveform parameters, e.g., tidal deformabilities
+    approximant: int
+        The lalsimulation approximant number
 
-    h_plus = h_plus[:len(frequency_array)]
-    h_cross = h_cross[:len(frequency_array)]
+    Returns
+    -------
+    dict: A dictionary with the plus and cross polarisation strain modes
+    """
+    if frequency_array[0] == 0:
+        maximum_frequency = frequency_array[-1]
+        delta_frequency = frequency_array[1] - frequency_array[0]
+
+        hplus, hcross = lalsim_SimInspiralChooseFDWaveform(
+            mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
+            spin_2z, luminosity_distance, iota, phase,
+            longitude_ascending_nodes, eccentricity, mean_per_ano,
+            delta_frequency, minimum_frequency, maximum_frequency,
+            reference_frequency, waveform_dictionary, approximant)
+
+        h_plus = hplus.data.data[:len(frequency_array)]
+        h_cross = hcross.data.data[:len(frequency_array)]
+    else:
+        frequency_array = np.asarray(frequency_array, dtype=float)
+        h_plus = np.zeros(len(frequency_array), dtype=complex)
+        h_cross = np.zeros(len(frequency_array), dtype=complex)
+        in_band = frequency_array >= minimum_frequency
+        if np.any(in_band):
+            hplus, hcross = lalsim_SimInspiralChooseFDWaveformSequence(
+                phase, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x,
+                spin_2y, spin_2z, reference_frequency, luminosity_distance,
+                iota, waveform_dictionary, approximant,
+                frequency_array[in_band])
+            h_plus[in_band] = hplus.data.data
+            h_cross[in_band] = hcross.data.data
 
     return {'plus': h_plus, 'cross': h_cross}
 
@@ -381,6 +429,8 @@ def roq(frequency_array, mass_1, mass_2, luminosity_distance, a_1, tilt_1,
     Note: for the frequency_nodes_linear and frequency_nodes_quadratic arguments,
     if using data from https://git.ligo.org/lscsoft/ROQ_data, this should be
     loaded as `np.load(filename).T`.
+    If the `ROQGravitationalWaveTransient` is given roq_bases, it sets these
+    arguments to the, possibly rescaled, nodes of the basis it chooses.
 
     Returns
     -------
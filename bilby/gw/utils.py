@@ -3,6 +3,7 @@ import os
 import json
 
 import numpy as np
+from scipy.special import i0e
 
 from ..core.utils import (gps_time_to_gmst, ra_dec_to_theta_phi,
                           speed_of_light, logger, run_commandline,
@@ -15,6 +16,7 @@ except ImportError:
                    " not be able to use some of the prebuilt functions.")
 
 try:
+    import lal
     import lalsimulation as lalsim
 except ImportError:
     logger.warning("You do not have lalsuite installed currently. You will"
@@ -142,6 +144,101 @@ def get_polarization_tensor(ra, dec, time, psi, mode):
         return None
 
 
+def get_antenna_responses_and_time_delays(ra, dec, time, psi, detector_tensors,
+                                          vertices, modes=('plus', 'cross')):
+    """
+    Calculate the antenna response of a set of detectors to each polarization
+    mode and their time delays from the geocenter
+
+    The sky geometry, i.e., the sidereal time and the wave-frame vectors, is
+    computed once and shared between all detectors and modes, and the
+    responses are evaluated in closed form, e.g., F_plus = m.D.m - n.D.n and
+    F_cross = 2 m.D.n for the detector tensor D, rather than by contracting
+    the detector tensor with the polarization tensor of each mode.
+
+    See `get_polarization_tensor` for the definitions of the polarization
+    tensors and `time_delay_geocentric` for the time delay.
+
+    Parameters
+    -------
+    ra: float or array_like
+        right ascension in radians
+    dec: float or array_like
+        declination in radians
+    time: float or array_like
+        geocentric GPS time
+    psi: float or array_like
+        binary polarisation angle counter-clockwise about the direction of propagation
+    detector_tensors: array_like
+        The detector tensors, shape (n_detectors, 3, 3)
+    vertices: array_like
+        The positions of the detector vertices in geocentric coordinates in
+        meters, shape (n_detectors, 3)
+    modes: list
+        The polarisation modes, e.g., ['plus', 'cross']
+
+    Returns
+    -------
+    responses: array_like
+        The antenna responses, shape (n_detectors, n_modes) + the broadcast
+        shape of ra, dec, time and psi
+    time_delays: array_like
+        The time delays from the geocenter in seconds, shape (n_detectors,)
+        + the broadcast shape of ra, dec, time and psi
+
+    """
+    ra, dec, time, psi = np.broadcast_arrays(ra, dec, time, psi)
+    theta, phi = ra_dec_to_theta_phi(ra, dec, gps_time_to_gmst(time))
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+    cos_phi = np.cos(phi)
+    sin_phi = np.sin(phi)
+    cos_psi = np.cos(psi)
+    sin_psi = np.sin(psi)
+
+    u = np.array([cos_phi * cos_theta, cos_theta * sin_phi, -sin_theta])
+    v = np.array([-sin_phi, cos_phi, np.zeros(sin_phi.shape)])
+    m = -u * sin_psi - v * cos_psi
+    n = -u * cos_psi + v * sin_psi
+
+    detector_tensors = np.asarray(detector_tensors)
+    d_m = np.einsum('dij,j...->di...', detector_tensors, m)
+    d_n = np.einsum('dij,j...->di...', detector_tensors, n)
+    m_d_m = np.einsum('i...,di...->d...', m, d_m)
+    n_d_n = np.einsum('i...,di...->d...', n, d_n)
+    m_d_n = np.einsum('i...,di...->d...', m, d_n)
+
+    responses = np.empty((len(detector_tensors), len(modes)) + theta.shape)
+    for ii, mode in enumerate(modes):
+        mode = mode.lower()
+        if mode == 'plus':
+            responses[:, ii] = m_d_m - n_d_n
+        elif mode == 'cross':
+            responses[:, ii] = 2 * m_d_n
+        elif mode == 'breathing':
+            responses[:, ii] = m_d_m + n_d_n
+        elif mode in ['longitudinal', 'x', 'y']:
+            omega = np.cross(m, n, axis=0)
+            d_omega = np.einsum('dij,j...->di...', detector_tensors, omega)
+            if mode == 'longitudinal':
+                responses[:, ii] = np.sqrt(2) * np.einsum(
+                    'i...,di...->d...', omega, d_omega)
+            elif mode == 'x':
+                responses[:, ii] = 2 * np.einsum(
+                    'i...,di...->d...', m, d_omega)
+            else:
+                responses[:, ii] = 2 * np.einsum(
+                    'i...,di...->d...', n, d_omega)
+        else:
+            raise ValueError("{} not a polarization mode!".format(mode))
+
+    propagation = np.array(
+        [sin_theta * cos_phi, sin_theta * sin_phi, cos_theta])
+    time_delays = -np.einsum(
+        'di,i...->d...', np.asarray(vertices), propagation) / speed_of_light
+    return responses, time_delays
+
+
 def get_vertex_position_geocentric(latitude, longitude, elevation):
     """
     Calculate the position of the IFO vertex in geocentric coordinates in meters.
@@ -274,6 +371,50 @@ def optimal_snr_squared(signal, power_spectral_density, duration):
     return noise_weighted_inner_product(signal, signal, power_spectral_density, duration)
 
 
+def ln_i0(value):
+    """
+    A numerically stable method to evaluate ln(I_0), a modified Bessel
+    function of order 0, used in the phase-marginalized likelihood.
+
+    For moderate arguments this uses the exponentially scaled Bessel function,
+    ln(I_0(x)) = x + ln(i0e(x)), for large arguments the leading terms of the
+    asymptotic expansion are used.
+
+    Parameters
+    ----------
+    value: array_like
+        Value(s) of the argument, I_0 is even so the sign is ignored.
+
+    Returns
+    -------
+    array_like: The natural logarithm of the Bessel function
+    """
+    value = np.abs(np.asarray(value, dtype=float))
+    if value.ndim == 0:
+        if value < _LN_I0_ASYMPTOTIC_THRESHOLD:
+            return value + np.log(i0e(value))
+        return _ln_i0_asymptotic(value)
+    large = value >= _LN_I0_ASYMPTOTIC_THRESHOLD
+    if not np.any(large):
+        return value + np.log(i0e(value))
+    out = np.empty_like(value)
+    small = ~large
+    out[small] = value[small] + np.log(i0e(value[small]))
+    out[large] = _ln_i0_asymptotic(value[large])
+    return out
+
+
+_LN_I0_ASYMPTOTIC_THRESHOLD = 1e3
+
+
+def _ln_i0_asymptotic(value):
+    """ The asymptotic expansion of ln(I_0) to order 1 / value^3, accurate to
+    better than 1e-12 above the threshold used in `ln_i0` """
+    inverse = 1 / value
+    return (value - np.log(2 * np.pi * value) / 2 +
+            np.log1p(inverse * (1 / 8 + inverse * (9 / 128 + inverse * 225 / 3072))))
+
+
 def get_event_time(event):
     """
     Get the merger time for known GW events.
@@ -586,8 +727,22 @@ def save_to_fits(posterior, outdir, label):
     hdulist.writeto(fname, overwrite=True)
 
 
-def plot_skymap(result, center='120d -40d', nside=512):
-    """ Generate a sky map from a result """
+def plot_skymap(result, center='120d -40d', nside=512, interferometers=None):
+    """ Generate a sky map from a result
+
+    Parameters
+    ----------
+    result: bilby.core.result.Result
+        The result containing the posterior samples of ra and dec
+    center: str
+        The center of the projection
+    nside: int
+        The HEALPix resolution parameter
+    interferometers: bilby.gw.detector.InterferometerList, optional
+        If given, the network antenna-pattern sensitivity,
+        sqrt(sum_ifo F_plus^2 + F_cross^2), at the median geocentric time of
+        the posterior is overlaid on the sky map as contours
+    """
     import scipy
     from astropy.units import deg
     import healpy as hp
@@ -626,6 +781,17 @@ def plot_skymap(result, center='120d -40d', nside=512):
     logger.debug('Plotting sky map')
     ax.imshow_hpx(post)
 
+    if interferometers is not None:
+        logger.debug('Computing the network antenna-pattern sensitivity')
+        if 'geocent_time' in result.posterior:
+            geocent_time = np.median(result.posterior['geocent_time'])
+        else:
+            geocent_time = interferometers.start_time + interferometers.duration / 2
+        responses, _ = interferometers.antenna_response_grid(
+            ra, dec, geocent_time, modes=['plus', 'cross'])
+        sensitivity = np.sum(responses ** 2, axis=(0, 1)) ** 0.5
+        ax.contour_hpx(sensitivity, colors='k', linewidths=0.5)
+
     lon.set_ticks_visible(False)
     lat.set_ticks_visible(False)
 
@@ -646,6 +812,76 @@ def build_roq_weights(data, basis, deltaF):
     return weights
 
 
+def build_time_shifted_roq_weights(data, basis, frequency_indices,
+                                   time_indices, number_of_time_samples,
+                                   deltaF, block_size=None,
+                                   max_block_bytes=None, out=None):
+    """
+    for a data array and reduced basis compute the roq weights of the data
+    shifted by each of a set of times on the sampling grid, i.e.,
+
+        build_roq_weights(data * exp(2j pi frequencies times[i]), basis, deltaF)
+
+    with frequencies = frequency_indices * deltaF and
+    times = time_indices / (number_of_time_samples * deltaF).
+
+    For each basis element the weights at all the times are given by a
+    single inverse FFT. The basis elements are processed in blocks, so the
+    time shifted data are never stored.
+
+    data: data set, divided by the power spectral density
+    basis: (number of frequencies, number of basis elements) reduced basis
+    frequency_indices: indices of the frequencies of the data in the full
+        frequency array
+    time_indices: indices of the time shifts on the sampling grid
+    number_of_time_samples: number of time samples of the data
+    deltaF: integration element df
+    block_size: number of basis elements in each block, by default as many
+        as fit in max_block_bytes. The peak memory used is about three
+        (block_size, number_of_time_samples) complex arrays: the block, the
+        temporary product with the data and the output of the inverse FFT.
+    max_block_bytes: peak memory used for each block, by default a quarter
+        of the available memory, see `get_available_memory`
+    out: output array, (number of times, number of basis elements)
+
+    """
+    number_of_basis_elements = basis.shape[1]
+    if block_size is None:
+        if max_block_bytes is None:
+            max_block_bytes = get_available_memory() // 4
+        block_size = max_block_bytes // (3 * 16 * number_of_time_samples)
+    block_size = int(max(1, min(block_size, number_of_basis_elements)))
+
+    if out is None:
+        out = np.empty((len(time_indices), number_of_basis_elements),
+                       dtype=complex)
+    elif out.shape != (len(time_indices), number_of_basis_elements):
+        raise ValueError('Output array has incorrect dimensions.')
+
+    time_indices = np.mod(time_indices, number_of_time_samples)
+    weighted_data = 4 * deltaF * number_of_time_samples * np.asarray(data)
+    block = np.zeros((block_size, number_of_time_samples), dtype=complex)
+    for start in range(0, number_of_basis_elements, block_size):
+        stop = min(start + block_size, number_of_basis_elements)
+        block_view = block[:stop - start]
+        block_view[:, frequency_indices] = \
+            (weighted_data[:, np.newaxis] *
+             np.conjugate(basis[:, start:stop])).T
+        out[:, start:stop] = np.fft.ifft(block_view)[:, time_indices].T
+    return out
+
+
+def get_available_memory():
+    """
+    The available physical memory in bytes, or 1 GB if it can not be
+    determined
+    """
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return 2 ** 30
+
+
 def blockwise_dot_product(matrix_a, matrix_b, max_elements=int(2 ** 27),
                           out=None):
     """
@@ -770,6 +1006,31 @@ def lalsim_SimInspiralChooseFDWaveform(
         waveform_dictionary, approximant)
 
 
+def lalsim_SimInspiralChooseFDWaveformSequence(
+        phase, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
+        spin_2z, reference_frequency, luminosity_distance, iota,
+        waveform_dictionary, approximant, frequency_array):
+
+    # Convert values to floats
+    [phase, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
+     spin_2z, reference_frequency, luminosity_distance, iota] = \
+        convert_args_list_to_float(
+            phase, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
+            spin_2z, reference_frequency, luminosity_distance, iota)
+
+    # Note, this is the approximant number returns by GetApproximantFromString
+    if isinstance(approximant, int) is False:
+        raise ValueError("approximant not an int")
+
+    frequencies = lal.CreateREAL8Sequence(len(frequency_array))
+    frequencies.data = frequency_array
+
+    return lalsim.SimInspiralChooseFDWaveformSequence(
+        phase, mass_1, mass_2, spin_1x, spin_1y, spin_1z, spin_2x, spin_2y,
+        spin_2z, reference_frequency, luminosity_distance, iota,
+        waveform_dictionary, approximant, frequencies)
+
+
 def lalsim_SimIMRPhenomPCalculateModelParametersFromSourceFrame(
         mass_1, mass_2, reference_frequency, phase, iota, spin_1x,
         spin_1y, spin_1z, spin_2x, spin_2y, spin_2z, version):
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import numpy as np
 
 from ..core import utils
@@ -9,7 +11,8 @@ class WaveformGenerator(object):
     def __init__(self, duration=None, sampling_frequency=None, start_time=0, frequency_domain_source_model=None,
                  time_domain_source_model=None, parameters=None,
                  parameter_conversion=None,
-                 waveform_arguments=None):
+                 waveform_arguments=None, waveform_cache_size=0,
+                 extrinsic_parameters=None):
         """ A waveform generator
 
     Parameters
@@ -41,8 +44,37 @@ class WaveformGenerator(object):
         Note: the arguments of frequency_domain_source_model (except the first,
         which is the frequencies at which to compute the strain) will be added to
         the WaveformGenerator object and initialised to `None`.
+    waveform_cache_size: int, optional
+        The maximum number of frequency domain waveforms to keep in a least
+        recently used cache, keyed on the parameters of the source model
+        (after `parameter_conversion`), excluding `extrinsic_parameters`.
+        Parameters which are not arguments of the source model, e.g., the sky
+        position and time, never cause the waveform to be recomputed.
+        The default, 0, disables the cache. The cache should be cleared
+        with `clear_waveform_cache` if `waveform_arguments` are modified.
+    extrinsic_parameters: list, optional
+        Source model parameters for which a cached waveform is rescaled
+        analytically rather than recomputed, any of `luminosity_distance`,
+        the waveform is proportional to 1 / luminosity_distance, and
+        `phase`, the waveform is proportional to exp(2i phase), which is
+        exact for waveforms which only contain the (2, 2) mode, e.g.,
+        `IMRPhenomD`.
 
         """
+        self.waveform_cache_size = waveform_cache_size
+        if extrinsic_parameters is None:
+            extrinsic_parameters = list()
+        for key in extrinsic_parameters:
+            if key not in self._extrinsic_parameter_scalings:
+                raise ValueError(
+                    'Unable to rescale waveforms analytically in {}, supported '
+                    'extrinsic parameters are {}'.format(
+                        key, sorted(self._extrinsic_parameter_scalings)))
+        self.extrinsic_parameters = list(extrinsic_parameters)
+        self._parameter_conversion_plan = None
+        self.waveform_cache_hits = 0
+        self.waveform_cache_misses = 0
+        self._waveform_cache = OrderedDict()
         self._times_and_frequencies = CoupledTimeAndFrequencySeries(duration=duration,
                                                                     sampling_frequency=sampling_frequency,
                                                                     start_time=start_time)
@@ -52,6 +84,8 @@ class WaveformGenerator(object):
         self.frequency_domain_source_model = frequency_domain_source_model
         self.time_domain_source_model = time_domain_source_model
         self.source_parameter_keys = self.__parameters_from_source_model()
+        self._waveform_cache_keys = sorted(
+            self.source_parameter_keys.difference(self.extrinsic_parameters))
         if parameter_conversion is None:
             self.parameter_conversion = lambda params: (params, [])
         else:
@@ -106,6 +140,11 @@ class WaveformGenerator(object):
         RuntimeError: If no source model is given
 
         """
+        if self.waveform_cache_size > 0:
+            return self._cached_frequency_domain_strain(parameters)
+        return self._frequency_domain_strain(parameters)
+
+    def _frequency_domain_strain(self, parameters=None):
         return self._calculate_strain(model=self.frequency_domain_source_model,
                                       model_data_points=self.frequency_array,
                                       parameters=parameters,
@@ -113,6 +152,44 @@ class WaveformGenerator(object):
                                       transformed_model=self.time_domain_source_model,
                                       transformed_model_data_points=self.time_array)
 
+    _extrinsic_parameter_scalings = dict(
+        luminosity_distance=lambda cached, new: cached / new,
+        phase=lambda cached, new: np.exp(2j * (new - cached)))
+
+    def _cached_frequency_domain_strain(self, parameters):
+        if parameters is not None:
+            self.parameters = parameters
+        try:
+            key = tuple(self.parameters.get(name) for name in self._waveform_cache_keys)
+            hash(key)
+        except TypeError:
+            self.waveform_cache_misses += 1
+            return self._frequency_domain_strain()
+        if key in self._waveform_cache:
+            self.waveform_cache_hits += 1
+            strain, cached_extrinsic = self._waveform_cache.pop(key)
+            self._waveform_cache[key] = strain, cached_extrinsic
+        else:
+            self.waveform_cache_misses += 1
+            strain = self._frequency_domain_strain()
+            cached_extrinsic = {name: self.parameters[name] for name in self.extrinsic_parameters}
+            self._waveform_cache[key] = strain, cached_extrinsic
+            while len(self._waveform_cache) > self.waveform_cache_size:
+                self._waveform_cache.popitem(last=False)
+        if strain is None:
+            return None
+        scaling = 1
+        for name in self.extrinsic_parameters:
+            scaling = scaling * self._extrinsic_parameter_scalings[name](
+                cached_extrinsic[name], self.parameters[name])
+        if isinstance(strain, dict):
+            return {mode: strain[mode] * scaling for mode in strain}
+        return strain * scaling
+
+    def clear_waveform_cache(self):
+        """ Remove all the waveforms from the waveform cache """
+        self._waveform_cache.clear()
+
     def time_domain_strain(self, parameters=None):
         """ Wrapper to source_model.
 
@@ -134,8 +211,18 @@ class WaveformGenerator(object):
         Raises
         -------
         RuntimeError: If no source model is given
+        ValueError: If the frequency_domain_source_model would be transformed,
+            but the frequency_array is not the evenly sampled array starting
+            at zero, e.g., after a non-uniform frequency_array was set
 
         """
+        if self.time_domain_source_model is None and (
+                not self._times_and_frequencies.frequency_array_is_uniform or
+                self.frequency_array[0] != 0):
+            raise ValueError(
+                "Can not compute the time domain strain by inverse FFT of "
+                "the frequency domain strain on a frequency_array which is "
+                "not evenly sampled from zero")
         return self._calculate_strain(model=self.time_domain_source_model,
                                       model_data_points=self.time_array,
                                       parameters=parameters,
@@ -201,11 +288,17 @@ class WaveformGenerator(object):
         """
         if not isinstance(parameters, dict):
             raise TypeError('"parameters" must be a dictionary.')
-        new_parameters = parameters.copy()
-        new_parameters, _ = self.parameter_conversion(new_parameters)
-        for key in self.source_parameter_keys.symmetric_difference(
-                new_parameters):
-            new_parameters.pop(key)
+        plan = self._parameter_conversion_plan
+        if plan is not None and plan.applies_to(self, parameters):
+            new_parameters = plan.convert(self, parameters)
+        else:
+            new_parameters = parameters.copy()
+            new_parameters, _ = self.parameter_conversion(new_parameters)
+            for key in self.source_parameter_keys.symmetric_difference(
+                    new_parameters):
+                new_parameters.pop(key)
+            self._parameter_conversion_plan = _ParameterConversionPlan(
+                self, parameters, new_parameters)
         self.__parameters = new_parameters
         self.__parameters.update(self.waveform_arguments)
 
@@ -230,6 +323,12 @@ class WaveformGenerator(object):
     def frequency_array(self):
         """ Frequency array for the waveforms. Automatically updates if sampling_frequency or duration are updated.
 
+        A non-uniform array, e.g., the frequencies of
+        `bilby.gw.likelihood.MBGravitationalWaveTransient`, is passed to the
+        frequency_domain_source_model as given and leaves the duration and
+        sampling_frequency unchanged. The time_domain_strain can then not be
+        computed from the frequency_domain_source_model.
+
         Returns
         -------
         array_like: The frequency array
@@ -239,6 +338,7 @@ class WaveformGenerator(object):
     @frequency_array.setter
     def frequency_array(self, frequency_array):
         self._times_and_frequencies.frequency_array = frequency_array
+        self.clear_waveform_cache()
 
     @property
     def time_array(self):
@@ -253,6 +353,7 @@ class WaveformGenerator(object):
     @time_array.setter
     def time_array(self, time_array):
         self._times_and_frequencies.time_array = time_array
+        self.clear_waveform_cache()
 
     @property
     def duration(self):
@@ -268,6 +369,7 @@ class WaveformGenerator(object):
     @duration.setter
     def duration(self, duration):
         self._times_and_frequencies.duration = duration
+        self.clear_waveform_cache()
 
     @property
     def sampling_frequency(self):
@@ -283,6 +385,7 @@ class WaveformGenerator(object):
     @sampling_frequency.setter
     def sampling_frequency(self, sampling_frequency):
         self._times_and_frequencies.sampling_frequency = sampling_frequency
+        self.clear_waveform_cache()
 
     @property
     def start_time(self):
@@ -291,3 +394,46 @@ class WaveformGenerator(object):
     @start_time.setter
     def start_time(self, start_time):
         self._times_and_frequencies.start_time = start_time
+        self.clear_waveform_cache()
+
+
+class _ParameterConversionPlan(object):
+
+    def __init__(self, waveform_generator, parameters, converted_parameters):
+        """ The result of setting the parameters of a waveform generator
+        for a set of parameter names
+
+        The conversion functions choose which parameters to compute based on
+        the names of the parameters they are given, so, for the same names,
+        the same source model parameters are produced. The plan records these
+        names so that later calls skip the copying and set operations of the
+        generic path. If the conversion returned every source model parameter
+        unchanged, i.e., all of them were given directly, the conversion
+        function is not called at all.
+
+        Parameters
+        ----------
+        waveform_generator: WaveformGenerator
+            The waveform generator the plan is for
+        parameters: dict
+            The parameters passed to the waveform generator
+        converted_parameters: dict
+            The source model parameters produced by the generic path
+        """
+        self.keys = frozenset(parameters)
+        self.parameter_conversion = waveform_generator.parameter_conversion
+        self.source_parameter_keys = waveform_generator.source_parameter_keys
+        self.output_keys = tuple(converted_parameters)
+        self.requires_conversion = not all(
+            key in parameters and parameters[key] is converted_parameters[key]
+            for key in self.output_keys)
+
+    def applies_to(self, waveform_generator, parameters):
+        return (self.parameter_conversion is waveform_generator.parameter_conversion and
+                self.source_parameter_keys is waveform_generator.source_parameter_keys and
+                parameters.keys() == self.keys)
+
+    def convert(self, waveform_generator, parameters):
+        if self.requires_conversion:
+            parameters, _ = self.parameter_conversion(parameters.copy())
+        return {key: parameters[key] for key in self.output_keys}
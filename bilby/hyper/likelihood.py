@@ -53,6 +53,7 @@ class HyperparameterLikelihood(Likelihood):
         self.samples_per_posterior = self.max_samples
         self.samples_factor =\
             - self.n_posteriors * np.log(self.samples_per_posterior)
+        self._hyper_prior_is_vectorised = None
 
     def log_likelihood_ratio(self):
         self.hyper_prior.parameters.update(self.parameters)
@@ -61,6 +62,70 @@ class HyperparameterLikelihood(Likelihood):
         log_l += self.samples_factor
         return np.nan_to_num(log_l)
 
+    def log_likelihood_ratio_batch(self, parameters):
+        """ The log likelihood ratio evaluated at a batch of points
+
+        The population model is evaluated once for all of the points if it
+        broadcasts correctly over the data, otherwise each point is evaluated
+        in turn.
+
+        Parameters
+        ----------
+        parameters: dict
+            Dictionary of arrays of hyperparameter values with shape
+            (n_points,), any parameters not given are taken from
+            `self.parameters`.
+
+        Returns
+        -------
+        array_like: The log likelihood ratio at each point, shape (n_points,)
+        """
+        parameters, n_points = self._complete_batch_parameters(parameters)
+        if self._hyper_prior_is_vectorised is not False:
+            log_l = self._vectorised_log_likelihood_ratio_batch(
+                parameters, n_points)
+            if self._hyper_prior_is_vectorised is None:
+                self.parameters.update(
+                    {key: parameters[key][0] for key in parameters})
+                single = self.log_likelihood_ratio()
+                self._hyper_prior_is_vectorised = (
+                    log_l is not None and np.isclose(log_l[0], single))
+            if self._hyper_prior_is_vectorised and log_l is not None:
+                return log_l
+            elif not self._hyper_prior_is_vectorised:
+                logging.debug('The population model cannot be evaluated for '
+                              'a batch of points at once')
+        log_l = np.zeros(n_points)
+        for ii in range(n_points):
+            self.parameters.update(
+                {key: parameters[key][ii] for key in parameters})
+            log_l[ii] = self.log_likelihood_ratio()
+        return log_l
+
+    def _vectorised_log_likelihood_ratio_batch(self, parameters, n_points):
+        """ Evaluate the population model for all points at once, returns None
+        if it does not broadcast over the data """
+        original_parameters = self.hyper_prior.parameters.copy()
+        self.hyper_prior.parameters.update(
+            {key: parameters[key][:, np.newaxis, np.newaxis]
+             for key in self.hyper_prior.parameters})
+        data = {key: self.data[key][np.newaxis] for key in self.data}
+        try:
+            weights = (self.hyper_prior.prob(data) /
+                       self.sampling_prior.prob(self.data))
+            weights = np.broadcast_to(
+                weights, (n_points,) + self.data[list(self.data.keys())[0]].shape)
+        except (TypeError, ValueError, IndexError):
+            return None
+        finally:
+            self.hyper_prior.parameters.update(original_parameters)
+        log_l = np.sum(np.log(np.sum(weights, axis=-1)), axis=-1)
+        log_l += self.samples_factor
+        return np.nan_to_num(log_l)
+
+    def log_likelihood_batch(self, parameters):
+        return self.noise_log_likelihood() + self.log_likelihood_ratio_batch(parameters)
+
     def noise_log_likelihood(self):
         return self.evidence_factor
 
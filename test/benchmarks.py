@@ -0,0 +1,121 @@
+""" Micro-benchmarks of the likelihood hot paths.
+
+These are not run as part of the test suite, run them with
+
+    $ python test/benchmarks.py
+"""
+from __future__ import division, print_function
+
+import timeit
+
+import numpy as np
+from scipy.interpolate import interp1d
+from scipy.special import i0e
+
+import bilby
+
+
+def report(name, old, new, number):
+    print('{}: {:.2f} us -> {:.2f} us per call ({:.1f}x)'.format(
+        name, old / number * 1e6, new / number * 1e6, old / new))
+
+
+def benchmark_ln_i0(number=1000):
+    """ Phase marginalization: ln_i0 against the previous interpolation
+    table """
+    start = timeit.default_timer()
+    snrs = np.logspace(-5, 10, int(1e6))
+    table = interp1d(snrs, snrs + np.log(i0e(snrs)),
+                     bounds_error=False, fill_value=(0, np.nan))
+    print('ln_i0: table setup {:.3f} s'.format(
+        timeit.default_timer() - start))
+    values = abs(np.random.normal(0, 30, 4096))
+    for name, argument in [('ln_i0 scalar', values[0]),
+                           ('ln_i0 time series', values)]:
+        old = timeit.timeit(lambda: table(argument), number=number)
+        new = timeit.timeit(
+            lambda: bilby.gw.utils.ln_i0(argument), number=number)
+        report(name, old, new, number)
+
+
+def benchmark_roq(number=2000, linear_size=400, quadratic_size=100):
+    """ ROQ likelihood: closed-form interpolation at the closest time index
+    against interp1d and argmin over the time samples """
+    duration = 4
+    sampling_frequency = 2048
+    ifos = bilby.gw.detector.InterferometerList(['H1', 'L1', 'V1'])
+    ifos.set_strain_data_from_power_spectral_densities(
+        sampling_frequency=sampling_frequency, duration=duration)
+    number_of_frequencies = sum(ifos[0].frequency_mask)
+    linear_matrix = \
+        np.random.normal(size=(number_of_frequencies, linear_size)) + \
+        1j * np.random.normal(size=(number_of_frequencies, linear_size))
+    quadratic_matrix = \
+        np.random.normal(size=(number_of_frequencies, quadratic_size)) + 0j
+    polarizations = dict(
+        linear=dict(plus=np.random.normal(size=linear_size) * 1e-23 + 0j,
+                    cross=np.random.normal(size=linear_size) * 1e-23 + 0j),
+        quadratic=dict(
+            plus=np.random.normal(size=quadratic_size) * 1e-23 + 0j,
+            cross=np.random.normal(size=quadratic_size) * 1e-23 + 0j))
+
+    def source_model(frequency_array, **kwargs):
+        return polarizations
+
+    waveform_generator = bilby.gw.WaveformGenerator(
+        duration=duration, sampling_frequency=sampling_frequency,
+        frequency_domain_source_model=source_model,
+        waveform_arguments=dict(
+            frequency_nodes_linear=np.arange(linear_size),
+            frequency_nodes_quadratic=np.arange(quadratic_size)))
+    priors = bilby.core.prior.PriorDict()
+    priors['geocent_time'] = bilby.core.prior.Uniform(2.9, 3.1)
+    likelihood = bilby.gw.likelihood.ROQGravitationalWaveTransient(
+        interferometers=ifos, waveform_generator=waveform_generator,
+        linear_matrix=linear_matrix, quadratic_matrix=quadratic_matrix,
+        priors=priors)
+    parameters = dict(ra=1.3, dec=-0.4, psi=0.6, geocent_time=3.0123)
+    likelihood.parameters.update(parameters)
+
+    def previous_log_likelihood_ratio():
+        waveform = waveform_generator.frequency_domain_strain(parameters)
+        log_l = 0
+        for ifo in ifos:
+            f_plus = ifo.antenna_response(
+                parameters['ra'], parameters['dec'],
+                parameters['geocent_time'], parameters['psi'], 'plus')
+            f_cross = ifo.antenna_response(
+                parameters['ra'], parameters['dec'],
+                parameters['geocent_time'], parameters['psi'], 'cross')
+            ifo_time = parameters['geocent_time'] + \
+                ifo.time_delay_from_geocenter(
+                    parameters['ra'], parameters['dec'],
+                    parameters['geocent_time']) - ifo.strain_data.start_time
+            closest = np.argmin(np.absolute(
+                likelihood.time_samples - ifo_time))
+            indices = [closest - 1, closest, closest + 1]
+            h_linear = f_plus * waveform['linear']['plus'] + \
+                f_cross * waveform['linear']['cross']
+            h_quadratic = f_plus * waveform['quadratic']['plus'] + \
+                f_cross * waveform['quadratic']['cross']
+            log_l += interp1d(
+                likelihood.time_samples[indices], np.einsum(
+                    'i,ji->j', np.conjugate(h_linear),
+                    likelihood.weights[ifo.name + '_linear'][indices]),
+                kind='quadratic')(ifo_time)
+            log_l -= np.vdot(
+                np.abs(h_quadratic) ** 2,
+                likelihood.weights[ifo.name + '_quadratic']) / 2
+        return log_l.real
+
+    print('ROQ: relative difference {:.1e}'.format(
+        likelihood.log_likelihood_ratio() / previous_log_likelihood_ratio() -
+        1))
+    old = timeit.timeit(previous_log_likelihood_ratio, number=number)
+    new = timeit.timeit(likelihood.log_likelihood_ratio, number=number)
+    report('ROQ log_likelihood_ratio', old, new, number)
+
+
+if __name__ == '__main__':
+    benchmark_ln_i0()
+    benchmark_roq()
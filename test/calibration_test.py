@@ -50,6 +50,56 @@ class TestCubicSpline(unittest.TestCase):
                                                        **self.parameters)
         assert np.alltrue(cal_factor.real == np.ones_like(frequency_array))
 
+    def test_calibration_factor_interpolates_nodes(self):
+        amplitudes = np.random.normal(0, 0.1, self.n_points)
+        phases = np.random.normal(0, 0.1, self.n_points)
+        for ii in range(self.n_points):
+            self.parameters['recalib_amplitude_{}'.format(ii)] = amplitudes[ii]
+            self.parameters['recalib_phase_{}'.format(ii)] = phases[ii]
+        cal_factor = self.model.get_calibration_factor(
+            self.model.spline_points, **self.parameters)
+        expected = (1 + amplitudes) * (2 + 1j * phases) / (2 - 1j * phases)
+        self.assertTrue(np.allclose(cal_factor, expected))
+
+    def test_calibration_factor_matches_natural_cubic_spline(self):
+        from scipy.interpolate import CubicSpline
+        frequency_array = np.linspace(20, 1024, 1000)
+        amplitudes = np.random.normal(0, 0.1, self.n_points)
+        phases = np.random.normal(0, 0.1, self.n_points)
+        for ii in range(self.n_points):
+            self.parameters['recalib_amplitude_{}'.format(ii)] = amplitudes[ii]
+            self.parameters['recalib_phase_{}'.format(ii)] = phases[ii]
+        cal_factor = self.model.get_calibration_factor(frequency_array, **self.parameters)
+        delta_amplitude = CubicSpline(self.model.spline_points, amplitudes, bc_type='natural')(frequency_array)
+        delta_phase = CubicSpline(self.model.spline_points, phases, bc_type='natural')(frequency_array)
+        expected = (1 + delta_amplitude) * (2 + 1j * delta_phase) / (2 - 1j * delta_phase)
+        self.assertTrue(np.allclose(cal_factor, expected))
+
+    def test_basis_matrix_is_cached(self):
+        frequency_array = np.linspace(20, 1024, 1000)
+        basis_matrix = self.model.basis_matrix(frequency_array)
+        self.assertEqual(basis_matrix.shape, (self.n_points, 1000))
+        self.assertIs(basis_matrix, self.model.basis_matrix(frequency_array.copy()))
+        self.assertIsNot(basis_matrix, self.model.basis_matrix(frequency_array[:-1]))
+
+    def test_calibration_factors_matches_single(self):
+        frequency_array = np.linspace(20, 1024, 1000)
+        parameters = {key: np.random.normal(0, 0.1, 3) for key in self.parameters}
+        cal_factors = self.model.get_calibration_factors(frequency_array, parameters)
+        self.assertEqual(cal_factors.shape, (3, 1000))
+        for ii in range(3):
+            single = self.model.get_calibration_factor(
+                frequency_array, **{key: parameters[key][ii] for key in parameters})
+            self.assertTrue(np.allclose(cal_factors[ii], single))
+
+    def test_equal_after_evaluation(self):
+        other = calibration.CubicSpline(
+            prefix=self.prefix, minimum_frequency=self.minimum_frequency,
+            maximum_frequency=self.maximum_frequency, n_points=self.n_points)
+        self.model.get_calibration_factor(np.linspace(20, 1024, 1000), **self.parameters)
+        other.get_calibration_factor(np.linspace(20, 1024, 100), **self.parameters)
+        self.assertEqual(self.model, other)
+
     def test_repr(self):
         expected = 'CubicSpline(prefix=\'{}\', minimum_frequency={}, maximum_frequency={}, n_points={})'\
             .format(self.prefix, self.minimum_frequency, self.maximum_frequency, self.n_points)
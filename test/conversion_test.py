@@ -3,6 +3,7 @@ import unittest
 import mock
 
 import numpy as np
+import pandas as pd
 
 import bilby
 from bilby.gw import conversion
@@ -279,5 +280,186 @@ class TestDistanceTransformations(unittest.TestCase):
         self.assertAlmostEqual(max(abs(dl - self.distances)), 0, 4)
 
 
+class TestComputeSnrs(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(500)
+        self.parameters = dict(
+            mass_1=31., mass_2=29., a_1=0.4, a_2=0.3, tilt_1=0.0, tilt_2=0.0,
+            phi_12=1.7, phi_jl=0.3, luminosity_distance=4000., iota=0.4,
+            psi=2.659, phase=1.3, geocent_time=1126259642.413, ra=1.375,
+            dec=-1.2108)
+        self.interferometers = bilby.gw.detector.InterferometerList(
+            ['H1', 'L1'])
+        self.interferometers.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=2048, duration=4)
+        self.waveform_generator = \
+            bilby.gw.waveform_generator.WaveformGenerator(
+                duration=4, sampling_frequency=2048,
+                frequency_domain_source_model=bilby.gw.source.lal_binary_black_hole)
+        self.likelihood = bilby.gw.likelihood.GravitationalWaveTransient(
+            interferometers=self.interferometers,
+            waveform_generator=self.waveform_generator)
+        self.samples = pd.DataFrame(
+            [self.parameters for _ in range(5)])
+        self.samples['luminosity_distance'] = np.linspace(1000, 5000, 5)
+
+    def expected_snrs(self, parameters):
+        polarizations = self.waveform_generator.frequency_domain_strain(
+            parameters)
+        snrs = dict()
+        for ifo in self.interferometers:
+            signal = ifo.get_detector_response(polarizations, parameters)
+            snrs['{}_matched_filter_snr'.format(ifo.name)] = \
+                ifo.matched_filter_snr(signal=signal)
+            snrs['{}_optimal_snr'.format(ifo.name)] = \
+                ifo.optimal_snr_squared(signal=signal) ** 0.5
+        return snrs
+
+    def test_compute_snrs_dict(self):
+        sample = self.parameters.copy()
+        conversion.compute_snrs(sample, self.likelihood)
+        for key, value in self.expected_snrs(self.parameters).items():
+            self.assertAlmostEqual(sample[key], value)
+
+    def test_compute_snrs_data_frame(self):
+        conversion.compute_snrs(self.samples, self.likelihood, chunk_size=2)
+        for ii in range(len(self.samples)):
+            expected = self.expected_snrs(
+                dict(self.samples[list(self.parameters)].iloc[ii]))
+            for key, value in expected.items():
+                self.assertAlmostEqual(self.samples[key][ii], value)
+
+    def test_compute_snrs_with_pool_matches_serial(self):
+        serial = self.samples.copy()
+        conversion.compute_snrs(serial, self.likelihood)
+        conversion.compute_snrs(
+            self.samples, self.likelihood, npool=2, chunk_size=2)
+        for ifo in self.interferometers:
+            for key in ['{}_matched_filter_snr'.format(ifo.name),
+                        '{}_optimal_snr'.format(ifo.name)]:
+                self.assertTrue(np.array_equal(
+                    serial[key].values, self.samples[key].values))
+
+
+def create_empty_lookup_table(likelihood):
+    likelihood._dist_margd_loglikelihood_array = np.zeros((10, 10))
+
+
+class TestDistanceReconstruction(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(500)
+        self.parameters = dict(
+            mass_1=31., mass_2=29., a_1=0.4, a_2=0.3, tilt_1=0.0, tilt_2=0.0,
+            phi_12=1.7, phi_jl=0.3, luminosity_distance=400., iota=0.4,
+            psi=2.659, phase=1.3, geocent_time=1126259642.413, ra=1.375,
+            dec=-1.2108)
+        self.interferometers = bilby.gw.detector.InterferometerList(
+            ['H1', 'L1'])
+        self.interferometers.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=2048, duration=4,
+            start_time=self.parameters['geocent_time'] - 3)
+        self.waveform_generator = \
+            bilby.gw.waveform_generator.WaveformGenerator(
+                duration=4, sampling_frequency=2048,
+                frequency_domain_source_model=bilby.gw.source.lal_binary_black_hole)
+        self.interferometers.inject_signal(
+            parameters=self.parameters,
+            waveform_generator=self.waveform_generator)
+        self.samples = pd.DataFrame([self.parameters for _ in range(6)])
+
+    def get_likelihood(self, time_marginalization=False,
+                       phase_marginalization=False):
+        priors = bilby.gw.prior.BBHPriorDict()
+        priors['luminosity_distance'] = bilby.core.prior.Uniform(
+            100, 1000, 'luminosity_distance')
+        priors['geocent_time'] = bilby.core.prior.Uniform(
+            self.parameters['geocent_time'] - 0.1,
+            self.parameters['geocent_time'] + 0.1)
+        # The lookup table is not used to reconstruct the distance
+        with mock.patch.object(
+                bilby.gw.likelihood.GravitationalWaveTransient,
+                '_create_lookup_table', create_empty_lookup_table), \
+            mock.patch.object(
+                bilby.gw.likelihood.GravitationalWaveTransient,
+                'cache_lookup_table'):
+            likelihood = bilby.gw.likelihood.GravitationalWaveTransient(
+                interferometers=self.interferometers,
+                waveform_generator=self.waveform_generator, priors=priors,
+                distance_marginalization=True,
+                time_marginalization=time_marginalization,
+                phase_marginalization=phase_marginalization,
+                distance_marginalization_lookup_table=dict())
+        samples = self.samples.copy()
+        for key in priors:
+            if isinstance(priors[key], float):
+                samples[key] = priors[key]
+        return likelihood, samples
+
+    def test_inverse_transform_sample_uniform(self):
+        xx = np.linspace(2, 5, 11)
+        yy = np.ones((4, len(xx)))
+        draws = np.array([0, 0.25, 0.5, 1])
+        self.assertTrue(np.allclose(
+            conversion._inverse_transform_sample(xx, yy, draws),
+            2 + 3 * draws))
+
+    def test_inverse_transform_sample_matches_interped(self):
+        xx = np.linspace(0, 1, 1000)
+        yy = np.exp(-(xx - 0.3) ** 2 / 0.01)
+        draws = np.random.uniform(0, 1, 100)
+        prior = bilby.core.prior.Interped(xx, yy)
+        self.assertTrue(np.allclose(
+            conversion._inverse_transform_sample(
+                xx, np.tile(yy, (len(draws), 1)), draws),
+            prior.rescale(draws)))
+
+    def test_distance_samples(self):
+        for time_marginalization in [False, True]:
+            for phase_marginalization in [False, True]:
+                likelihood, samples = self.get_likelihood(
+                    time_marginalization, phase_marginalization)
+                samples = conversion.\
+                    generate_distance_samples_from_marginalized_likelihood(
+                        samples, likelihood)
+                distances = samples['luminosity_distance'].values
+                self.assertEqual(len(np.unique(distances)), len(distances))
+                self.assertLess(abs(np.median(distances) - 400), 25)
+
+    def test_distance_samples_independent_of_chunks(self):
+        likelihood, samples = self.get_likelihood(time_marginalization=True)
+        np.random.seed(42)
+        first = conversion.\
+            generate_distance_samples_from_marginalized_likelihood(
+                samples.copy(), likelihood, chunk_size=6)
+        np.random.seed(42)
+        second = conversion.\
+            generate_distance_samples_from_marginalized_likelihood(
+                samples.copy(), likelihood, npool=2, chunk_size=1)
+        self.assertTrue(np.array_equal(
+            first['luminosity_distance'].values,
+            second['luminosity_distance'].values))
+
+    def test_default_chunk_size_bounded_by_memory(self):
+        likelihood, samples = self.get_likelihood()
+        samples = pd.concat([samples] * 10, ignore_index=True)
+        with mock.patch.object(
+                conversion, '_evaluate_in_chunks',
+                wraps=conversion._evaluate_in_chunks) as m:
+            conversion.generate_distance_samples_from_marginalized_likelihood(
+                samples, likelihood,
+                max_chunk_elements=2 * len(likelihood._distance_array))
+        self.assertEqual(m.call_args[1]['chunk_size'], 2)
+
+    def test_distance_sample_dict(self):
+        likelihood, samples = self.get_likelihood()
+        sample = dict(samples.iloc[0])
+        conversion.generate_distance_samples_from_marginalized_likelihood(
+            sample, likelihood)
+        self.assertNotEqual(
+            sample['luminosity_distance'], likelihood._ref_dist)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -243,8 +243,8 @@ class TestInterferometer(unittest.TestCase):
             self.assertAlmostEqual(self.ifo.antenna_response(234, 52, 54, 76, 'plus'), self.ifo.detector_tensor.sum())
 
     def test_get_detector_response_default_behaviour(self):
-        self.ifo.antenna_response = MagicMock(return_value=1)
-        self.ifo.time_delay_from_geocenter = MagicMock(return_value=0)
+        self.ifo.antenna_responses_and_time_delay = MagicMock(
+            return_value=(np.array([1]), 0))
         self.ifo.epoch = 0
         self.minimum_frequency = 10
         self.maximum_frequency = 20
@@ -256,8 +256,8 @@ class TestInterferometer(unittest.TestCase):
         self.assertTrue(np.array_equal(response, plus * self.ifo.frequency_mask * np.exp(-0j)))
 
     def test_get_detector_response_with_dt(self):
-        self.ifo.antenna_response = MagicMock(return_value=1)
-        self.ifo.time_delay_from_geocenter = MagicMock(return_value=0)
+        self.ifo.antenna_responses_and_time_delay = MagicMock(
+            return_value=(np.array([1]), 0))
         self.ifo.epoch = 1
         self.minimum_frequency = 10
         self.maximum_frequency = 20
@@ -272,8 +272,8 @@ class TestInterferometer(unittest.TestCase):
                                         -1j * 2 * np.pi * self.ifo.frequency_array))))
 
     def test_get_detector_response_multiple_modes(self):
-        self.ifo.antenna_response = MagicMock(return_value=1)
-        self.ifo.time_delay_from_geocenter = MagicMock(return_value=0)
+        self.ifo.antenna_responses_and_time_delay = MagicMock(
+            return_value=(np.array([1, 1]), 0))
         self.ifo.epoch = 0
         self.minimum_frequency = 10
         self.maximum_frequency = 20
@@ -285,6 +285,39 @@ class TestInterferometer(unittest.TestCase):
             parameters=dict(ra=0, dec=0, geocent_time=0, psi=0))
         self.assertTrue(np.array_equal(response, (plus + cross) * self.ifo.frequency_mask * np.exp(-0j)))
 
+    def test_antenna_responses_and_time_delay(self):
+        ifo = bilby.gw.detector.get_empty_interferometer('H1')
+        responses, time_delay = ifo.antenna_responses_and_time_delay(
+            1.2, -0.3, 1126259642.4, 0.7, modes=['plus', 'cross'])
+        self.assertAlmostEqual(
+            responses[0], ifo.antenna_response(1.2, -0.3, 1126259642.4, 0.7, 'plus'))
+        self.assertAlmostEqual(
+            responses[1], ifo.antenna_response(1.2, -0.3, 1126259642.4, 0.7, 'cross'))
+        self.assertAlmostEqual(
+            time_delay, ifo.time_delay_from_geocenter(1.2, -0.3, 1126259642.4))
+
+    def test_get_detector_response_with_antenna_responses(self):
+        self.ifo.antenna_responses_and_time_delay = MagicMock()
+        plus = np.linspace(0, 4096, 4097)
+        cross = np.linspace(0, 4096, 4097)
+        response = self.ifo.get_detector_response(
+            waveform_polarizations=dict(plus=plus, cross=cross),
+            parameters=dict(ra=0, dec=0, geocent_time=self.ifo.strain_data.start_time, psi=0),
+            antenna_responses=[2, 3], time_delay=0)
+        self.assertFalse(self.ifo.antenna_responses_and_time_delay.called)
+        self.assertTrue(np.allclose(response, (2 * plus + 3 * cross) * self.ifo.frequency_mask))
+
+    def test_get_detector_response_at_frequencies(self):
+        frequencies = np.array([8., 12., 30., 100.])
+        plus = np.linspace(1, 4, 4)
+        dt = 0.25
+        response = self.ifo.get_detector_response(
+            waveform_polarizations=dict(plus=plus),
+            parameters=dict(ra=0, dec=0, geocent_time=self.ifo.strain_data.start_time, psi=0),
+            antenna_responses=[2], time_delay=dt, frequencies=frequencies)
+        self.assertTrue(np.allclose(
+            response, 2 * plus * np.exp(-1j * 2 * np.pi * dt * frequencies)))
+
     def test_inject_signal_no_waveform_polarizations(self):
         with self.assertRaises(ValueError):
             self.ifo.inject_signal(injection_polarizations=None, parameters=None)
@@ -483,6 +516,69 @@ class TestInterferometerEquals(unittest.TestCase):
         self.assertNotEqual(self.ifo_1, self.ifo_2)
 
 
+class TestFrozenAnalysisData(unittest.TestCase):
+
+    def setUp(self):
+        self.ifo = bilby.gw.detector.get_empty_interferometer('H1')
+        self.ifo.minimum_frequency = 20
+        self.ifo.maximum_frequency = 512
+        np.random.seed(10)
+        self.ifo.set_strain_data_from_power_spectral_density(
+            sampling_frequency=2048, duration=4)
+        self.signal = (np.random.normal(size=len(self.ifo.frequency_array)) +
+                       1j * np.random.normal(size=len(self.ifo.frequency_array)))
+        self.signal *= self.ifo.frequency_mask * 1e-23
+
+    def tearDown(self):
+        del self.ifo
+        del self.signal
+
+    def test_frequency_slice_selects_analysis_band(self):
+        analysis_data = self.ifo.frozen_analysis_data
+        self.assertTrue(np.array_equal(
+            analysis_data.frequency_array,
+            self.ifo.frequency_array[self.ifo.frequency_mask]))
+
+    def test_inner_product_matches_interferometer(self):
+        analysis_data = self.ifo.frozen_analysis_data
+        expected = self.ifo.inner_product(self.signal)
+        actual = analysis_data.inner_product(
+            self.signal[analysis_data.frequency_slice])
+        self.assertAlmostEqual(expected / actual, 1, 10)
+
+    def test_optimal_snr_squared_matches_interferometer(self):
+        analysis_data = self.ifo.frozen_analysis_data
+        expected = self.ifo.optimal_snr_squared(self.signal).real
+        actual = analysis_data.optimal_snr_squared(
+            self.signal[analysis_data.frequency_slice])
+        self.assertAlmostEqual(expected / actual, 1, 10)
+
+    def test_cached_between_calls(self):
+        self.assertIs(self.ifo.frozen_analysis_data,
+                      self.ifo.frozen_analysis_data)
+
+    def test_invalidated_by_frequency_bounds(self):
+        analysis_data = self.ifo.frozen_analysis_data
+        self.ifo.minimum_frequency = 30
+        self.assertIsNot(analysis_data, self.ifo.frozen_analysis_data)
+        self.assertEqual(30, min(self.ifo.frozen_analysis_data.frequency_array))
+
+    def test_invalidated_by_strain_data(self):
+        analysis_data = self.ifo.frozen_analysis_data
+        self.ifo.strain_data.frequency_domain_strain = \
+            self.ifo.strain_data.frequency_domain_strain + self.signal
+        self.assertIsNot(analysis_data, self.ifo.frozen_analysis_data)
+
+    def test_invalidated_by_power_spectral_density(self):
+        analysis_data = self.ifo.frozen_analysis_data
+        psd = self.ifo.power_spectral_density
+        psd.psd_array = psd.psd_array * 2
+        self.assertIsNot(analysis_data, self.ifo.frozen_analysis_data)
+        self.assertTrue(np.allclose(
+            analysis_data.power_spectral_density_array * 2,
+            self.ifo.frozen_analysis_data.power_spectral_density_array))
+
+
 class TestInterferometerStrainData(unittest.TestCase):
 
     def setUp(self):
@@ -997,6 +1093,53 @@ class TestInterferometerList(unittest.TestCase):
         ifos.set_strain_data_from_power_spectral_densities(2048, 4)
         ifos.plot_data(outdir=self.outdir)
 
+    def test_antenna_response_grid(self):
+        ifos = bilby.gw.detector.InterferometerList(['H1', 'L1', 'V1'])
+        ra = np.linspace(0, 2 * np.pi, 7)
+        dec = np.linspace(-1.5, 1.5, 7)
+        times = 1126259642.4 + np.linspace(0, 3600, 5)
+        responses, time_delays = ifos.antenna_response_grid(
+            ra[:, np.newaxis], dec[:, np.newaxis], times[np.newaxis, :], psi=0.3,
+            modes=['plus', 'cross', 'breathing'], chunk_size=4)
+        self.assertEqual(responses.shape, (3, 3, 35))
+        self.assertEqual(time_delays.shape, (3, 35))
+        for ii, ifo in enumerate(ifos):
+            for jj, mode in enumerate(['plus', 'cross', 'breathing']):
+                expected = [ifo.antenna_response(ra[kk], dec[kk], time, 0.3, mode)
+                            for kk in range(7) for time in times]
+                self.assertTrue(np.allclose(responses[ii, jj], expected))
+            expected = [ifo.time_delay_from_geocenter(ra[kk], dec[kk], time)
+                        for kk in range(7) for time in times]
+            self.assertTrue(np.allclose(time_delays[ii], expected))
+
+    def test_antenna_response_grid_independent_of_chunk_size(self):
+        ifos = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        ra = np.random.uniform(0, 2 * np.pi, 100)
+        dec = np.random.uniform(-1.5, 1.5, 100)
+        first = ifos.antenna_response_grid(ra, dec, 1126259642.4, chunk_size=7)
+        second = ifos.antenna_response_grid(ra, dec, 1126259642.4, chunk_size=1000)
+        self.assertTrue(np.array_equal(first[0], second[0]))
+        self.assertTrue(np.array_equal(first[1], second[1]))
+
+    def test_antenna_response_grid_scalar(self):
+        ifos = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        responses, time_delays = ifos.antenna_response_grid(1.2, -0.3, 1126259642.4, 0.7)
+        self.assertEqual(responses.shape, (2, 2, 1))
+        self.assertEqual(time_delays.shape, (2, 1))
+        self.assertAlmostEqual(
+            responses[0, 0, 0], ifos[0].antenna_response(1.2, -0.3, 1126259642.4, 0.7, 'plus'))
+
+    def test_get_detector_responses_matches_interferometers(self):
+        ifos = bilby.gw.detector.InterferometerList(['H1', 'L1', 'V1'])
+        ifos.set_strain_data_from_power_spectral_densities(2048, 4)
+        frequencies = ifos[0].frequency_array
+        polarizations = dict(plus=np.exp(1j * frequencies), cross=np.exp(-1j * frequencies))
+        parameters = dict(ra=1.2, dec=-0.3, psi=0.7, geocent_time=ifos.start_time + 2)
+        responses = ifos.get_detector_responses(polarizations, parameters)
+        for ifo, response in zip(ifos, responses):
+            self.assertTrue(np.allclose(
+                response, ifo.get_detector_response(polarizations, parameters)))
+
 
 class TestPowerSpectralDensityWithoutFiles(unittest.TestCase):
 
@@ -1,7 +1,10 @@
 from __future__ import division, absolute_import
 import unittest
+import os
+from shutil import rmtree
 import bilby
 import numpy as np
+import mock
 
 
 class TestBasicGWTransient(unittest.TestCase):
@@ -107,6 +110,14 @@ class TestGWTransient(unittest.TestCase):
         self.likelihood.noise_log_likelihood()
         self.assertAlmostEqual(-4037.0994372143414, self.likelihood.noise_log_likelihood(), 3)
 
+    def test_noise_log_likelihood_updated_with_data(self):
+        """Test the cached noise log likelihood follows changes to the data"""
+        self.likelihood.noise_log_likelihood()
+        interferometer = self.interferometers[0]
+        interferometer.strain_data.frequency_domain_strain = \
+            2 * interferometer.strain_data.frequency_domain_strain
+        self.assertAlmostEqual(-4 * 4037.0994372143414, self.likelihood.noise_log_likelihood(), 2)
+
     def test_log_likelihood(self):
         """Test log likelihood matches precomputed value"""
         self.likelihood.log_likelihood()
@@ -233,6 +244,35 @@ class TestTimeMarginalization(unittest.TestCase):
         self.assertAlmostEqual(marg_like, self.time.log_likelihood_ratio(),
                                delta=0.5)
 
+    def test_time_shifted_inner_products_restricted_to_prior_support(self):
+        interferometers = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        interferometers.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=self.sampling_frequency, duration=self.duration,
+            start_time=1126259640)
+        self.prior['geocent_time'] = bilby.prior.Uniform(
+            minimum=self.parameters['geocent_time'] + 1 - 0.1,
+            maximum=self.parameters['geocent_time'] + 1 + 0.1)
+        self.time = bilby.gw.likelihood.GravitationalWaveTransient(
+            interferometers=interferometers,
+            waveform_generator=self.waveform_generator,
+            time_marginalization=True, priors=self.prior.copy()
+        )
+        polarizations = self.waveform_generator.frequency_domain_strain(
+            self.parameters)
+        signals = interferometers.get_detector_responses(
+            polarizations, self.parameters)
+        expected = np.zeros(len(interferometers.frequency_array) - 1, dtype=complex)
+        for ifo, signal in zip(interferometers, signals):
+            expected += 4 / self.duration * np.fft.fft(
+                signal[0:-1] * ifo.frequency_domain_strain.conjugate()[0:-1] /
+                ifo.power_spectral_density_array[0:-1])
+        support = self.time.time_prior_array > 0
+        actual = self.time._time_shifted_d_inner_h(signals)
+        self.assertEqual(len(actual), np.sum(support))
+        self.assertTrue(np.allclose(actual, expected[support]))
+        self.assertTrue(np.array_equal(
+            self.time._time_prior_weights, self.time.time_prior_array[support]))
+
 
 class TestMarginalizedLikelihood(unittest.TestCase):
 
@@ -298,6 +338,124 @@ class TestMarginalizedLikelihood(unittest.TestCase):
         self.prior['phase'] = temp
 
 
+class TestDistanceMarginalizationLookupTable(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(500)
+        self.duration = 4
+        self.sampling_frequency = 2048
+        self.interferometers = bilby.gw.detector.InterferometerList(['H1'])
+        self.interferometers.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=self.sampling_frequency, duration=self.duration)
+        self.waveform_generator = bilby.gw.waveform_generator.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.lal_binary_black_hole,
+        )
+        self.prior = bilby.gw.prior.BBHPriorDict()
+        self.outdir = 'outdir'
+        bilby.core.utils.check_directory_exists_and_if_not_mkdir(self.outdir)
+        self.filename = os.path.join(self.outdir, 'lookup.npz')
+
+    def tearDown(self):
+        del self.interferometers
+        del self.waveform_generator
+        del self.prior
+        rmtree(self.outdir)
+
+    def get_likelihood(self, phase_marginalization=False, lookup_table=None):
+        if lookup_table is None:
+            lookup_table = self.filename
+
+        def fake_lookup_table(likelihood):
+            likelihood._dist_margd_loglikelihood_array = np.random.uniform(
+                size=(400, 800))
+
+        with mock.patch.object(
+                bilby.gw.likelihood.GravitationalWaveTransient,
+                '_create_lookup_table', autospec=True,
+                side_effect=fake_lookup_table) as m:
+            like = bilby.gw.likelihood.GravitationalWaveTransient(
+                interferometers=self.interferometers,
+                waveform_generator=self.waveform_generator,
+                distance_marginalization=True,
+                phase_marginalization=phase_marginalization,
+                priors=self.prior.copy(),
+                distance_marginalization_lookup_table=lookup_table)
+        return like, m.call_count
+
+    def test_lookup_table_written_to_file(self):
+        like, call_count = self.get_likelihood()
+        self.assertEqual(call_count, 1)
+        self.assertTrue(os.path.isfile(self.filename))
+
+    def test_lookup_table_read_from_file(self):
+        like, _ = self.get_likelihood()
+        new_like, call_count = self.get_likelihood()
+        self.assertEqual(call_count, 0)
+        self.assertTrue(np.array_equal(
+            like._dist_margd_loglikelihood_array,
+            new_like._dist_margd_loglikelihood_array))
+
+    def test_lookup_table_rebuilt_for_different_settings(self):
+        self.get_likelihood()
+        _, call_count = self.get_likelihood(phase_marginalization=True)
+        self.assertEqual(call_count, 1)
+
+    def test_lookup_table_rebuilt_for_different_prior(self):
+        self.get_likelihood()
+        self.prior['luminosity_distance'] = bilby.core.prior.PowerLaw(
+            alpha=2, minimum=100, maximum=5000, name='luminosity_distance')
+        _, call_count = self.get_likelihood()
+        self.assertEqual(call_count, 1)
+
+    def test_lookup_table_rebuilt_for_mismatched_dict(self):
+        like, _ = self.get_likelihood()
+        lookup_table = dict(np.load(self.filename))
+        lookup_table['reference_distance'] = 2 * like._ref_dist
+        new_like, call_count = self.get_likelihood(lookup_table=lookup_table)
+        self.assertEqual(call_count, 1)
+        os.remove(new_like.cached_lookup_table_filename)
+
+    def test_default_filename_depends_on_distance_prior(self):
+        like, _ = self.get_likelihood(lookup_table=dict())
+        other_like, _ = self.get_likelihood(lookup_table=dict())
+        self.prior['luminosity_distance'] = bilby.core.prior.PowerLaw(
+            alpha=1, minimum=like._distance_array[0],
+            maximum=like._distance_array[-1], name='luminosity_distance')
+        new_like, _ = self.get_likelihood(lookup_table=dict())
+        for likelihood in [like, new_like]:
+            os.remove(likelihood.cached_lookup_table_filename)
+        self.assertEqual(like.cached_lookup_table_filename,
+                         other_like.cached_lookup_table_filename)
+        self.assertNotEqual(like.cached_lookup_table_filename,
+                            new_like.cached_lookup_table_filename)
+
+    def test_create_lookup_table(self):
+        from scipy.special import i0e, logsumexp
+        for phase_marginalization in [False, True]:
+            like, _ = self.get_likelihood(
+                phase_marginalization=phase_marginalization)
+            like._distance_array = np.linspace(
+                like._distance_array[0], like._distance_array[-1], 50)
+            like.distance_prior_array = like.priors[
+                'luminosity_distance'].prob(like._distance_array)
+            like._create_lookup_table(max_elements=2 ** 16)
+            distance_ratio = like._ref_dist / like._distance_array
+            log_weights = np.log(
+                like.distance_prior_array * like._delta_distance)
+            for ii, jj in [(0, 0), (100, 300), (250, 500), (399, 799)]:
+                rho_opt = like._rho_opt_ref_array[ii]
+                rho_mf = like._rho_mf_ref_array[jj] * distance_ratio
+                if phase_marginalization:
+                    rho_mf = np.log(i0e(abs(rho_mf))) + abs(rho_mf)
+                expected = logsumexp(
+                    rho_mf - rho_opt * distance_ratio ** 2 / 2 +
+                    log_weights) - logsumexp(log_weights)
+                self.assertTrue(np.isclose(
+                    like._dist_margd_loglikelihood_array[ii, jj], expected,
+                    rtol=1e-10, atol=1e-10))
+
+
 class TestPhaseMarginalization(unittest.TestCase):
 
     def setUp(self):
@@ -528,6 +686,449 @@ class TestROQLikelihood(unittest.TestCase):
             self.roq_likelihood.log_likelihood_ratio(), np.nan_to_num(-np.inf))
 
 
+class TestMBLikelihood(unittest.TestCase):
+
+    def setUp(self):
+        self.duration = 32
+        self.sampling_frequency = 2048
+        self.test_parameters = dict(
+            mass_1=1.5, mass_2=1.3, chi_1=0.02, chi_2=-0.01,
+            luminosity_distance=100., iota=0.4, psi=2.659, phase=1.3,
+            geocent_time=30., ra=1.375, dec=-1.2108, lambda_1=300,
+            lambda_2=400)
+        waveform_arguments = dict(
+            waveform_approximant='TaylorF2', reference_frequency=50.,
+            minimum_frequency=40.)
+
+        np.random.seed(3)
+        self.ifos = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        for ifo in self.ifos:
+            ifo.minimum_frequency = 40
+        self.ifos.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=self.sampling_frequency, duration=self.duration)
+
+        self.waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.lal_binary_neutron_star,
+            waveform_arguments=waveform_arguments)
+        self.ifos.inject_signal(
+            parameters=self.test_parameters,
+            waveform_generator=self.waveform_generator)
+
+        self.priors = bilby.core.prior.PriorDict()
+        self.priors['geocent_time'] = bilby.core.prior.Uniform(29.9, 30.1)
+
+        self.likelihood = bilby.gw.likelihood.GravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator)
+        self.mb_waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.lal_binary_neutron_star,
+            waveform_arguments=waveform_arguments)
+        self.mb_likelihood = bilby.gw.likelihood.MBGravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.mb_waveform_generator,
+            reference_chirp_mass=1.1, priors=self.priors)
+
+    def tearDown(self):
+        del self.ifos
+        del self.waveform_generator
+        del self.mb_waveform_generator
+        del self.likelihood
+        del self.mb_likelihood
+
+    def test_waveform_evaluated_at_banded_frequencies(self):
+        frequencies = self.mb_likelihood.banded_frequency_array
+        self.assertGreater(len(self.mb_likelihood.band_frequencies), 1)
+        self.assertLess(len(frequencies), len(self.ifos.frequency_array) / 4)
+        self.assertTrue(np.array_equal(
+            self.mb_waveform_generator.frequency_array, frequencies))
+        self.assertEqual(self.mb_waveform_generator.duration, self.duration)
+
+    def test_matches_full_likelihood(self):
+        for time_shift, phase in zip([0, 0.05, -0.08], [1.3, 2.1, 5.0]):
+            parameters = self.test_parameters.copy()
+            parameters['geocent_time'] += time_shift
+            parameters['phase'] = phase
+            self.likelihood.parameters.update(parameters)
+            self.mb_likelihood.parameters.update(parameters)
+            self.assertAlmostEqual(
+                self.likelihood.log_likelihood_ratio(),
+                self.mb_likelihood.log_likelihood_ratio(), 2)
+
+    def test_matches_full_likelihood_with_phase_marginalization(self):
+        priors = bilby.gw.prior.BNSPriorDict()
+        priors['geocent_time'] = self.priors['geocent_time']
+        likelihood = bilby.gw.likelihood.GravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator, priors=priors.copy(),
+            phase_marginalization=True)
+        mb_likelihood = bilby.gw.likelihood.MBGravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.mb_waveform_generator,
+            reference_chirp_mass=1.1, priors=priors.copy(),
+            phase_marginalization=True)
+        likelihood.parameters.update(self.test_parameters)
+        mb_likelihood.parameters.update(self.test_parameters)
+        self.assertAlmostEqual(
+            likelihood.log_likelihood_ratio(),
+            mb_likelihood.log_likelihood_ratio(), 2)
+
+
+class TestRelativeBinningLikelihood(unittest.TestCase):
+
+    def setUp(self):
+        self.duration = 32
+        self.sampling_frequency = 2048
+        self.fiducial_parameters = dict(
+            mass_1=1.5, mass_2=1.3, chi_1=0.02, chi_2=-0.01,
+            luminosity_distance=100., iota=0.4, psi=2.659, phase=1.3,
+            geocent_time=30., ra=1.375, dec=-1.2108, lambda_1=300,
+            lambda_2=400)
+        waveform_arguments = dict(
+            waveform_approximant='TaylorF2', reference_frequency=50.,
+            minimum_frequency=40.)
+
+        np.random.seed(3)
+        self.ifos = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        for ifo in self.ifos:
+            ifo.minimum_frequency = 40
+        self.ifos.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=self.sampling_frequency, duration=self.duration)
+
+        self.waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.lal_binary_neutron_star,
+            waveform_arguments=waveform_arguments)
+        self.ifos.inject_signal(
+            parameters=self.fiducial_parameters,
+            waveform_generator=self.waveform_generator)
+
+        self.likelihood = bilby.gw.likelihood.GravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator)
+        self.rb_waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.lal_binary_neutron_star,
+            waveform_arguments=waveform_arguments)
+        self.rb_likelihood = \
+            bilby.gw.likelihood.RelativeBinningGravitationalWaveTransient(
+                interferometers=self.ifos,
+                waveform_generator=self.rb_waveform_generator,
+                fiducial_parameters=self.fiducial_parameters)
+
+    def tearDown(self):
+        del self.ifos
+        del self.waveform_generator
+        del self.rb_waveform_generator
+        del self.likelihood
+        del self.rb_likelihood
+
+    def test_waveform_evaluated_at_bin_edges(self):
+        frequencies = self.rb_likelihood.bin_frequencies
+        self.assertLess(len(frequencies), len(self.ifos.frequency_array) / 10)
+        self.assertEqual(frequencies[0], 40)
+        self.assertEqual(frequencies[-1], self.sampling_frequency / 2)
+        self.assertTrue(np.array_equal(
+            self.rb_waveform_generator.frequency_array, frequencies))
+
+    def test_matches_full_likelihood_at_fiducial_parameters(self):
+        self.likelihood.parameters.update(self.fiducial_parameters)
+        self.rb_likelihood.parameters.update(self.fiducial_parameters)
+        self.assertAlmostEqual(
+            self.likelihood.log_likelihood_ratio(),
+            self.rb_likelihood.log_likelihood_ratio(), 6)
+
+    def test_matches_full_likelihood_near_fiducial_parameters(self):
+        parameters = self.fiducial_parameters.copy()
+        parameters['mass_1'] += 1e-3
+        parameters['geocent_time'] += 2e-4
+        parameters['phase'] += 0.2
+        parameters['luminosity_distance'] *= 1.2
+        self.likelihood.parameters.update(parameters)
+        self.rb_likelihood.parameters.update(parameters)
+        self.assertAlmostEqual(
+            self.likelihood.log_likelihood_ratio(),
+            self.rb_likelihood.log_likelihood_ratio(), 1)
+
+    def test_matches_full_likelihood_with_phase_marginalization(self):
+        priors = bilby.gw.prior.BNSPriorDict()
+        likelihood = bilby.gw.likelihood.GravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator, priors=priors.copy(),
+            phase_marginalization=True)
+        rb_likelihood = \
+            bilby.gw.likelihood.RelativeBinningGravitationalWaveTransient(
+                interferometers=self.ifos,
+                waveform_generator=self.rb_waveform_generator,
+                fiducial_parameters=self.fiducial_parameters,
+                priors=priors.copy(), phase_marginalization=True)
+        likelihood.parameters.update(self.fiducial_parameters)
+        rb_likelihood.parameters.update(self.fiducial_parameters)
+        self.assertAlmostEqual(
+            likelihood.log_likelihood_ratio(),
+            rb_likelihood.log_likelihood_ratio(), 6)
+
+
+class TestROQLikelihoodWeights(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(5)
+        self.duration = 4
+        self.sampling_frequency = 512
+        self.ifos = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        self.ifos.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=self.sampling_frequency, duration=self.duration)
+        number_of_frequencies = sum(self.ifos[0].frequency_mask)
+        self.linear_matrix = \
+            np.random.normal(size=(number_of_frequencies, 6)) + \
+            1j * np.random.normal(size=(number_of_frequencies, 6))
+        self.quadratic_matrix = \
+            np.random.normal(size=(number_of_frequencies, 4)) + 0j
+        self.waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.roq,
+            waveform_arguments=dict(
+                frequency_nodes_linear=np.arange(6.),
+                frequency_nodes_quadratic=np.arange(4.)))
+        self.priors = bilby.core.prior.PriorDict()
+        self.priors['geocent_time'] = bilby.core.prior.Uniform(2.9, 3.1)
+
+    def tearDown(self):
+        del self.ifos
+        del self.waveform_generator
+
+    def get_likelihood(self, **kwargs):
+        return bilby.gw.likelihood.ROQGravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator,
+            linear_matrix=self.linear_matrix,
+            quadratic_matrix=self.quadratic_matrix, priors=self.priors,
+            **kwargs)
+
+    def test_linear_weights_are_time_shifted_projections(self):
+        likelihood = self.get_likelihood()
+        self.assertLessEqual(likelihood.time_samples[0], 2.9 - 0.045)
+        self.assertGreaterEqual(likelihood.time_samples[-1], 3.1 + 0.045)
+        for ifo in self.ifos:
+            analysis_data = ifo.frozen_analysis_data
+            for ii in [0, 50, len(likelihood.time_samples) - 1]:
+                shifted_data = \
+                    analysis_data.data_over_power_spectral_density * np.exp(
+                        2j * np.pi * analysis_data.frequency_array *
+                        likelihood.time_samples[ii])
+                expected = 4 / self.duration * np.dot(
+                    shifted_data, np.conjugate(self.linear_matrix))
+                self.assertTrue(np.allclose(
+                    likelihood.weights[ifo.name + '_linear'][ii], expected))
+
+    def test_weights_independent_of_block_size_and_threads(self):
+        likelihood = self.get_likelihood()
+        serial_likelihood = self.get_likelihood(weights_block_size=1, npool=1)
+        for key in likelihood.weights:
+            self.assertTrue(np.allclose(
+                likelihood.weights[key], serial_likelihood.weights[key]))
+
+    def test_weights_cache(self):
+        cache_directory = 'outdir/roq_weights'
+        likelihood = self.get_likelihood(
+            weights_cache_directory=cache_directory)
+        self.assertTrue(os.path.isdir(likelihood.cached_weights_directory))
+        with mock.patch.object(bilby.gw.likelihood.ROQGravitationalWaveTransient,
+                               '_set_weights') as m:
+            cached_likelihood = self.get_likelihood(
+                weights_cache_directory=cache_directory)
+            self.assertFalse(m.called)
+        self.assertTrue(np.array_equal(
+            likelihood.time_samples, cached_likelihood.time_samples))
+        for key in likelihood.weights:
+            self.assertIsInstance(
+                cached_likelihood.weights[key], np.memmap)
+            self.assertTrue(np.array_equal(
+                likelihood.weights[key], cached_likelihood.weights[key]))
+        rmtree(cache_directory)
+
+    def test_weights_cache_depends_on_time_prior(self):
+        cache_directory = 'outdir/roq_weights'
+        likelihood = self.get_likelihood(
+            weights_cache_directory=cache_directory)
+        self.priors['geocent_time'] = bilby.core.prior.Uniform(2.8, 3.1)
+        other_likelihood = self.get_likelihood(
+            weights_cache_directory=cache_directory)
+        self.assertNotEqual(likelihood.cached_weights_directory,
+                            other_likelihood.cached_weights_directory)
+        self.assertLess(other_likelihood.time_samples[0],
+                        likelihood.time_samples[0])
+        rmtree(cache_directory)
+
+    def test_log_likelihood_ratio_matches_interp1d(self):
+        from scipy.interpolate import interp1d
+        polarizations = dict(
+            linear=dict(plus=np.random.normal(size=6) + 0j,
+                        cross=np.random.normal(size=6) + 0j),
+            quadratic=dict(plus=np.random.normal(size=4) + 0j,
+                           cross=np.random.normal(size=4) + 0j))
+
+        def source_model(frequency_array, **kwargs):
+            return polarizations
+
+        self.waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=source_model,
+            waveform_arguments=self.waveform_generator.waveform_arguments)
+        likelihood = self.get_likelihood()
+        parameters = dict(ra=1.3, dec=-0.4, psi=0.6, geocent_time=3.0123)
+        likelihood.parameters.update(parameters)
+
+        expected = 0
+        for ifo in self.ifos:
+            ifo_time = parameters['geocent_time'] + ifo.time_delay_from_geocenter(
+                parameters['ra'], parameters['dec'],
+                parameters['geocent_time']) - ifo.strain_data.start_time
+            f_plus = ifo.antenna_response(
+                parameters['ra'], parameters['dec'],
+                parameters['geocent_time'], parameters['psi'], 'plus')
+            f_cross = ifo.antenna_response(
+                parameters['ra'], parameters['dec'],
+                parameters['geocent_time'], parameters['psi'], 'cross')
+            closest = np.argmin(abs(likelihood.time_samples - ifo_time))
+            indices = [closest - 1, closest, closest + 1]
+            h_linear = f_plus * polarizations['linear']['plus'] + \
+                f_cross * polarizations['linear']['cross']
+            h_quadratic = f_plus * polarizations['quadratic']['plus'] + \
+                f_cross * polarizations['quadratic']['cross']
+            expected += interp1d(
+                likelihood.time_samples[indices],
+                np.dot(likelihood.weights[ifo.name + '_linear'][indices],
+                       np.conjugate(h_linear)), kind='quadratic')(ifo_time)
+            expected -= np.vdot(
+                abs(h_quadratic) ** 2,
+                likelihood.weights[ifo.name + '_quadratic']) / 2
+        self.assertAlmostEqual(
+            likelihood.log_likelihood_ratio() / expected.real, 1, places=10)
+
+        likelihood.parameters['geocent_time'] = 5
+        self.assertEqual(likelihood.log_likelihood_ratio(),
+                         np.nan_to_num(-np.inf))
+
+    def test_memory_mapped_basis(self):
+        bilby.core.utils.check_directory_exists_and_if_not_mkdir('outdir')
+        np.save('outdir/linear_matrix.npy', self.linear_matrix.T)
+        np.save('outdir/quadratic_matrix.npy', self.quadratic_matrix.T)
+        likelihood = self.get_likelihood()
+        self.linear_matrix = 'outdir/linear_matrix.npy'
+        self.quadratic_matrix = 'outdir/quadratic_matrix.npy'
+        mapped_likelihood = self.get_likelihood(mmap_mode='r')
+        self.assertIsInstance(mapped_likelihood.linear_matrix, np.memmap)
+        for key in likelihood.weights:
+            self.assertTrue(np.allclose(
+                likelihood.weights[key], mapped_likelihood.weights[key]))
+        del mapped_likelihood
+        os.remove('outdir/linear_matrix.npy')
+        os.remove('outdir/quadratic_matrix.npy')
+
+
+class TestROQBasisSelection(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(11)
+        self.duration = 4
+        self.sampling_frequency = 512
+        self.ifos = bilby.gw.detector.InterferometerList(['H1', 'L1'])
+        self.ifos.set_strain_data_from_power_spectral_densities(
+            sampling_frequency=self.sampling_frequency, duration=self.duration)
+        self.outdir = 'outdir/roq_bases'
+        self.bases = dict()
+        for label, (flow, fhigh, seglen, chirpmassmin, chirpmassmax) in dict(
+                narrow=(20, 100, 4, 10, 20), wide=(20, 100, 4, 5, 40),
+                long=(10, 50, 8, 5, 10)).items():
+            directory = os.path.join(self.outdir, label)
+            bilby.core.utils.check_directory_exists_and_if_not_mkdir(directory)
+            number_of_frequencies = int((fhigh - flow) * seglen) + 1
+            np.save(os.path.join(directory, 'B_linear.npy'),
+                    np.random.normal(size=(6, number_of_frequencies)) +
+                    1j * np.random.normal(size=(6, number_of_frequencies)))
+            np.save(os.path.join(directory, 'B_quadratic.npy'),
+                    np.random.normal(size=(4, number_of_frequencies)) + 0j)
+            np.save(os.path.join(directory, 'fnodes_linear.npy'),
+                    np.linspace(flow, fhigh, 6))
+            np.save(os.path.join(directory, 'fnodes_quadratic.npy'),
+                    np.linspace(flow, fhigh, 4))
+            with open(os.path.join(directory, 'params.dat'), 'w') as f:
+                f.write('flow fhigh seglen chirpmassmin chirpmassmax\n')
+                f.write('{} {} {} {} {}\n'.format(
+                    flow, fhigh, seglen, chirpmassmin, chirpmassmax))
+            self.bases[label] = directory
+        self.waveform_generator = bilby.gw.WaveformGenerator(
+            duration=self.duration, sampling_frequency=self.sampling_frequency,
+            frequency_domain_source_model=bilby.gw.source.roq,
+            waveform_arguments=dict())
+        self.priors = bilby.gw.prior.BBHPriorDict()
+        self.priors['geocent_time'] = bilby.core.prior.Uniform(2.9, 3.1)
+
+    def tearDown(self):
+        rmtree(self.outdir)
+        del self.ifos
+        del self.waveform_generator
+
+    def get_likelihood(self, chirp_mass_minimum, chirp_mass_maximum):
+        self.priors.pop('mass_1', None)
+        self.priors.pop('mass_2', None)
+        self.priors['chirp_mass'] = bilby.core.prior.Uniform(
+            chirp_mass_minimum, chirp_mass_maximum)
+        self.priors['mass_ratio'] = bilby.core.prior.Uniform(0.125, 1)
+        return bilby.gw.likelihood.ROQGravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator, priors=self.priors,
+            roq_bases=sorted(self.bases.values()))
+
+    def test_narrowest_basis_is_chosen(self):
+        likelihood = self.get_likelihood(12, 18)
+        self.assertEqual(likelihood.roq_basis, self.bases['narrow'])
+        self.assertEqual(likelihood.roq_scale_factor, 1)
+        self.assertIsInstance(likelihood.linear_matrix, np.memmap)
+        self.assertIsInstance(likelihood.quadratic_matrix, np.memmap)
+        self.assertTrue(np.array_equal(
+            likelihood.frequency_nodes_linear, np.linspace(20, 100, 6)))
+        likelihood = self.get_likelihood(6, 30)
+        self.assertEqual(likelihood.roq_basis, self.bases['wide'])
+
+    def test_rescaled_basis_matches_explicit_basis(self):
+        likelihood = self.get_likelihood(3, 4)
+        self.assertEqual(likelihood.roq_basis, self.bases['long'])
+        self.assertEqual(likelihood.roq_scale_factor, 2)
+        self.assertEqual(likelihood.roq_params['chirpmassmax'], 5)
+        self.assertTrue(np.array_equal(
+            likelihood.frequency_nodes_linear, np.linspace(20, 100, 6)))
+        for ifo in self.ifos:
+            self.assertEqual(ifo.minimum_frequency, 20)
+            self.assertEqual(ifo.maximum_frequency, 100)
+        explicit_likelihood = \
+            bilby.gw.likelihood.ROQGravitationalWaveTransient(
+                interferometers=self.ifos,
+                waveform_generator=self.waveform_generator,
+                linear_matrix=os.path.join(self.bases['long'], 'B_linear.npy'),
+                quadratic_matrix=os.path.join(
+                    self.bases['long'], 'B_quadratic.npy'),
+                priors=self.priors)
+        for key in likelihood.weights:
+            self.assertTrue(np.allclose(
+                likelihood.weights[key], explicit_likelihood.weights[key]))
+
+    def test_component_mass_priors(self):
+        self.priors['mass_1'] = bilby.core.prior.Uniform(14, 20)
+        self.priors['mass_2'] = bilby.core.prior.Uniform(14, 20)
+        likelihood = bilby.gw.likelihood.ROQGravitationalWaveTransient(
+            interferometers=self.ifos,
+            waveform_generator=self.waveform_generator, priors=self.priors,
+            roq_bases=list(self.bases.values()))
+        self.assertEqual(likelihood.roq_basis, self.bases['narrow'])
+
+    def test_no_basis_covers_prior(self):
+        with self.assertRaises(ValueError):
+            self.get_likelihood(50, 60)
+
+
 class TestBBHLikelihoodSetUp(unittest.TestCase):
 
     def setUp(self):
@@ -62,6 +62,25 @@ class TestHyperLikelihood(unittest.TestCase):
         resampled = like.resample_posteriors(10)
         self.assertEqual(resampled['a'].shape, (len(self.lengths), 10))
 
+    def test_log_likelihood_ratio_batch(self):
+        def hyper_prior(dataset, mu, sigma):
+            return np.exp(- (dataset['a'] - mu) ** 2 / 2 / sigma ** 2) /\
+                (2 * np.pi * sigma ** 2) ** 0.5
+
+        like = hyp.likelihood.HyperparameterLikelihood(
+            self.posteriors, hyper_prior, self.sampling_model)
+        parameters = dict(mu=np.random.uniform(-1, 1, 10),
+                          sigma=np.random.uniform(0.5, 2, 10))
+        log_l = list()
+        for ii in range(10):
+            like.parameters.update(
+                {key: parameters[key][ii] for key in parameters})
+            log_l.append(like.log_likelihood_ratio())
+        self.assertTrue(np.allclose(
+            like.log_likelihood_ratio_batch(parameters), log_l))
+        self.assertTrue(like._hyper_prior_is_vectorised)
+        self.assertIs(like.parameters, like.hyper_prior.parameters)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -31,6 +31,24 @@ class TestLikelihoodBase(unittest.TestCase):
     def test_base_log_likelihood_ratio(self):
         self.assertTrue(np.isnan(self.likelihood.log_likelihood_ratio()))
 
+    def test_base_log_likelihood_batch(self):
+        self.likelihood.parameters = dict(a=1)
+        log_l = self.likelihood.log_likelihood_batch(dict(a=np.arange(3)))
+        self.assertEqual(log_l.shape, (3,))
+        self.assertTrue(np.all(np.isnan(log_l)))
+
+    def test_base_log_likelihood_batch_sets_parameters(self):
+        self.likelihood.parameters = dict(a=1, b=2)
+        self.likelihood.log_likelihood = MagicMock(return_value=1)
+        self.likelihood.log_likelihood_batch(dict(a=np.arange(3)))
+        self.assertDictEqual(self.likelihood.parameters, dict(a=2, b=2))
+
+    def test_batch_parameters_wrong_length(self):
+        self.likelihood.parameters = dict(a=1, b=2)
+        with self.assertRaises(ValueError):
+            self.likelihood.log_likelihood_batch(
+                dict(a=np.arange(3), b=np.arange(2)))
+
     def test_meta_data_unset(self):
         self.assertEqual(self.likelihood.meta_data, None)
 
@@ -207,6 +225,49 @@ class TestGaussianLikelihood(unittest.TestCase):
         with self.assertRaises(ValueError):
             likelihood.sigma = 'test'
 
+    def _log_likelihood_loop(self, likelihood, parameters):
+        log_l = list()
+        for ii in range(len(parameters['m'])):
+            likelihood.parameters.update(
+                {key: parameters[key][ii] for key in parameters})
+            log_l.append(likelihood.log_likelihood())
+        return np.array(log_l)
+
+    def test_log_likelihood_batch_known_sigma(self):
+        likelihood = GaussianLikelihood(
+            self.x, self.y, self.function, self.sigma)
+        parameters = dict(m=np.random.uniform(0, 4, 10),
+                          c=np.random.uniform(0, 2, 10))
+        self.assertTrue(np.allclose(
+            likelihood.log_likelihood_batch(parameters),
+            self._log_likelihood_loop(likelihood, parameters)))
+        self.assertTrue(likelihood._func_is_vectorised)
+
+    def test_log_likelihood_batch_unknown_sigma(self):
+        likelihood = GaussianLikelihood(
+            self.x, self.y, self.function, sigma=None)
+        parameters = dict(m=np.random.uniform(0, 4, 10),
+                          c=np.random.uniform(0, 2, 10),
+                          sigma=np.random.uniform(0.05, 1, 10))
+        self.assertTrue(np.allclose(
+            likelihood.log_likelihood_batch(parameters),
+            self._log_likelihood_loop(likelihood, parameters)))
+
+    def test_log_likelihood_batch_function_not_vectorised(self):
+        def function(x, m, c):
+            if m > 2:
+                return m * x + c
+            else:
+                return c * x
+
+        likelihood = GaussianLikelihood(self.x, self.y, function, self.sigma)
+        parameters = dict(m=np.random.uniform(0, 4, 10),
+                          c=np.random.uniform(0, 2, 10))
+        self.assertTrue(np.allclose(
+            likelihood.log_likelihood_batch(parameters),
+            self._log_likelihood_loop(likelihood, parameters)))
+        self.assertFalse(likelihood._func_is_vectorised)
+
     def test_repr(self):
         likelihood = GaussianLikelihood(
             self.x, self.y, self.function, sigma=self.sigma)
@@ -284,6 +345,27 @@ class TestStudentTLikelihood(unittest.TestCase):
         likelihood.parameters['nu'] = 98
         self.assertTrue(likelihood.nu == 98)
 
+    def test_log_likelihood_batch(self):
+        likelihood = StudentTLikelihood(
+            self.x, self.y, self.function, nu=None)
+        parameters = dict(m=np.random.uniform(0, 4, 10),
+                          c=np.random.uniform(0, 2, 10),
+                          nu=np.random.uniform(1, 100, 10))
+        log_l = list()
+        for ii in range(10):
+            likelihood.parameters.update(
+                {key: parameters[key][ii] for key in parameters})
+            log_l.append(likelihood.log_likelihood())
+        self.assertTrue(np.allclose(
+            likelihood.log_likelihood_batch(parameters), log_l))
+
+    def test_log_likelihood_batch_nu_negative(self):
+        likelihood = StudentTLikelihood(
+            self.x, self.y, self.function, nu=None)
+        with self.assertRaises(ValueError):
+            likelihood.log_likelihood_batch(
+                dict(m=np.ones(2), c=np.ones(2), nu=np.array([1, -1])))
+
     def test_lam(self):
         likelihood = StudentTLikelihood(
             self.x, self.y, self.function, nu=0, sigma=0.5)
@@ -395,6 +477,27 @@ class TestPoissonLikelihood(unittest.TestCase):
             m.return_value = 1
             self.assertEqual(1, poisson_likelihood.log_likelihood())
 
+    def test_log_likelihood_batch(self):
+        likelihood = PoissonLikelihood(self.x, self.y, self.function_array)
+        rates = np.random.uniform(1, 10, 10)
+        log_l = list()
+        for rate in rates:
+            likelihood.parameters['c'] = rate
+            log_l.append(likelihood.log_likelihood())
+        self.assertTrue(np.allclose(
+            likelihood.log_likelihood_batch(dict(c=rates)), log_l))
+
+    def test_log_likelihood_batch_zero_rate(self):
+        likelihood = PoissonLikelihood(self.x, self.y, self.function_array)
+        log_l = likelihood.log_likelihood_batch(dict(c=np.array([0, 5])))
+        self.assertEqual(log_l[0], -np.inf)
+        self.assertTrue(np.isfinite(log_l[1]))
+
+    def test_log_likelihood_batch_negative_rate(self):
+        likelihood = PoissonLikelihood(self.x, self.y, self.function_array)
+        with self.assertRaises(ValueError):
+            likelihood.log_likelihood_batch(dict(c=np.array([-1, 5])))
+
     def test_repr(self):
         likelihood = PoissonLikelihood(
             self.x, self.y, self.function)
@@ -485,6 +588,22 @@ class TestExponentialLikelihood(unittest.TestCase):
             m.return_value = 3
             self.assertEqual(-3, exponential_likelihood.log_likelihood())
 
+    def test_log_likelihood_batch(self):
+        means = np.random.uniform(1, 10, 10)
+        log_l = list()
+        for mean in means:
+            self.exponential_likelihood.parameters['c'] = mean
+            log_l.append(self.exponential_likelihood.log_likelihood())
+        self.assertTrue(np.allclose(
+            self.exponential_likelihood.log_likelihood_batch(dict(c=means)),
+            log_l))
+
+    def test_log_likelihood_batch_negative_function(self):
+        log_l = self.exponential_likelihood.log_likelihood_batch(
+            dict(c=np.array([-1, 5])))
+        self.assertEqual(log_l[0], -np.inf)
+        self.assertTrue(np.isfinite(log_l[1]))
+
     def test_repr(self):
         expected = 'ExponentialLikelihood(x={}, y={}, func={})'.format(self.x, self.y, self.function.__name__)
         self.assertEqual(expected, repr(self.exponential_likelihood))
@@ -157,6 +157,20 @@ class TestPriorClasses(unittest.TestCase):
             bilby.gw.prior.AlignedSpin(name='test', unit='unit'),
         ]
 
+    def test_prior_dict_array_methods(self):
+        """Test the array methods of PriorDict agree with each prior."""
+        keys = ['test_{}'.format(ii) for ii in range(len(self.priors))]
+        priors = bilby.core.prior.PriorDict(dict(zip(keys, self.priors)))
+        theta = np.random.uniform(0, 1, (100, len(keys)))
+        rescaled = priors.rescale(keys, theta)
+        ln_prob = np.zeros(len(theta))
+        for ii, prior in enumerate(self.priors):
+            self.assertTrue(np.array_equal(
+                rescaled[:, ii], prior.rescale(theta[:, ii])))
+            ln_prob += prior.ln_prob(rescaled[:, ii])
+        self.assertTrue(np.array_equal(
+            ln_prob, priors.ln_prob_array(keys, rescaled)))
+
     def test_minimum_rescaling(self):
         """Test the the rescaling works as expected."""
         for prior in self.priors:
@@ -493,6 +507,52 @@ class TestPriorDict(unittest.TestCase):
         self.assertListEqual(sorted(expected), sorted(self.prior_set_from_dict.rescale(
             keys=self.prior_set_from_dict.keys(), theta=theta)))
 
+    def test_rescale_array(self):
+        keys = ['mass', 'speed', 'length']
+        theta = np.random.uniform(0, 1, (10, 3))
+        rescaled = self.prior_set_from_dict.rescale(keys=keys, theta=theta)
+        self.assertEqual(rescaled.shape, (10, 3))
+        for ii, key in enumerate(keys):
+            self.assertTrue(np.array_equal(
+                rescaled[:, ii], self.priors[key].rescale(theta[:, ii])))
+
+    def test_ln_prob_array(self):
+        keys = ['mass', 'speed']
+        samples = self.prior_set_from_dict.sample_subset(keys=keys, size=10)
+        expected = self.prior_set_from_dict.ln_prob(samples, axis=0)
+        array = np.array([samples[key] for key in keys]).T
+        self.assertTrue(np.allclose(
+            expected, self.prior_set_from_dict.ln_prob_array(keys, array)))
+
+    def test_ln_prob_array_single_sample(self):
+        keys = ['mass', 'speed']
+        samples = self.prior_set_from_dict.sample_subset(keys=keys)
+        self.assertAlmostEqual(
+            self.prior_set_from_dict.ln_prob(samples),
+            self.prior_set_from_dict.ln_prob_array(
+                keys, [samples[key] for key in keys]))
+
+    def test_sample_array(self):
+        keys = ['mass', 'speed']
+        np.random.seed(42)
+        samples = self.prior_set_from_dict.sample_subset(keys=keys, size=7)
+        np.random.seed(42)
+        array = self.prior_set_from_dict.sample_array(keys, size=7)
+        self.assertEqual(array.shape, (7, 2))
+        for ii, key in enumerate(keys):
+            self.assertTrue(np.array_equal(samples[key], array[:, ii]))
+
+    def test_rescale_uses_updated_priors(self):
+        keys = ['mass']
+        self.prior_set_from_dict.rescale(keys=keys, theta=[0.5])
+        self.prior_set_from_dict['mass'] = bilby.core.prior.Uniform(
+            minimum=10, maximum=20)
+        self.assertEqual(
+            self.prior_set_from_dict.rescale(keys=keys, theta=[0.5]), [15])
+        self.prior_set_from_dict.pop('mass')
+        with self.assertRaises(KeyError):
+            self.prior_set_from_dict.rescale(keys=keys, theta=[0.5])
+
     def test_redundancy(self):
         for key in self.prior_set_from_dict.keys():
             self.assertFalse(self.prior_set_from_dict.test_redundancy(key=key))
@@ -2,6 +2,8 @@ from __future__ import absolute_import, division
 
 import bilby
 import unittest
+from collections import OrderedDict
+import deepdish
 import numpy as np
 import pandas as pd
 import shutil
@@ -123,6 +125,67 @@ class TestResult(unittest.TestCase):
         self.assertEqual(self.result.priors['c'], loaded_result.priors['c'])
         self.assertEqual(self.result.priors['d'], loaded_result.priors['d'])
 
+    def test_save_and_load_lazy(self):
+        self.result.nested_samples = np.random.normal(size=(20, 2))
+        self.result.save_to_file()
+        loaded_result = bilby.core.result.read_in_result(
+            outdir=self.result.outdir, label=self.result.label, lazy=True)
+        self.assertIsNone(loaded_result._posterior)
+        self.assertIsNone(loaded_result._nested_samples)
+        self.assertEqual(self.result.log_evidence, loaded_result.log_evidence)
+        self.assertEqual(self.result.log_bayes_factor, loaded_result.log_bayes_factor)
+        self.assertEqual(self.result.search_parameter_keys, loaded_result.search_parameter_keys)
+        self.assertEqual(self.result.priors['x'], loaded_result.priors['x'])
+        self.assertTrue(pd.DataFrame.equals(
+            self.result.posterior, loaded_result.posterior))
+        self.assertTrue(np.array_equal(
+            self.result.nested_samples, loaded_result.nested_samples))
+        with self.assertRaises(ValueError):
+            _ = loaded_result.walkers
+
+    def test_save_lazy_result_to_same_file(self):
+        self.result.nested_samples = np.random.normal(size=(20, 2))
+        self.result.save_to_file()
+        for overwrite in [False, True]:
+            loaded_result = bilby.core.result.read_in_result(
+                outdir=self.result.outdir, label=self.result.label, lazy=True)
+            loaded_result.save_to_file(overwrite=overwrite)
+            reloaded_result = bilby.core.result.read_in_result(
+                outdir=self.result.outdir, label=self.result.label)
+            self.assertTrue(pd.DataFrame.equals(
+                self.result.posterior, reloaded_result.posterior))
+            self.assertTrue(np.array_equal(
+                self.result.nested_samples, reloaded_result.nested_samples))
+            self.assertEqual(self.result.log_evidence, reloaded_result.log_evidence)
+
+    def test_posterior_saved_by_column(self):
+        self.result.posterior = self.result.posterior[['y', 'x']]
+        self.result.save_to_file()
+        filename = bilby.core.result.result_file_name(
+            self.result.outdir, self.result.label)
+        self.assertTrue(np.array_equal(
+            deepdish.io.load(filename, '/data/posterior/y'),
+            self.result.posterior['y'].values))
+        for lazy in [False, True]:
+            loaded_result = bilby.core.result.read_in_result(
+                filename=filename, lazy=lazy)
+            self.assertEqual(list(loaded_result.posterior.columns), ['y', 'x'])
+
+    def test_load_posterior_data_frame(self):
+        bilby.core.utils.check_directory_exists_and_if_not_mkdir(
+            self.result.outdir)
+        filename = bilby.core.result.result_file_name(
+            self.result.outdir, self.result.label)
+        deepdish.io.save(filename, OrderedDict(
+            label=self.result.label, posterior=self.result.posterior,
+            log_evidence=self.result.log_evidence))
+        for lazy in [False, True]:
+            loaded_result = bilby.core.result.read_in_result(
+                filename=filename, lazy=lazy)
+            self.assertTrue(pd.DataFrame.equals(
+                self.result.posterior, loaded_result.posterior))
+            self.assertEqual(self.result.log_evidence, loaded_result.log_evidence)
+
     def test_save_and_dont_overwrite(self):
         shutil.rmtree(
             '{}/{}_result.h5.old'.format(self.result.outdir, self.result.label),
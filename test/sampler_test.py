@@ -3,6 +3,7 @@ import bilby
 from bilby.core import prior
 import unittest
 from mock import MagicMock
+import mock
 import numpy as np
 import os
 import sys
@@ -86,6 +87,43 @@ class TestSampler(unittest.TestCase):
         _ = self.sampler.log_likelihood([0])
         self.assertDictEqual(self.sampler.likelihood.parameters, expected_dict)
 
+    def test_log_likelihood_batch_with_use_ratio(self):
+        self.sampler.use_ratio = True
+        self.sampler.likelihood.log_likelihood_ratio_batch = MagicMock(
+            return_value=np.ones(2))
+        self.sampler.log_likelihood_batch(np.array([[0], [1]]))
+        parameters = \
+            self.sampler.likelihood.log_likelihood_ratio_batch.call_args[0][0]
+        self.assertListEqual(list(parameters.keys()), ['c'])
+        self.assertTrue(np.array_equal(parameters['c'], [0, 1]))
+
+    def test_log_likelihood_batch_without_use_ratio(self):
+        self.sampler.use_ratio = False
+        log_l = self.sampler.log_likelihood_batch(np.array([[0], [1]]))
+        self.assertTrue(np.array_equal(log_l, [2, 2]))
+
+    def test_setup_pool_npool_one(self):
+        self.sampler._setup_pool()
+        self.assertIsNone(self.sampler.pool)
+
+    def test_setup_pool_not_supported(self):
+        self.sampler.npool = 2
+        self.sampler._setup_pool()
+        self.assertIsNone(self.sampler.pool)
+
+    def test_setup_and_close_pool(self):
+        self.sampler.npool = 2
+        self.sampler.supports_pool = True
+        self.sampler._setup_pool()
+        self.assertIsNotNone(self.sampler.pool)
+        self.sampler._close_pool()
+        self.assertIsNone(self.sampler.pool)
+
+    def test_getstate_discards_pool(self):
+        self.sampler.pool = MagicMock()
+        self.assertIsNone(self.sampler.__getstate__()['pool'])
+        self.assertIsNotNone(self.sampler.pool)
+
     def test_get_random_draw(self):
         self.assertEqual(self.sampler.get_random_draw_from_prior(), np.array([0.5]))
 
@@ -176,6 +214,112 @@ class TestDynesty(unittest.TestCase):
             self.assertDictEqual(expected, self.sampler.kwargs)
 
 
+class TestDynestyCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.likelihood = MagicMock()
+        self.priors = dict()
+        self.outdir = 'outdir_dynesty_checkpoint'
+        self.sampler = bilby.core.sampler.Dynesty(
+            self.likelihood, self.priors, outdir=self.outdir, label='label',
+            use_ratio=False, plot=False, skip_import_verification=True)
+        self.sampler.sampler = MagicMock()
+        self.iteration = 0
+        self._add_dead_points(5)
+
+    def tearDown(self):
+        del self.likelihood
+        del self.priors
+        del self.sampler
+        if os.path.isdir(self.outdir):
+            shutil.rmtree(self.outdir)
+
+    def _add_dead_points(self, n_points):
+        dynesty_sampler = self.sampler.sampler
+        for attribute in self.sampler._checkpoint_dead_point_keys:
+            if self.iteration == 0:
+                setattr(dynesty_sampler, attribute, list())
+            values = getattr(dynesty_sampler, attribute)
+            for ii in range(self.iteration, self.iteration + n_points):
+                if attribute in ['saved_u', 'saved_v']:
+                    values.append(np.array([ii, ii + 0.5]))
+                else:
+                    values.append(ii)
+        self.iteration += n_points
+        dynesty_sampler.live_u = np.random.uniform(0, 1, (3, 2))
+        dynesty_sampler.live_v = np.random.uniform(0, 1, (3, 2))
+        dynesty_sampler.live_logl = list(np.random.uniform(0, 1, 3))
+        dynesty_sampler.live_bound = np.zeros(3, dtype=int)
+        dynesty_sampler.live_it = np.zeros(3, dtype=int)
+        dynesty_sampler.ncall = 10 * self.iteration
+        dynesty_sampler.it = self.iteration + 1
+        dynesty_sampler.nlive = 3
+        dynesty_sampler.added_live = False
+
+    def test_write_appends_segments(self):
+        self.sampler.write_current_state()
+        self.assertEqual(self.sampler.sampler.saved_id, [4])
+        self._add_dead_points(3)
+        self.sampler.write_current_state()
+        self.assertListEqual(
+            self.sampler._read_manifest()['segments'],
+            ['segment_000000.npz', 'segment_000001.npz'])
+        self.assertEqual(
+            len(self.sampler._read_segment('segment_000001.npz')['id']), 3)
+
+    def test_read_all_dead_points(self):
+        self.sampler.write_current_state()
+        self._add_dead_points(3)
+        self.sampler.write_current_state()
+        live_v = self.sampler.sampler.live_v
+        self.assertTrue(self.sampler.read_saved_state())
+        self.assertListEqual(list(self.sampler.sampler.saved_id), list(range(8)))
+        self.assertTrue(np.array_equal(
+            self.sampler.sampler.saved_v, [[ii, ii + 0.5] for ii in range(8)]))
+        self.assertTrue(np.array_equal(self.sampler.sampler.live_v, live_v))
+        self.assertEqual(self.sampler.sampler.ncall, 80)
+        self.assertEqual(self.sampler.sampler.it, 9)
+        self.assertFalse(os.path.isdir(self.sampler.resume_directory))
+
+    def test_read_continuing_loads_last_dead_point(self):
+        self.sampler.write_current_state()
+        self.assertTrue(self.sampler.read_saved_state(continuing=True))
+        self.assertListEqual(list(self.sampler.sampler.saved_id), [4])
+        self.assertTrue(os.path.isdir(self.sampler.resume_directory))
+        self._add_dead_points(2)
+        self.sampler.write_current_state()
+        self.sampler.read_saved_state()
+        self.assertListEqual(list(self.sampler.sampler.saved_id), list(range(7)))
+
+    def test_interrupted_checkpoint_is_ignored(self):
+        self.sampler.write_current_state()
+        self._add_dead_points(3)
+        with mock.patch('json.dumps', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.sampler.write_current_state()
+        self.sampler.read_saved_state()
+        self.assertListEqual(list(self.sampler.sampler.saved_id), list(range(5)))
+
+    def test_read_no_checkpoint(self):
+        self.assertFalse(self.sampler.read_saved_state())
+
+    def test_read_legacy_checkpoint(self):
+        from deepdish.io import save
+        dynesty_sampler = self.sampler.sampler
+        legacy = {key: np.array(getattr(dynesty_sampler, attribute)) for
+                  attribute, key in self.sampler._checkpoint_dead_point_keys.items()}
+        legacy.update({key: np.array(getattr(dynesty_sampler, key)) for
+                       key in self.sampler._checkpoint_live_point_keys})
+        legacy.update(ncall=50, iteration=5, nlive=3, added_live=False)
+        os.makedirs(self.outdir)
+        save(self.sampler._legacy_resume_file, legacy)
+        self.assertTrue(self.sampler.read_saved_state(continuing=True))
+        self.assertFalse(os.path.isfile(self.sampler._legacy_resume_file))
+        self.assertListEqual(list(dynesty_sampler.saved_id), [4])
+        self.sampler.read_saved_state()
+        self.assertListEqual(list(dynesty_sampler.saved_id), list(range(5)))
+
+
 class TestEmcee(unittest.TestCase):
 
     def setUp(self):
@@ -195,7 +339,7 @@ class TestEmcee(unittest.TestCase):
         expected = dict(nwalkers=500, a=2, args=[], kwargs={},
                         postargs=None, pool=None, live_dangerously=False,
                         runtime_sortingfn=None, lnprob0=None, rstate0=None,
-                        blobs0=None, iterations=100, thin=1, storechain=True, mh_proposal=None
+                        blobs0=None, iterations=100, thin=1, storechain=True, mh_proposal=None, vectorize=False
                         )
         self.assertDictEqual(expected, self.sampler.kwargs)
 
@@ -203,7 +347,7 @@ class TestEmcee(unittest.TestCase):
         expected = dict(nwalkers=100, a=2, args=[], kwargs={},
                         postargs=None, pool=None, live_dangerously=False,
                         runtime_sortingfn=None, lnprob0=None, rstate0=None,
-                        blobs0=None, iterations=100, thin=1, storechain=True, mh_proposal=None)
+                        blobs0=None, iterations=100, thin=1, storechain=True, mh_proposal=None, vectorize=False)
         for equiv in bilby.core.sampler.base_sampler.MCMCSampler.nwalkers_equiv_kwargs:
             new_kwargs = self.sampler.kwargs.copy()
             del new_kwargs['nwalkers']
@@ -212,6 +356,83 @@ class TestEmcee(unittest.TestCase):
             self.assertDictEqual(expected, self.sampler.kwargs)
 
 
+class TestNumpyChainStore(unittest.TestCase):
+
+    def setUp(self):
+        self.outdir = 'outdir_chain_store'
+        self.filename = os.path.join(self.outdir, 'chain.npy')
+        self.store = bilby.core.sampler.base_sampler.NumpyChainStore(
+            self.filename, n_buffer_steps=3)
+        self.steps = np.random.uniform(0, 1, (7, 4, 5))
+
+    def tearDown(self):
+        if os.path.isdir(self.outdir):
+            shutil.rmtree(self.outdir)
+
+    def test_steps_are_buffered(self):
+        for step in self.steps[:2]:
+            self.store.append(step)
+        self.assertFalse(self.store.exists)
+        self.store.append(self.steps[2])
+        self.assertEqual(self.store.nsteps_on_disk, 3)
+
+    def test_read(self):
+        for step in self.steps:
+            self.store.append(step)
+        self.assertTrue(np.array_equal(self.store.read(), self.steps))
+        self.assertTrue(np.array_equal(np.load(self.filename), self.steps))
+
+    def test_read_last(self):
+        for step in self.steps:
+            self.store.append(step)
+        self.assertTrue(np.array_equal(self.store.read_last(), self.steps[-1]))
+
+    def test_append_to_existing_file(self):
+        for step in self.steps[:4]:
+            self.store.append(step)
+        self.store.flush()
+        store = bilby.core.sampler.base_sampler.NumpyChainStore(self.filename)
+        for step in self.steps[4:]:
+            store.append(step)
+        self.assertTrue(np.array_equal(store.read(), self.steps))
+
+    def test_interrupted_write_is_discarded(self):
+        for step in self.steps[:3]:
+            self.store.append(step)
+        with open(self.filename, 'ab') as ff:
+            ff.write(b'incomplete')
+        for step in self.steps[3:]:
+            self.store.append(step)
+        self.assertTrue(np.array_equal(self.store.read(), self.steps))
+
+    def test_append_wrong_shape_raises_error(self):
+        for step in self.steps[:3]:
+            self.store.append(step)
+        self.store.append(self.steps[3, :2])
+        with self.assertRaises(ValueError):
+            self.store.flush()
+
+    def test_reset(self):
+        for step in self.steps[:3]:
+            self.store.append(step)
+        self.store.reset()
+        self.assertFalse(self.store.exists)
+
+    def test_from_legacy_text_file(self):
+        os.makedirs(self.outdir)
+        text_file = os.path.join(self.outdir, 'chain.dat')
+        template = '{:d}' + '\t{:.9e}' * 5 + '\n'
+        with open(text_file, 'w') as ff:
+            ff.write('walker\ta\tb\tc\tlog_l')
+            for step in self.steps:
+                for ii, point in enumerate(step):
+                    ff.write(template.format(ii, *point))
+            ff.write(template.format(0, *self.steps[0, 0]))
+        store = bilby.core.sampler.base_sampler.NumpyChainStore.\
+            from_legacy_text_file(text_file, self.filename, nwalkers=4)
+        self.assertTrue(np.allclose(store.read(), self.steps))
+
+
 class TestNestle(unittest.TestCase):
 
     def setUp(self):
@@ -469,6 +690,44 @@ class TestRunningSamplers(unittest.TestCase):
             likelihood=self.likelihood, priors=self.priors, sampler='emcee',
             nsteps=1000, nwalkers=10, save=False)
 
+    def test_run_emcee_resume(self):
+        _ = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='emcee',
+            nsteps=100, nwalkers=10, nburn=10, save=False)
+        result = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='emcee',
+            nsteps=100, nwalkers=10, nburn=10, save=False)
+        self.assertEqual(result.walkers.shape, (10, 200, 2))
+        self.assertEqual(len(result.posterior), 10 * 190)
+
+    def test_emcee_autocorrelation_time_per_walker(self):
+        from emcee.autocorr import integrated_time
+        for sampler, kwargs in [('emcee', dict()), ('ptemcee', dict(ntemps=2))]:
+            result = bilby.run_sampler(
+                likelihood=self.likelihood, priors=self.priors,
+                sampler=sampler, nsteps=2000, nwalkers=10, burn_in_act=3,
+                save=False, **kwargs)
+            expected = int(np.max(integrated_time(
+                result.walkers.reshape((-1, 2)), c=3)))
+            self.assertGreater(expected, 1)
+            self.assertEqual(result.max_autocorrelation_time, expected)
+            self.assertEqual(result.nburn, 3 * expected)
+
+    def test_run_dynesty_npool(self):
+        _ = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='dynesty',
+            nlive=100, npool=2, save=False)
+
+    def test_run_emcee_npool(self):
+        _ = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='emcee',
+            nsteps=1000, nwalkers=10, npool=2, save=False)
+
+    def test_run_emcee_vectorized(self):
+        _ = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='emcee',
+            nsteps=1000, nwalkers=10, vectorize=True, save=False)
+
     def test_run_nestle(self):
         _ = bilby.run_sampler(
             likelihood=self.likelihood, priors=self.priors, sampler='nestle',
@@ -484,6 +743,25 @@ class TestRunningSamplers(unittest.TestCase):
             likelihood=self.likelihood, priors=self.priors, sampler='ptemcee',
             nsteps=1000, nwalkers=10, ntemps=10, save=False)
 
+    def test_run_ptemcee_resume(self):
+        _ = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='ptemcee',
+            nsteps=100, nwalkers=10, ntemps=2, nburn=10, save=False)
+        result = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='ptemcee',
+            nsteps=100, nwalkers=10, ntemps=2, nburn=10, save=False)
+        self.assertEqual(result.walkers.shape, (10, 100, 2))
+        result = bilby.run_sampler(
+            likelihood=self.likelihood, priors=self.priors, sampler='ptemcee',
+            nsteps=100, nwalkers=10, ntemps=2, nburn=10, resume=True,
+            save=False)
+        self.assertEqual(result.walkers.shape, (10, 200, 2))
+        with self.assertRaises(ValueError):
+            bilby.run_sampler(
+                likelihood=self.likelihood, priors=self.priors,
+                sampler='ptemcee', nsteps=100, nwalkers=10, ntemps=3,
+                nburn=10, resume=True, save=False)
+
     def test_run_pymc3(self):
         _ = bilby.run_sampler(
             likelihood=self.likelihood, priors=self.priors, sampler='pymc3',
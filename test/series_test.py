@@ -70,6 +70,23 @@ class TestCoupledTimeAndFrequencySeries(unittest.TestCase):
         self.assertAlmostEqual(new_duration, self.series.duration)
         self.assertAlmostEqual(self.start_time, self.series.start_time)
 
+    def test_non_uniform_frequency_array_setter(self):
+        new_frequency_array = np.array([20., 20.5, 21.5, 23.5, 27.5])
+        self.series.frequency_array = new_frequency_array
+        self.assertTrue(np.array_equal(
+            new_frequency_array, self.series.frequency_array))
+        self.assertEqual(self.sampling_frequency, self.series.sampling_frequency)
+        self.assertEqual(self.duration, self.series.duration)
+        self.assertFalse(self.series.frequency_array_is_uniform)
+        self.series.duration = self.duration
+        self.assertTrue(self.series.frequency_array_is_uniform)
+
+    def test_uniform_frequency_array_not_from_zero_setter(self):
+        new_frequency_array = np.arange(0, 51) / 2
+        self.series.frequency_array = new_frequency_array[10:]
+        self.assertTrue(self.series.frequency_array_is_uniform)
+        self.assertEqual(2, self.series.duration)
+
     def test_time_array_setter(self):
         new_sampling_frequency = 100
         new_duration = 3
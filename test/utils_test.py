@@ -149,5 +149,180 @@ class TestTimeAndFrequencyArrays(unittest.TestCase):
         self.assertTrue(np.allclose(self.frequency_array, new_frequency_array))
 
 
+class TestLogSpacedInterp2d(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(1)
+        self.x = np.hstack((-np.logspace(3, -3, 40), np.logspace(-3, 10, 40)))
+        self.y = np.logspace(-5, 10, 50)
+        self.z = np.random.normal(size=(len(self.y), len(self.x)))
+        self.interpolant = utils.LogSpacedInterp2d(self.x, self.y, self.z)
+        self.reference = utils.UnsortedInterp2d(self.x, self.y, self.z)
+
+    def tearDown(self):
+        del self.x
+        del self.y
+        del self.z
+        del self.interpolant
+        del self.reference
+
+    def test_matches_interp2d_array(self):
+        x = np.sign(np.random.normal(size=100)) * 10 ** np.random.uniform(-4, 11, 100)
+        for y in 10 ** np.random.uniform(-6, 11, 10):
+            self.assertTrue(np.allclose(
+                self.interpolant(x, y), self.reference(x, y), atol=1e-10))
+
+    def test_matches_interp2d_scalar(self):
+        for x, y in zip(np.random.uniform(-1000, 1000, 10),
+                        10 ** np.random.uniform(-5, 10, 10)):
+            self.assertAlmostEqual(
+                self.interpolant(x, y), self.reference(x, y)[0], places=10)
+
+    def test_values_on_nodes(self):
+        self.assertAlmostEqual(
+            self.interpolant(self.x[3], self.y[7]), self.z[7, 3], places=10)
+
+    def test_out_of_bounds_uses_edge(self):
+        self.assertAlmostEqual(
+            self.interpolant(1e20, 1e-20), self.z[0, -1], places=10)
+
+    def test_shape_preserved(self):
+        x = np.random.uniform(-1000, 1000, (3, 4))
+        self.assertEqual(self.interpolant(x, 10).shape, (3, 4))
+
+    def test_bad_shape_raises_error(self):
+        with self.assertRaises(ValueError):
+            utils.LogSpacedInterp2d(self.x, self.y, self.z.T)
+
+    def test_unsorted_axis_raises_error(self):
+        with self.assertRaises(ValueError):
+            utils.LogSpacedInterp2d(self.x[::-1], self.y, self.z)
+
+
+class TestLnI0(unittest.TestCase):
+
+    def test_matches_interpolated_table(self):
+        """ Compare against the interpolation table previously used for
+        phase marginalization """
+        from scipy.interpolate import interp1d
+        from scipy.special import i0e
+        snrs = np.logspace(-5, 10, int(1e6))
+        table = interp1d(snrs, snrs + np.log(i0e(snrs)))
+        values = np.logspace(-4.9, 9.9, 10000)
+        self.assertTrue(np.allclose(
+            bilby.gw.utils.ln_i0(values), table(values), rtol=1e-9, atol=1e-9))
+
+    def test_small_argument(self):
+        self.assertAlmostEqual(bilby.gw.utils.ln_i0(0), 0)
+        self.assertAlmostEqual(bilby.gw.utils.ln_i0(1e-3), 1e-3 ** 2 / 4)
+
+    def test_asymptotic_expansion_is_continuous(self):
+        threshold = bilby.gw.utils._LN_I0_ASYMPTOTIC_THRESHOLD
+        below, above = bilby.gw.utils.ln_i0(
+            np.array([threshold * (1 - 1e-12), threshold]))
+        self.assertAlmostEqual(below, above, places=8)
+
+    def test_scalar_matches_array(self):
+        values = np.array([0.1, 10, 5000, 1e8])
+        self.assertTrue(np.allclose(
+            bilby.gw.utils.ln_i0(values),
+            [bilby.gw.utils.ln_i0(value) for value in values]))
+
+    def test_even(self):
+        self.assertEqual(bilby.gw.utils.ln_i0(-20), bilby.gw.utils.ln_i0(20))
+
+
+class TestAntennaResponsesAndTimeDelays(unittest.TestCase):
+
+    def setUp(self):
+        self.ifos = bilby.gw.detector.InterferometerList(['H1', 'L1', 'V1'])
+        self.detector_tensors = np.array([ifo.detector_tensor for ifo in self.ifos])
+        self.vertices = np.array([ifo.vertex for ifo in self.ifos])
+        self.modes = ['plus', 'cross', 'breathing', 'longitudinal', 'x', 'y']
+
+    def test_matches_polarization_tensors(self):
+        ra, dec, time, psi = 1.2, -0.3, 1126259642.4, 0.7
+        responses, time_delays = bilby.gw.utils.get_antenna_responses_and_time_delays(
+            ra, dec, time, psi, self.detector_tensors, self.vertices, modes=self.modes)
+        for ii, ifo in enumerate(self.ifos):
+            for jj, mode in enumerate(self.modes):
+                polarization_tensor = bilby.gw.utils.get_polarization_tensor(
+                    ra, dec, time, psi, mode)
+                self.assertAlmostEqual(
+                    responses[ii, jj],
+                    np.einsum('ij,ij->', ifo.detector_tensor, polarization_tensor))
+            self.assertAlmostEqual(
+                time_delays[ii],
+                bilby.gw.utils.time_delay_geocentric(ifo.vertex, np.zeros(3), ra, dec, time))
+
+    def test_array_input_matches_scalar_input(self):
+        ra = np.array([0.1, 2.5, 5.0])
+        dec = np.array([-1.0, 0.2, 1.1])
+        time = 1126259642.4 + np.array([0, 100, 10000])
+        psi = np.array([0.3, 1.5, 2.9])
+        responses, time_delays = bilby.gw.utils.get_antenna_responses_and_time_delays(
+            ra, dec, time, psi, self.detector_tensors, self.vertices)
+        self.assertEqual(responses.shape, (3, 2, 3))
+        self.assertEqual(time_delays.shape, (3, 3))
+        for kk in range(3):
+            single_responses, single_delays = bilby.gw.utils.get_antenna_responses_and_time_delays(
+                ra[kk], dec[kk], time[kk], psi[kk], self.detector_tensors, self.vertices)
+            self.assertTrue(np.allclose(responses[..., kk], single_responses))
+            self.assertTrue(np.allclose(time_delays[..., kk], single_delays))
+
+    def test_unknown_mode_raises_error(self):
+        with self.assertRaises(ValueError):
+            bilby.gw.utils.get_antenna_responses_and_time_delays(
+                0, 0, 0, 0, self.detector_tensors, self.vertices, modes=['scalar'])
+
+
+class TestTimeShiftedROQWeights(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(2)
+        self.duration = 4
+        self.number_of_time_samples = 256
+        self.frequency_indices = np.arange(10, 100)
+        self.frequencies = self.frequency_indices / self.duration
+        self.data = np.random.normal(size=90) + 1j * np.random.normal(size=90)
+        self.basis = np.random.normal(size=(90, 7)) + \
+            1j * np.random.normal(size=(90, 7))
+        self.time_indices = np.arange(-5, 40)
+
+    def test_matches_roq_weights_of_shifted_data(self):
+        weights = bilby.gw.utils.build_time_shifted_roq_weights(
+            self.data, self.basis, self.frequency_indices, self.time_indices,
+            self.number_of_time_samples, 1 / self.duration)
+        times = self.time_indices * self.duration / self.number_of_time_samples
+        for ii, time in enumerate(times):
+            expected = bilby.gw.utils.build_roq_weights(
+                self.data * np.exp(2j * np.pi * self.frequencies * time),
+                self.basis, 1 / self.duration)
+            self.assertTrue(np.allclose(weights[ii], expected))
+
+    def test_independent_of_block_size(self):
+        weights = [bilby.gw.utils.build_time_shifted_roq_weights(
+            self.data, self.basis, self.frequency_indices, self.time_indices,
+            self.number_of_time_samples, 1 / self.duration,
+            block_size=block_size) for block_size in [1, 3, 7]]
+        self.assertTrue(np.allclose(weights[0], weights[1]))
+        self.assertTrue(np.allclose(weights[0], weights[2]))
+
+    def test_peak_memory_within_max_block_bytes(self):
+        import tracemalloc
+        number_of_time_samples = 2 ** 14
+        max_block_bytes = 3 * 16 * number_of_time_samples * 2
+        tracemalloc.start()
+        try:
+            bilby.gw.utils.build_time_shifted_roq_weights(
+                self.data, self.basis, self.frequency_indices,
+                self.time_indices, number_of_time_samples, 1 / self.duration,
+                max_block_bytes=max_block_bytes)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(peak, max_block_bytes)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -16,6 +16,12 @@ def dummy_func_dict_return_value(frequency_array, amplitude, mu, sigma, ra, dec,
     return ht
 
 
+def dummy_func_distance_phase(frequency_array, amplitude, mu, luminosity_distance, phase, **kwargs):
+    ht = {'plus': amplitude * np.exp(-(frequency_array - mu) ** 2 / 100 + 2j * phase) / luminosity_distance,
+          'cross': 1j * amplitude * np.exp(-(frequency_array - mu) ** 2 / 100 + 2j * phase) / luminosity_distance}
+    return ht
+
+
 class TestWaveformGeneratorInstantiationWithoutOptionalParameters(unittest.TestCase):
 
     def setUp(self):
@@ -175,6 +181,66 @@ class TestSetters(unittest.TestCase):
         self.assertEqual(conversion_func, self.waveform_generator.parameter_conversion)
 
 
+class TestParameterConversionPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.conversion = MagicMock(side_effect=lambda parameters: (parameters, []))
+        self.waveform_generator = bilby.gw.waveform_generator.WaveformGenerator(
+            1, 4096, frequency_domain_source_model=dummy_func_dict_return_value,
+            parameter_conversion=self.conversion, waveform_arguments=dict(test='test'))
+        self.simulation_parameters = dict(amplitude=1e-21, mu=100, sigma=1, ra=1.375, dec=-1.2108,
+                                          geocent_time=1126259642.413, psi=2.659, extra=3)
+
+    def tearDown(self):
+        del self.conversion
+        del self.waveform_generator
+        del self.simulation_parameters
+
+    def test_conversion_skipped_when_source_parameters_are_given(self):
+        self.waveform_generator.parameters = self.simulation_parameters
+        self.simulation_parameters['mu'] = 200
+        self.waveform_generator.parameters = self.simulation_parameters
+        self.assertEqual(self.conversion.call_count, 1)
+        self.assertEqual(self.waveform_generator.parameters['mu'], 200)
+        self.assertEqual(self.waveform_generator.parameters['test'], 'test')
+        self.assertNotIn('extra', self.waveform_generator.parameters)
+
+    def test_conversion_called_when_it_computes_source_parameters(self):
+        def conversion(parameters):
+            parameters['mu'] = parameters.pop('log_mu') ** 10
+            return parameters, ['mu']
+
+        self.waveform_generator.parameter_conversion = conversion
+        self.simulation_parameters['log_mu'] = self.simulation_parameters.pop('mu')
+        for log_mu in [2, 3]:
+            self.simulation_parameters['log_mu'] = log_mu
+            self.waveform_generator.parameters = self.simulation_parameters
+            self.assertEqual(self.waveform_generator.parameters['mu'], log_mu ** 10)
+        self.assertIn('log_mu', self.simulation_parameters)
+
+    def test_generic_path_used_when_keys_change(self):
+        self.waveform_generator.parameters = self.simulation_parameters
+        self.simulation_parameters.pop('extra')
+        self.waveform_generator.parameters = self.simulation_parameters
+        self.assertEqual(self.conversion.call_count, 2)
+
+    def test_matches_generic_path_for_binary_black_hole_conversion(self):
+        waveform_generator = bilby.gw.waveform_generator.WaveformGenerator(
+            1, 4096, frequency_domain_source_model=bilby.gw.source.lal_binary_black_hole,
+            parameter_conversion=bilby.gw.conversion.convert_to_lal_binary_black_hole_parameters)
+        parameters = dict(chirp_mass=20., mass_ratio=0.8, a_1=0.3, a_2=0.2, cos_tilt_1=0.5, tilt_2=1.0,
+                          phi_12=1.7, phi_jl=0.3, luminosity_distance=400., cos_iota=0.2, phase=1.3,
+                          ra=1.375, dec=-1.2108, geocent_time=1126259642.413, psi=2.659)
+        waveform_generator.parameters = parameters
+        for chirp_mass in [25., 30.]:
+            parameters['chirp_mass'] = chirp_mass
+            waveform_generator.parameters = parameters
+            expected, _ = bilby.gw.conversion.convert_to_lal_binary_black_hole_parameters(parameters)
+            self.assertEqual(sorted(waveform_generator.parameters), sorted(waveform_generator.source_parameter_keys))
+            for key in waveform_generator.parameters:
+                self.assertEqual(waveform_generator.parameters[key], expected[key])
+
+
 class TestFrequencyDomainStrainMethod(unittest.TestCase):
 
     def setUp(self):
@@ -264,6 +330,110 @@ class TestFrequencyDomainStrainMethod(unittest.TestCase):
                              sorted(['amplitude', 'mu', 'sigma', 'ra', 'dec', 'geocent_time', 'psi']))
 
 
+    def test_frequency_sequence_matches_frequency_array(self):
+        waveform_generator = bilby.gw.waveform_generator.WaveformGenerator(
+            duration=4, sampling_frequency=2048,
+            frequency_domain_source_model=bilby.gw.source.lal_binary_neutron_star)
+        parameters = dict(
+            mass_1=1.5, mass_2=1.3, chi_1=0.02, chi_2=-0.01,
+            luminosity_distance=100., iota=0.4, phase=1.3, lambda_1=300,
+            lambda_2=400)
+        expected = waveform_generator.frequency_domain_strain(parameters)
+        indices = np.array([10, 80, 81, 85, 100, 400, 2000, 4000])
+        waveform_generator.frequency_array = \
+            waveform_generator.frequency_array[indices]
+        self.assertEqual(waveform_generator.duration, 4)
+        actual = waveform_generator.frequency_domain_strain(parameters)
+        for mode in ['plus', 'cross']:
+            self.assertTrue(np.allclose(
+                expected[mode][indices], actual[mode], rtol=1e-10, atol=0))
+        self.assertTrue(np.all(actual['plus'][:1] == 0))
+        with self.assertRaises(ValueError):
+            waveform_generator.time_domain_strain(parameters)
+
+
+class TestWaveformCache(unittest.TestCase):
+
+    def setUp(self):
+        self.parameters = dict(amplitude=1e-21, mu=100, luminosity_distance=400, phase=0.3,
+                               ra=1.375, dec=-1.2108, geocent_time=1126259642.413, psi=2.659)
+        self.reference = bilby.gw.waveform_generator.WaveformGenerator(
+            1, 4096, frequency_domain_source_model=dummy_func_distance_phase)
+
+    def tearDown(self):
+        del self.parameters
+        del self.reference
+
+    def get_waveform_generator(self, **kwargs):
+        return bilby.gw.waveform_generator.WaveformGenerator(
+            1, 4096, frequency_domain_source_model=dummy_func_distance_phase, **kwargs)
+
+    def assert_matches_reference(self, waveform_generator, parameters):
+        strain = waveform_generator.frequency_domain_strain(parameters)
+        expected = self.reference.frequency_domain_strain(parameters)
+        for mode in expected:
+            self.assertTrue(np.allclose(
+                strain[mode], expected[mode], atol=1e-12 * np.max(np.abs(expected[mode])), rtol=0))
+
+    def test_cache_disabled_by_default(self):
+        waveform_generator = self.get_waveform_generator()
+        waveform_generator.frequency_domain_strain(self.parameters)
+        waveform_generator.frequency_domain_strain(self.parameters)
+        self.assertEqual(waveform_generator.waveform_cache_hits, 0)
+        self.assertEqual(waveform_generator.waveform_cache_misses, 0)
+
+    def test_hit_when_only_sky_position_changes(self):
+        waveform_generator = self.get_waveform_generator(waveform_cache_size=2)
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.parameters.update(ra=0.1, dec=0.2, psi=0.3, geocent_time=1126259643)
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.assertEqual(waveform_generator.waveform_cache_hits, 1)
+        self.assertEqual(waveform_generator.waveform_cache_misses, 1)
+
+    def test_miss_when_distance_changes_and_not_extrinsic(self):
+        waveform_generator = self.get_waveform_generator(waveform_cache_size=2)
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.parameters['luminosity_distance'] = 800
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.assertEqual(waveform_generator.waveform_cache_hits, 0)
+        self.assertEqual(waveform_generator.waveform_cache_misses, 2)
+
+    def test_extrinsic_distance_and_phase_rescaling(self):
+        waveform_generator = self.get_waveform_generator(
+            waveform_cache_size=2, extrinsic_parameters=['luminosity_distance', 'phase'])
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.parameters.update(luminosity_distance=800, phase=2.1)
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.assertEqual(waveform_generator.waveform_cache_hits, 1)
+        self.assertEqual(waveform_generator.waveform_cache_misses, 1)
+
+    def test_least_recently_used_waveform_is_evicted(self):
+        waveform_generator = self.get_waveform_generator(waveform_cache_size=2)
+        for mu in [100, 200, 100, 300, 100, 200]:
+            self.parameters['mu'] = mu
+            self.assert_matches_reference(waveform_generator, self.parameters)
+        self.assertEqual(waveform_generator.waveform_cache_hits, 2)
+        self.assertEqual(waveform_generator.waveform_cache_misses, 4)
+
+    def test_cached_waveform_is_not_modified_by_caller(self):
+        waveform_generator = self.get_waveform_generator(waveform_cache_size=2)
+        strain = waveform_generator.frequency_domain_strain(self.parameters)
+        strain['plus'] *= 0
+        self.assert_matches_reference(waveform_generator, self.parameters)
+
+    def test_cache_cleared_when_duration_changes(self):
+        waveform_generator = self.get_waveform_generator(waveform_cache_size=2)
+        waveform_generator.frequency_domain_strain(self.parameters)
+        waveform_generator.duration = 2
+        self.reference.duration = 2
+        self.assert_matches_reference(waveform_generator, self.parameters)
+        self.assertEqual(waveform_generator.waveform_cache_misses, 2)
+
+    def test_unsupported_extrinsic_parameter_raises_error(self):
+        with self.assertRaises(ValueError):
+            self.get_waveform_generator(waveform_cache_size=2, extrinsic_parameters=['mu'])
+
+
 class TestTimeDomainStrainMethod(unittest.TestCase):
 
     def setUp(self):